@@ -10,6 +10,7 @@ from __future__ import print_function
 import itertools
 
 from lfa import LFA
+import stats
 from copy import deepcopy
 from itertools import chain, combinations
 
@@ -56,6 +57,8 @@ class BA(LFA):
         self.label = None
         self.is_epsilon_free = None
         self.epsilon_free = None
+        self.language_hash = None
+        self.matcher = None
 
     @staticmethod
     def get_new():
@@ -157,7 +160,17 @@ class BA(LFA):
         print("delta2:")
         print(self.delta2)
 
-    def complement_ncsb(self):
+    @stats.timed("complement_ncsb")
+    def complement_ncsb(self, budget=None):
+        """
+        Complements semi-deterministic Buchi automaton by the NCSB construction
+        :param budget: stats.Budget limiting explored states, generated transitions and time
+        :return: complement automaton
+        """
+        if budget is not None:
+            with stats.use(budget):
+                return self.complement_ncsb()
+
         # get division to Qn,Qd, delta_n, delta_t, delta_d
         self.split_components()
         final = self.final[0]
@@ -187,7 +200,11 @@ class BA(LFA):
 
         done = []
 
+        statistics = stats.get_active()
         while len(queue):
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             state_set = queue.pop()
             done.append(state_set)
 
@@ -249,6 +266,8 @@ class BA(LFA):
                         new_state = self.get_ncsb(new_n, new_new_c, new_new_s, new_b)
                         new_label = self.get_text_label(new_state)
                         complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                        if statistics is not None:
+                            statistics.count("transitions_generated")
                         # save for later processing
                         if new_state not in queue and new_state not in done:
                             queue.append(new_state)
@@ -261,6 +280,8 @@ class BA(LFA):
                     new_state = self.get_ncsb(new_n, new_c, new_s, new_b)
                     new_label = self.get_text_label(new_state)
                     complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                    if statistics is not None:
+                        statistics.count("transitions_generated")
                     # save for later processing
                     if new_state not in queue and new_state not in done:
                         queue.append(new_state)
@@ -270,7 +291,17 @@ class BA(LFA):
 
         return complement
 
-    def complement_ncsb_early_flush(self):
+    @stats.timed("complement_ncsb_early_flush")
+    def complement_ncsb_early_flush(self, budget=None):
+        """
+        Complements semi-deterministic Buchi automaton by the NCSB construction, early flush variant
+        :param budget: stats.Budget limiting explored states, generated transitions and time
+        :return: complement automaton
+        """
+        if budget is not None:
+            with stats.use(budget):
+                return self.complement_ncsb_early_flush()
+
         # get division to Qn,Qd, delta_n, delta_t, delta_d
         self.split_components()
         final = self.final[0]
@@ -303,7 +334,11 @@ class BA(LFA):
 
         done = []
 
+        statistics = stats.get_active()
         while len(queue):
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             state_set = queue.pop()
             done.append(state_set)
 
@@ -369,6 +404,8 @@ class BA(LFA):
                         new_state = self.get_ncsba(new_n, new_new_c, new_new_s, new_b, new_a)
                         new_label = self.get_text_label(new_state)
                         complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                        if statistics is not None:
+                            statistics.count("transitions_generated")
                         # save for later processing
                         if new_state not in queue and new_state not in done:
                             queue.append(new_state)
@@ -384,6 +421,8 @@ class BA(LFA):
                     new_state = self.get_ncsba(new_n, new_c, new_s, new_b, new_a)
                     new_label = self.get_text_label(new_state)
                     complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                    if statistics is not None:
+                        statistics.count("transitions_generated")
                     # save for later processing
                     if new_state not in queue and new_state not in done:
                         queue.append(new_state)
@@ -393,7 +432,17 @@ class BA(LFA):
 
         return complement
 
-    def complement_ncsb_lazy(self):
+    @stats.timed("complement_ncsb_lazy")
+    def complement_ncsb_lazy(self, budget=None):
+        """
+        Complements semi-deterministic Buchi automaton by the lazy NCSB construction
+        :param budget: stats.Budget limiting explored states, generated transitions and time
+        :return: complement automaton
+        """
+        if budget is not None:
+            with stats.use(budget):
+                return self.complement_ncsb_lazy()
+
         # get division to Qn,Qd, delta_n, delta_t, delta_d
         self.split_components()
         final = self.final[0]
@@ -423,7 +472,11 @@ class BA(LFA):
 
         done = []
 
+        statistics = stats.get_active()
         while len(queue):
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             state_set = queue.pop()
             done.append(state_set)
 
@@ -481,6 +534,8 @@ class BA(LFA):
                             new_state = self.get_ncsb(new_n, new_new_c, new_new_s, new_new_b)
                             new_label = self.get_text_label(new_state)
                             complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                            if statistics is not None:
+                                statistics.count("transitions_generated")
                             # save for later processing
                             if new_state not in queue and new_state not in done:
                                 queue.append(new_state)
@@ -488,6 +543,8 @@ class BA(LFA):
                         new_state = self.get_ncsb(new_n, new_c - new_s, new_s, new_b)
                         new_label = self.get_text_label(new_state)
                         complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                        if statistics is not None:
+                            statistics.count("transitions_generated")
                         # save for later processing
                         if new_state not in queue and new_state not in done:
                             queue.append(new_state)
@@ -516,6 +573,8 @@ class BA(LFA):
                             new_state = self.get_ncsb(new_n, new_new_c, new_new_s, new_b)
                             new_label = self.get_text_label(new_state)
                             complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                            if statistics is not None:
+                                statistics.count("transitions_generated")
                             # save for later processing
                             if new_state not in queue and new_state not in done:
                                 queue.append(new_state)
@@ -523,6 +582,8 @@ class BA(LFA):
                         new_state = self.get_ncsb(new_n, new_c, new_s, deepcopy(new_c))
                         new_label = self.get_text_label(new_state)
                         complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                        if statistics is not None:
+                            statistics.count("transitions_generated")
                         # save for later processing
                         if new_state not in queue and new_state not in done:
                             queue.append(new_state)
@@ -532,7 +593,17 @@ class BA(LFA):
 
         return complement
 
-    def complement_ncsb_por(self):
+    @stats.timed("complement_ncsb_por")
+    def complement_ncsb_por(self, budget=None):
+        """
+        Complements semi-deterministic Buchi automaton by the NCSB construction with partial order reduction
+        :param budget: stats.Budget limiting explored states, generated transitions and time
+        :return: complement automaton
+        """
+        if budget is not None:
+            with stats.use(budget):
+                return self.complement_ncsb_por()
+
         # get division to Qn,Qd, delta_n, delta_t, delta_d
         self.split_components()
         final = self.final[0]
@@ -550,7 +621,11 @@ class BA(LFA):
         queue.append(start)
         done = []
 
+        statistics = stats.get_active()
         while len(queue):
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             state_set = queue.pop()
             done.append(state_set)
 
@@ -598,6 +673,8 @@ class BA(LFA):
                 if new_set not in queue and new_set not in done:
                     new_label = self.get_text_label(new_set)
                     complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                    if statistics is not None:
+                        statistics.count("transitions_generated")
                     queue.append(new_set)
                 else:
 
@@ -625,6 +702,8 @@ class BA(LFA):
                             new_state = self.get_ncsb(new_n, new_new_c, new_new_s, new_b)
                             new_label = self.get_text_label(new_state)
                             complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                            if statistics is not None:
+                                statistics.count("transitions_generated")
                             # save for later processing
                             if new_state not in queue and new_state not in done:
                                 queue.append(new_state)
@@ -637,6 +716,8 @@ class BA(LFA):
                         new_state = self.get_ncsb(new_n, new_c, new_s, new_b)
                         new_label = self.get_text_label(new_state)
                         complement.transitions = self.add_trans(complement.transitions, label, symbol, new_label)
+                        if statistics is not None:
+                            statistics.count("transitions_generated")
                         # save for later processing
                         if new_state not in queue and new_state not in done:
                             queue.append(new_state)
@@ -772,6 +853,18 @@ class BA(LFA):
         for q in other.final[0]:
             uni.final[0].add(q + "_2")
 
+    def get_final_union_many(self, automata, uni):
+        uni.final = []
+        uni.final.append(set())
+        for i, automaton in enumerate(automata, 1):
+            for q in automaton.final[0]:
+                uni.final[0].add(q + "_" + str(i))
+
+    def intersection_many(self, others, order_by_size=True, trim=True):
+        print("Intersection of more automata not implemented yet for Buchi automata")
+        return None
+
+    @stats.timed("product")
     def intersection(self, a2):
         """
         Performs intersection of two automata
@@ -794,7 +887,11 @@ class BA(LFA):
         final1 = set()
         final2 = set()
 
+        statistics = stats.get_active()
         while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             combined = queue.pop()
             state1 = combined[0]
             state2 = combined[1]
@@ -835,6 +932,10 @@ class BA(LFA):
         print("Is_empty not implemented yet for Buchi automata")
         return None
 
+    def is_intersection_empty(self, other):
+        print("Intersection emptiness not implemented yet for Buchi automata")
+        return None
+
     def simulations_preorder(self):
         print("Simulations not implemented yet for Buchi automata")
         return None
@@ -843,10 +944,22 @@ class BA(LFA):
         print("Inclusion not implemented yet for Buchi automata")
         return None
 
+    def get_language_hash(self):
+        print("Language hash not implemented yet for Buchi automata")
+        return None
+
+    def get_matcher(self):
+        print("Matcher not implemented yet for Buchi automata")
+        return None
+
+    def accepts(self, word):
+        print("Membership of finite words not implemented yet for Buchi automata")
+        return None
+
     def get_deterministic_transitions(self, state_group):
         print("Simulations not implemented yet for Buchi automata")
         return None
 
-    def post_antichain(self, other, pair):
+    def post_antichain(self, other, pair, table=None):
         print("Antichains not implemented yet for Buchi automata")
         return None
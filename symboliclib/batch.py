@@ -0,0 +1,264 @@
+"""
+Batch runner of operations over corpora of automata
+
+runs one operation over all automata of a directory or a manifest in a pool of processes
+and streams one JSON line per task, every task has its own time limit and memory limit,
+the exit status is 1 if some task did not end with status ok
+
+usage:
+    python3 batch.py operation input [options]
+
+    input is a directory (every file is one task) or a manifest file
+    (every line is one task: one file, or two files separated by whitespace for binary operations)
+
+    examples:
+        python3 batch.py complement_ncsb ./test-buchi --jobs 8 --timeout 60
+        python3 batch.py inclusion_antichain ./test --with ./test/symbolic_test1
+"""
+from __future__ import print_function
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from result_cache import ResultCache, OPERATIONS
+from symbolic_parser import parse
+from rmc import Reachability
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# operations on one automaton
+UNARY = {
+    "load": lambda a: a,
+    "complement": lambda a: a.complement(),
+    "complement_ncsb": lambda a: a.complement_ncsb(),
+    "complement_ncsb_early_flush": lambda a: a.complement_ncsb_early_flush(),
+    "complement_ncsb_lazy": lambda a: a.complement_ncsb_lazy(),
+    "complement_ncsb_por": lambda a: a.complement_ncsb_por(),
+    "determinize": lambda a: a.determinize(),
+    "determinize_simulations": lambda a: a.determinize_simulations(),
+    "minimize": lambda a: a.minimize(),
+    "simulations": lambda a: a.simulations_preorder(),
+    "epsilon": lambda a: a.remove_epsilon(),
+    "is_empty": lambda a: a.is_empty(),
+    "structural_hash": lambda a: a.get_structural_hash(),
+    "language_hash": lambda a: a.get_language_hash(),
+}
+
+# operations on two automata
+BINARY = {
+    "union": lambda a, b: a.union(b),
+    "intersection": lambda a, b: a.intersection(b),
+    "intersection_empty": lambda a, b: a.is_intersection_empty(b),
+    "inclusion": lambda a, b: a.is_included(b),
+    "inclusion_simple": lambda a, b: a.is_included_simple(b),
+    "inclusion_antichain": lambda a, b: a.is_included_antichain(b),
+    "inclusion_antichain_pure": lambda a, b: a.is_included_antichain_pure(b),
+    "equality": lambda a, b: a.is_equivalent(b),
+    "runonnfa": lambda a, b: a.run_on_nfa(b),
+    "reachability": lambda a, b: Reachability(a, b, widening=2).run(),
+}
+
+
+# on-disk cache of results of the worker process, set by init_worker
+worker_cache = None
+
+
+class TaskTimeout(Exception):
+    """
+    Raised in a worker process when a task exceeds its time limit
+    """
+    pass
+
+
+def raise_timeout(signum, frame):
+    raise TaskTimeout()
+
+
+def init_worker(memory, cache_directory=None, cache_size=None):
+    """
+    Sets memory limit and result cache of a worker process
+    :param memory: limit of address space in megabytes, None for no limit
+    :param cache_directory: directory of the result cache, None for no cache
+    :param cache_size: size limit of the result cache in megabytes
+    """
+    global worker_cache
+    signal.signal(signal.SIGALRM, raise_timeout)
+    if cache_directory is not None:
+        worker_cache = ResultCache(cache_directory, (cache_size or 1024) * 1024 * 1024)
+    if memory is not None and resource is not None:
+        limit = memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def describe(result):
+    """
+    Converts result of an operation into a JSON serializable summary
+    :param result: result of an operation
+    :return: summary
+    """
+    if result is None or isinstance(result, (bool, int, float, str)):
+        return result
+    if isinstance(result, tuple):
+        return [describe(item) for item in result]
+    if isinstance(result, list):
+        if all(isinstance(item, tuple) and len(item) == 2 for item in result):
+            # simulation relation
+            return {"pairs": len(result)}
+        return [str(item) for item in result]
+    if hasattr(result, "transitions"):
+        if isinstance(result.final, list):
+            final = set().union(*result.final) if result.final else set()
+        else:
+            final = result.final
+        transitions = 0
+        for state in result.transitions:
+            for label in result.transitions[state]:
+                transitions += len(result.transitions[state][label])
+        return {"states": len(result.states), "final": len(final), "transitions": transitions}
+    return str(result)
+
+
+def run_task(task):
+    """
+    Runs one task in a worker process
+    :param task: tuple (operation, list of files, timeout in seconds or None)
+    :return: dictionary with task result
+    """
+    operation, files, timeout = task
+    record = {"operation": operation, "files": files}
+    start = time.time()
+    try:
+        # the timer is disarmed inside the outer try, so that a timeout firing before it is still caught
+        try:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            automata = [parse(filename) for filename in files]
+            if worker_cache is not None and operation in OPERATIONS:
+                result = worker_cache.compute(automata[0], operation)
+            elif operation in UNARY:
+                result = UNARY[operation](automata[0])
+            else:
+                result = BINARY[operation](automata[0], automata[1])
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        record["status"] = "ok"
+        record["result"] = describe(result)
+    except TaskTimeout:
+        record["status"] = "timeout"
+    except MemoryError:
+        record["status"] = "memory"
+    except (Exception, SystemExit) as error:
+        # the parser exits on invalid input, the worker process has to survive it
+        record["status"] = "error"
+        record["error"] = repr(error)
+    record["time"] = round(time.time() - start, 6)
+
+    return record
+
+
+def get_tasks(operation, path, other=None, timeout=None):
+    """
+    Creates tasks from a directory or a manifest
+    :param operation: name of the operation
+    :param path: directory or manifest file
+    :param other: second automaton of binary operations on a directory
+    :param timeout: time limit of every task in seconds
+    :return: list of tasks
+    """
+    tasks = []
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            full_name = os.path.join(path, filename)
+            if os.path.isfile(full_name):
+                files = [full_name] if other is None else [full_name, other]
+                tasks.append((operation, files, timeout))
+    else:
+        directory = os.path.dirname(path)
+        with open(path) as manifest:
+            for line in manifest:
+                files = line.split()
+                if not files or files[0].startswith("#"):
+                    continue
+                files = [os.path.join(directory, filename) for filename in files]
+                if other is not None and len(files) == 1:
+                    files.append(other)
+                tasks.append((operation, files, timeout))
+
+    return tasks
+
+
+def run(operation, path, other=None, jobs=None, timeout=None, memory=None, output=None, cache=None,
+        cache_size=None):
+    """
+    Runs an operation over all automata of a directory or manifest and streams JSON lines
+    :param operation: name of the operation
+    :param path: directory or manifest file
+    :param other: second automaton of binary operations
+    :param jobs: number of worker processes, number of CPUs if not given
+    :param timeout: time limit of every task in seconds
+    :param memory: memory limit of every worker process in megabytes
+    :param output: file to write results into, standard output if not given
+    :param cache: directory of the on-disk result cache, results are not cached if not given
+    :param cache_size: size limit of the result cache in megabytes
+    :return: number of tasks that did not end with status ok
+    """
+    if operation not in UNARY and operation not in BINARY:
+        raise ValueError("Unknown operation " + operation + ".")
+
+    if operation in BINARY and other is None and os.path.isdir(path):
+        raise ValueError("Operation " + operation + " needs a second automaton, use --with.")
+
+    tasks = get_tasks(operation, path, other, timeout)
+    failed = 0
+    stream = open(output, 'w') if output else sys.stdout
+    # workers are recycled after a few tasks, so memory of finished tasks is returned to the system
+    pool = multiprocessing.Pool(jobs or multiprocessing.cpu_count(), init_worker, (memory, cache, cache_size),
+                                maxtasksperchild=50)
+    try:
+        for record in pool.imap_unordered(run_task, tasks):
+            if record["status"] != "ok":
+                failed += 1
+            stream.write(json.dumps(record) + "\n")
+            stream.flush()
+    finally:
+        pool.close()
+        pool.join()
+        if output:
+            stream.close()
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs an operation over a corpus of automata in a pool of processes.")
+    parser.add_argument("operation", choices=sorted(list(UNARY) + list(BINARY)))
+    parser.add_argument("input", help="directory of automata or manifest file with one task per line")
+    parser.add_argument("--with", dest="other", help="second automaton of binary operations")
+    parser.add_argument("--jobs", type=int, help="number of worker processes")
+    parser.add_argument("--timeout", type=float, help="time limit of one task in seconds")
+    parser.add_argument("--memory", type=int, help="memory limit of one worker process in megabytes")
+    parser.add_argument("--output", help="file for JSON lines, standard output by default")
+    parser.add_argument("--cache", help="directory of on-disk cache of results")
+    parser.add_argument("--cache-size", type=int, help="size limit of the cache in megabytes")
+    args = parser.parse_args()
+
+    try:
+        failed = run(args.operation, args.input, args.other, args.jobs, args.timeout, args.memory, args.output,
+                     args.cache, args.cache_size)
+    except ValueError as error:
+        print(error)
+        exit(-1)
+    if failed > 0:
+        # some tasks failed, timed out or ran out of memory
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
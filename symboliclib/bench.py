@@ -0,0 +1,312 @@
+"""
+Benchmarks of operations over the bundled test corpora
+
+every benchmark runs one operation on one automaton (or a pair of automata) in its own process
+and records wall time of the operation, peak memory of the process and size of the result,
+results can be saved as a baseline and later runs are compared with it
+
+usage:
+    python3 bench.py [--save baseline.json] [--baseline baseline.json] [options]
+
+    examples:
+        python3 bench.py --save baseline.json
+        python3 bench.py --baseline baseline.json --buchi 100 --repeat 3
+        python3 bench.py --scaling 10,100,1000,10000,100000 --density 1.0 --timeout 600 --save scaling.json
+"""
+from __future__ import print_function
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from batch import UNARY, BINARY, TaskTimeout, init_worker, describe
+from generator import random_lfa
+from symbolic_parser import parse
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# operations on every finite automaton of the test directory
+FA_OPERATIONS = ["load", "determinize", "minimize", "simulations"]
+# operations on every pair of finite automata of the same kind from the test directory
+FA_PAIR_OPERATIONS = ["intersection", "inclusion", "inclusion_simple", "inclusion_antichain", "inclusion_antichain_pure"]
+# operations on Buchi automata of the test-buchi directory
+BUCHI_OPERATIONS = ["load", "complement_ncsb", "complement_ncsb_early_flush", "complement_ncsb_lazy",
+                    "complement_ncsb_por"]
+
+# operations on random automata of growing size
+SCALING_OPERATIONS = ["determinize", "inclusion_antichain"]
+# operations on every transducer and symbolic automaton of the test directory
+RMC_OPERATIONS = ["reachability"]
+
+# a benchmark is reported only if it is slower than the baseline by both limits
+TIME_RATIO = 1.25
+TIME_DELTA = 0.05
+MEMORY_RATIO = 1.25
+
+
+def get_files(directory, limit=None):
+    """
+    Lists files of a directory, spread evenly over the sorted list if limited
+    :param directory: directory with automata
+    :param limit: maximal number of files, None for all of them
+    :return: list of files
+    """
+    files = []
+    for filename in sorted(os.listdir(directory)):
+        if os.path.isfile(os.path.join(directory, filename)):
+            files.append(os.path.join(directory, filename))
+    if limit is not None and len(files) > limit:
+        step = len(files) / float(limit)
+        files = [files[int(i * step)] for i in range(limit)]
+
+    return files
+
+
+def get_benchmarks(test_directory, buchi_directory, buchi_limit=None):
+    """
+    Creates benchmarks over the test corpora
+    :param test_directory: directory with finite automata and transducers
+    :param buchi_directory: directory with Buchi automata
+    :param buchi_limit: maximal number of Buchi automata
+    :return: list of (operation, list of files)
+    """
+    benchmarks = []
+    kinds = {}
+    transducers = []
+    for filename in get_files(test_directory):
+        automaton = parse(filename)
+        if automaton.automaton_type in ["LFA", "INFA"]:
+            kinds.setdefault(automaton.automaton_type, []).append(filename)
+        elif automaton.automaton_type == "INT":
+            transducers.append(filename)
+        for operation in FA_OPERATIONS if automaton.automaton_type in ["LFA", "INFA"] else ["load"]:
+            benchmarks.append((operation, [filename]))
+
+    for kind in sorted(kinds):
+        for first in kinds[kind]:
+            for second in kinds[kind]:
+                if first != second:
+                    for operation in FA_PAIR_OPERATIONS:
+                        benchmarks.append((operation, [first, second]))
+
+    for transducer in transducers:
+        for filename in kinds.get("INFA", []):
+            for operation in RMC_OPERATIONS:
+                benchmarks.append((operation, [transducer, filename]))
+
+    for filename in get_files(buchi_directory, buchi_limit):
+        for operation in BUCHI_OPERATIONS:
+            benchmarks.append((operation, [filename]))
+
+    return benchmarks
+
+
+def get_scaling_benchmarks(directory, sizes, symbols=2, density=1.25, acceptance=0.5, samples=1):
+    """
+    Creates benchmarks over random automata of the Tabakov-Vardi model of the given sizes,
+    names of the automata contain their parameters, so that results can be plotted against the size
+    :param directory: directory to write the random automata into
+    :param sizes: list of numbers of states
+    :param symbols: size of the alphabet
+    :param density: transition density
+    :param acceptance: acceptance density
+    :param samples: number of random automata of every size
+    :return: list of (operation, list of files)
+    """
+    benchmarks = []
+    for size in sizes:
+        files = []
+        # one more automaton, so that every sample has the second automaton for inclusion
+        for seed in range(samples + 1):
+            filename = os.path.join(directory, "LFA_%d_%d_%s_%s_%d" % (size, symbols, density, acceptance, seed))
+            random_lfa(size, symbols, density, acceptance, seed).print_automaton(filename)
+            files.append(filename)
+        for seed in range(samples):
+            for operation in SCALING_OPERATIONS:
+                if operation in UNARY:
+                    benchmarks.append((operation, [files[seed]]))
+                else:
+                    benchmarks.append((operation, [files[seed], files[seed + 1]]))
+
+    return benchmarks
+
+
+def get_name(operation, files):
+    """
+    Returns name of a benchmark
+    :param operation: name of the operation
+    :param files: list of input files
+    :return: name
+    """
+    return operation + ":" + "|".join(os.path.basename(filename) for filename in files)
+
+
+def run_benchmark(task):
+    """
+    Runs one benchmark in a fresh worker process
+    :param task: tuple (operation, list of files, timeout in seconds or None, number of repetitions)
+    :return: dictionary with name, status, time, memory and result of the benchmark
+    """
+    operation, files, timeout, repeat = task
+    record = {"name": get_name(operation, files)}
+    times = []
+    try:
+        # the timer is disarmed inside the outer try, so that a timeout firing before it is still caught
+        try:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            for _ in range(repeat):
+                # inputs are parsed again every time, operations may store their results in the inputs
+                start = time.time()
+                automata = [parse(filename) for filename in files]
+                if operation != "load":
+                    start = time.time()
+                    if operation in UNARY:
+                        result = UNARY[operation](automata[0])
+                    else:
+                        result = BINARY[operation](automata[0], automata[1])
+                else:
+                    result = automata[0]
+                times.append(time.time() - start)
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        record["status"] = "ok"
+        record["result"] = describe(result)
+    except TaskTimeout:
+        record["status"] = "timeout"
+    except MemoryError:
+        record["status"] = "memory"
+    except (Exception, SystemExit) as error:
+        # the parser exits on invalid input, the worker process has to survive it
+        record["status"] = "error"
+        record["error"] = repr(error)
+    if times:
+        record["time"] = round(min(times), 6)
+    if resource is not None:
+        # kilobytes on linux
+        record["memory"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return record
+
+
+def run(benchmarks, jobs=1, timeout=None, repeat=1, memory=None):
+    """
+    Runs benchmarks, every one in its own process, so that peak memory of one does not affect the others
+    :param benchmarks: list of (operation, list of files)
+    :param jobs: number of benchmarks running at once
+    :param timeout: time limit of one benchmark in seconds
+    :param repeat: number of runs of every benchmark, the fastest one is recorded
+    :param memory: memory limit of one benchmark in megabytes
+    :return: dictionary name -> record
+    """
+    tasks = [(operation, files, timeout, repeat) for operation, files in benchmarks]
+    results = {}
+    pool = multiprocessing.Pool(jobs, init_worker, (memory,), maxtasksperchild=1)
+    try:
+        for record in pool.imap_unordered(run_benchmark, tasks):
+            results[record.pop("name")] = record
+    finally:
+        pool.close()
+        pool.join()
+
+    return results
+
+
+def compare(results, baseline):
+    """
+    Compares results with a baseline
+    :param results: dictionary name -> record of the current run
+    :param baseline: dictionary name -> record of the baseline
+    :return: list of (name, description of the regression)
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        new = results[name]
+        old = baseline[name]
+        if old["status"] == "ok" and new["status"] != "ok":
+            regressions.append((name, "status " + new["status"]))
+            continue
+        if old["status"] != "ok" or new["status"] != "ok":
+            continue
+        if new["result"] != old["result"]:
+            regressions.append((name, "result " + json.dumps(old["result"]) + " -> " + json.dumps(new["result"])))
+        if new["time"] > old["time"] * TIME_RATIO and new["time"] - old["time"] > TIME_DELTA:
+            regressions.append((name, "time %.3fs -> %.3fs" % (old["time"], new["time"])))
+        if "memory" in new and "memory" in old and new["memory"] > old["memory"] * MEMORY_RATIO:
+            regressions.append((name, "memory %dkB -> %dkB" % (old["memory"], new["memory"])))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks operations over the test corpora.")
+    parser.add_argument("--test", default="./test", help="directory with finite automata")
+    parser.add_argument("--buchi-dir", default="./test-buchi", help="directory with Buchi automata")
+    parser.add_argument("--buchi", type=int, default=50, help="number of Buchi automata, 0 for all of them")
+    parser.add_argument("--jobs", type=int, default=1, help="number of benchmarks running at once")
+    parser.add_argument("--timeout", type=float, default=60, help="time limit of one benchmark in seconds")
+    parser.add_argument("--memory", type=int, help="memory limit of one benchmark in megabytes")
+    parser.add_argument("--repeat", type=int, default=1, help="runs of every benchmark, the fastest one counts")
+    parser.add_argument("--scaling", help="comma separated sizes of random automata, the corpora are skipped")
+    parser.add_argument("--symbols", type=int, default=2, help="alphabet size of random automata")
+    parser.add_argument("--density", type=float, default=1.25, help="transition density of random automata")
+    parser.add_argument("--acceptance", type=float, default=0.5, help="acceptance density of random automata")
+    parser.add_argument("--samples", type=int, default=1, help="number of random automata of every size")
+    parser.add_argument("--save", help="file to save results into")
+    parser.add_argument("--baseline", help="file with baseline results to compare with")
+    args = parser.parse_args()
+
+    if os.environ.get("PYTHONHASHSEED") != "0":
+        # results of some operations depend on the iteration order of sets, which depends on the hash seed,
+        # the seed is fixed so that results of different runs can be compared
+        os.environ["PYTHONHASHSEED"] = "0"
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    directory = None
+    if args.scaling:
+        directory = tempfile.mkdtemp(prefix="symboliclib-bench-")
+        sizes = [int(size) for size in args.scaling.split(",")]
+        benchmarks = get_scaling_benchmarks(directory, sizes, args.symbols, args.density, args.acceptance,
+                                            args.samples)
+    else:
+        benchmarks = get_benchmarks(args.test, args.buchi_dir, args.buchi or None)
+    start = time.time()
+    try:
+        results = run(benchmarks, args.jobs, args.timeout, args.repeat, args.memory)
+    finally:
+        if directory:
+            shutil.rmtree(directory)
+
+    statuses = {}
+    for record in results.values():
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+    print("%d benchmarks in %.1fs: %s" % (len(results), time.time() - start,
+                                          ", ".join(status + " " + str(statuses[status]) for status in sorted(statuses))))
+
+    if args.save:
+        with open(args.save, 'w') as the_file:
+            json.dump({"results": results}, the_file, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as the_file:
+            baseline = json.load(the_file)["results"]
+        regressions = compare(results, baseline)
+        for name, description in regressions:
+            print("REGRESSION " + name + ": " + description)
+        if regressions:
+            exit(1)
+        print("No regressions against " + args.baseline)
+
+
+if __name__ == '__main__':
+    main()
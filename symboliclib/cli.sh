@@ -32,6 +32,16 @@ else
         inclusion_antichain_pure - 2
         equality - 2
         runonnfa - 2
+
+    Server mode:
+        ./cli.sh server start
+        - keeps parsed automata and results in memory, following commands are sent to the server
+        ./cli.sh server stop
+
+    Batch mode:
+        ./cli.sh batch [command] [directory or manifest] [options]
+        - runs a command over a corpus in a pool of processes, prints one JSON line per automaton
+        - options: --with file2 --jobs N --timeout seconds --memory megabytes --output file
         "
     elif [ "$1" = "doc" ]; then
         mkdir -p doc
@@ -45,7 +55,23 @@ Copyright (c) 2017  Michaela Bielikova <xbieli06@stud.fit.vutbr.cz>"
     exit 0
 fi
 
+socket=${SYMBOLICLIB_SOCKET:-${TMPDIR:-/tmp}/symboliclib-$(id -u).sock}
+if [ -S "$socket" ] && [ "$command" != "batch" ] && [ "$command" != "server" ]; then
+  python3 server.py client "$@"
+  status=$?
+  # status 3 means that the server is not running any more
+  if [ $status -ne 3 ]; then
+    exit $status
+  fi
+fi
+
 case $command in
+server)
+  python3 server.py "${@:2}"
+  ;;
+batch)
+  python3 batch.py "${@:2}"
+  ;;
 complement)
   python3 -c "import symboliclib; a = symboliclib.parse('$file1');  r = a.complement(); r.print_automaton();"
   ;;
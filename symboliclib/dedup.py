@@ -0,0 +1,91 @@
+"""
+Finds duplicate automata in a corpus
+
+automata are grouped by their structural hash and automata of a group are checked to be isomorphic,
+or grouped by their language hash (language equivalent automata, only finite automata),
+every group with more than one automaton is printed as one JSON line
+
+usage:
+    python3 dedup.py directory [--language]
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import sys
+from symbolic_parser import parse
+
+
+def get_groups(filenames, language=False):
+    """
+    Groups automata by their hash
+    :param filenames: list of files with automata
+    :param language: if True, automata are grouped by language hash instead of structural hash
+    :return: dictionary hash -> list of files, files which can not be hashed are left out
+    """
+    groups = {}
+    for filename in filenames:
+        try:
+            automaton = parse(filename)
+            if language:
+                key = automaton.get_language_hash()
+            else:
+                key = automaton.get_structural_hash()
+        except Exception as error:
+            # transducers have no language hash and some automata can not be determinized
+            print("Skipping " + filename + ": " + repr(error), file=sys.stderr)
+            continue
+        if key is not None:
+            groups.setdefault(key, []).append(filename)
+
+    return groups
+
+
+def split_isomorphic(filenames):
+    """
+    Splits automata with the same structural hash into classes of isomorphic automata
+    :param filenames: list of files with automata
+    :return: list of lists of files
+    """
+    representatives = []
+    classes = []
+    for filename in filenames:
+        automaton = parse(filename)
+        for representative, files in zip(representatives, classes):
+            if representative.is_isomorphic(automaton):
+                files.append(filename)
+                break
+        else:
+            representatives.append(automaton)
+            classes.append([filename])
+
+    return classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finds duplicate automata in a directory.")
+    parser.add_argument("directory", help="directory of automata")
+    parser.add_argument("--language", action="store_true", help="group language equivalent automata")
+    args = parser.parse_args()
+
+    filenames = []
+    for filename in sorted(os.listdir(args.directory)):
+        full_name = os.path.join(args.directory, filename)
+        if os.path.isfile(full_name):
+            filenames.append(full_name)
+
+    groups = get_groups(filenames, args.language)
+    for key in sorted(groups, key=lambda key: groups[key][0]):
+        if len(groups[key]) > 1:
+            if args.language:
+                # minimal automata numbered in breadth first order are canonical, equal hashes mean equal languages
+                duplicates = [groups[key]]
+            else:
+                duplicates = split_isomorphic(groups[key])
+            for files in duplicates:
+                if len(files) > 1:
+                    print(json.dumps({"hash": key, "files": files}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Generator of random automata and transducers in the Tabakov-Vardi model
+
+for every symbol, round(density * states) distinct transitions labeled by the symbol are chosen uniformly
+from all pairs of states, round(acceptance * states) states (at least one) are final and the state q0 is initial,
+the same seed always gives the same automaton
+
+usage:
+    python3 generator.py type [options]
+
+    type is one of LFA, SA, BA, ST
+
+    examples:
+        python3 generator.py LFA --states 1000 --symbols 2 --density 1.25 --acceptance 0.5 --seed 1
+        python3 generator.py BA --states 100 --count 50 --directory ./random-buchi
+"""
+from __future__ import print_function
+import argparse
+import os
+import random
+from ba import BA
+from in_notin import InNotin
+from letter import Letter
+from lfa import LFA
+from sa import SA
+from st import ST
+from transducer_predicate import TransPred
+
+
+def get_random_transitions(rng, states, symbols, density):
+    """
+    Chooses transitions of the Tabakov-Vardi model
+    :param rng: random number generator
+    :param states: number of states
+    :param symbols: list of symbols
+    :param density: number of transitions of every symbol divided by number of states
+    :return: list of (start state number, symbol, end state number)
+    """
+    count = min(states * states, int(round(density * states)))
+    transitions = []
+    for symbol in symbols:
+        # pairs of states are encoded as numbers, so that sampling does not create all of them
+        for pair in rng.sample(range(states * states), count):
+            transitions.append((pair // states, symbol, pair % states))
+
+    return transitions
+
+
+def fill_random(automaton, rng, states, symbols, acceptance):
+    """
+    Sets states, initial and final states of a random automaton
+    :param automaton: automaton to fill
+    :param rng: random number generator
+    :param states: number of states
+    :param symbols: list of symbols
+    :param acceptance: number of final states divided by number of states
+    :return: list of state names
+    """
+    names = ["q" + str(i) for i in range(states)]
+    automaton.alphabet = set(symbols)
+    automaton.states = set(names)
+    automaton.start = {names[0]}
+    automaton.final = set(rng.sample(names, max(1, int(round(acceptance * states)))))
+    automaton.transitions = dict((name, {}) for name in names)
+    automaton.is_epsilon_free = True
+
+    return names
+
+
+def add_transition(automaton, state, label, endstate):
+    """
+    Adds one transition to an automaton
+    :param automaton: automaton
+    :param state: start state
+    :param label: transition label
+    :param endstate: end state
+    """
+    if label in automaton.transitions[state]:
+        if endstate not in automaton.transitions[state][label]:
+            automaton.transitions[state][label].append(endstate)
+    else:
+        automaton.transitions[state][label] = [endstate]
+
+
+def get_symbols(count):
+    """
+    Creates alphabet of the given size
+    :param count: number of symbols
+    :return: list of symbols
+    """
+    return ["a" + str(i) for i in range(count)]
+
+
+def random_lfa(states=100, symbols=2, density=1.25, acceptance=0.5, seed=None):
+    """
+    Creates random classic finite automaton
+    :param states: number of states
+    :param symbols: size of the alphabet
+    :param density: number of transitions of every symbol divided by number of states
+    :param acceptance: number of final states divided by number of states
+    :param seed: seed of the random number generator
+    :return: LFA
+    """
+    rng = random.Random(seed)
+    automaton = LFA()
+    alphabet = get_symbols(symbols)
+    names = fill_random(automaton, rng, states, alphabet, acceptance)
+    labels = {}
+    for symbol in alphabet:
+        labels[symbol] = Letter()
+        labels[symbol].symbol = symbol
+    for start, symbol, end in get_random_transitions(rng, states, alphabet, density):
+        add_transition(automaton, names[start], labels[symbol], names[end])
+    automaton.label = Letter()
+    automaton.is_deterministic()
+
+    return automaton
+
+
+def random_ba(states=100, symbols=2, density=1.25, acceptance=0.5, seed=None):
+    """
+    Creates random Buchi automaton with one set of accepting states
+    :param states: number of states
+    :param symbols: size of the alphabet
+    :param density: number of transitions of every symbol divided by number of states
+    :param acceptance: number of accepting states divided by number of states
+    :param seed: seed of the random number generator
+    :return: BA
+    """
+    lfa = random_lfa(states, symbols, density, acceptance, seed)
+    automaton = BA()
+    automaton.alphabet = lfa.alphabet
+    automaton.states = lfa.states
+    automaton.start = lfa.start
+    automaton.final = [lfa.final]
+    automaton.transitions = lfa.transitions
+    automaton.is_epsilon_free = True
+    automaton.label = Letter()
+
+    return automaton
+
+
+def random_sa(states=100, symbols=2, density=1.25, acceptance=0.5, seed=None, negation=0.5):
+    """
+    Creates random symbolic automaton with in and not_in predicates
+    transitions of the Tabakov-Vardi model between the same pair of states are merged into one predicate
+    :param states: number of states
+    :param symbols: size of the alphabet
+    :param density: number of transitions of every symbol divided by number of states
+    :param acceptance: number of final states divided by number of states
+    :param seed: seed of the random number generator
+    :param negation: probability that a predicate is written as not_in of the remaining symbols
+    :return: SA
+    """
+    rng = random.Random(seed)
+    automaton = SA()
+    alphabet = get_symbols(symbols)
+    names = fill_random(automaton, rng, states, alphabet, acceptance)
+    pairs = {}
+    for start, symbol, end in get_random_transitions(rng, states, alphabet, density):
+        pairs.setdefault((start, end), set()).add(symbol)
+    for start, end in sorted(pairs):
+        label = InNotin()
+        rest = automaton.alphabet - pairs[(start, end)]
+        if len(rest) and rng.random() < negation:
+            label.type = "not_in"
+            label.symbols = rest
+        else:
+            label.type = "in"
+            label.symbols = pairs[(start, end)]
+        add_transition(automaton, names[start], label, names[end])
+    automaton.label = InNotin()
+    automaton.is_deterministic()
+
+    return automaton
+
+
+def random_st(states=100, symbols=2, density=1.25, acceptance=0.5, seed=None, identity=0.2):
+    """
+    Creates random symbolic transducer with in predicates
+    every transition of the Tabakov-Vardi model reads its symbol and writes a random symbol
+    :param states: number of states
+    :param symbols: size of the alphabet
+    :param density: number of transitions of every symbol divided by number of states
+    :param acceptance: number of final states divided by number of states
+    :param seed: seed of the random number generator
+    :param identity: probability that a transition is an identity
+    :return: ST
+    """
+    rng = random.Random(seed)
+    automaton = ST()
+    alphabet = get_symbols(symbols)
+    names = fill_random(automaton, rng, states, alphabet, acceptance)
+    for start, symbol, end in get_random_transitions(rng, states, alphabet, density):
+        guard = InNotin()
+        guard.type = "in"
+        guard.symbols = {symbol}
+        if rng.random() < identity:
+            # identity labels share one guard, as in the parser
+            label = TransPred(guard, guard, True)
+        else:
+            output = InNotin()
+            output.type = "in"
+            output.symbols = {rng.choice(alphabet)}
+            label = TransPred(guard, output)
+        add_transition(automaton, names[start], label, names[end])
+    automaton.label = TransPred()
+    automaton.is_deterministic()
+
+    return automaton
+
+
+# generators by type names
+GENERATORS = {
+    "LFA": random_lfa,
+    "SA": random_sa,
+    "BA": random_ba,
+    "ST": random_st,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates random automata in the Tabakov-Vardi model.")
+    parser.add_argument("type", choices=sorted(GENERATORS))
+    parser.add_argument("--states", type=int, default=100, help="number of states")
+    parser.add_argument("--symbols", type=int, default=2, help="size of the alphabet")
+    parser.add_argument("--density", type=float, default=1.25, help="transitions of one symbol per state")
+    parser.add_argument("--acceptance", type=float, default=0.5, help="ratio of final states")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first automaton")
+    parser.add_argument("--count", type=int, default=1, help="number of automata, seeds follow the first one")
+    parser.add_argument("--directory", help="directory to write automata into, standard output by default")
+    args = parser.parse_args()
+
+    if args.directory:
+        os.makedirs(args.directory, exist_ok=True)
+    for seed in range(args.seed, args.seed + args.count):
+        automaton = GENERATORS[args.type](args.states, args.symbols, args.density, args.acceptance, seed)
+        if args.directory:
+            filename = "%s_%d_%d_%s_%s_%d" % (args.type, args.states, args.symbols, args.density, args.acceptance,
+                                              seed)
+            automaton.print_automaton(os.path.join(args.directory, filename))
+        else:
+            automaton.print_automaton()
+
+
+if __name__ == '__main__':
+    main()
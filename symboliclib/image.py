@@ -0,0 +1,281 @@
+"""
+Images of languages of finite automata under symbolic transducers
+
+the product of a transducer and an automaton is explored lazily, only pairs of states needed by a query are expanded,
+so an emptiness check stops at the first accepting pair and a membership check expands only pairs reached by the word
+
+a transition of the transducer reading epsilon is made alone while the automaton waits,
+a transition writing epsilon becomes an epsilon transition of the image
+
+usage:
+    image = transducer.image(automaton)
+    image.is_empty()
+    image.accepts("abba")
+    result = image.get_automaton()
+
+pre-image is the image under the inverse transducer:
+    transducer.pre_image(automaton).is_empty()
+"""
+from __future__ import print_function
+import itertools
+import stats
+
+
+class LazyImage(object):
+    """
+    Image of the language of a finite automaton under a transducer
+    a pair of states is encoded as one integer, the name of a product state is created only when it is needed
+
+    Attributes:
+        transducer      the transducer
+        automaton       the epsilon free automaton
+        numbers1        dictionary state of the transducer -> number
+        names1          list of states of the transducer indexed by numbers
+        numbers2        dictionary state of the automaton -> number
+        names2          list of states of the automaton indexed by numbers
+        width           number of states of the automaton
+        useful1         states of the transducer leading to its final state
+        useful2         states of the automaton leading to its final state
+        start           list of encoded initial pairs
+        successors      dictionary encoded pair -> list of (output label, list of encoded pairs), expanded pairs
+        covered         dictionary guard -> indices of minterms covered by it, None without minterms
+        index           dictionary state of the automaton -> dictionary minterm index -> labels
+    """
+    def __init__(self, transducer, automaton):
+        if not automaton.is_epsilon_free:
+            automaton = automaton.remove_epsilon()
+        self.transducer = transducer
+        self.automaton = automaton
+        self.numbers1, self.names1 = transducer.number_states()
+        self.numbers2, self.names2 = automaton.number_states()
+        self.width = len(self.names2)
+        self.useful1 = transducer.get_useful_states()
+        self.useful2 = automaton.get_useful_states()
+        self.successors = {}
+
+        self.start = []
+        for state1, state2 in itertools.product(transducer.start, automaton.start):
+            pair = self.get_pair(state1, state2)
+            if pair is not None and pair not in self.start:
+                self.start.append(pair)
+
+        guards = set()
+        for state in transducer.transitions:
+            for label in transducer.transitions[state]:
+                guards.add(label.input)
+        for state in automaton.transitions:
+            guards.update(automaton.transitions[state].keys())
+        minterms = automaton.get_minterms(guards)
+
+        self.covered = None
+        self.index = None
+        if minterms is not None:
+            self.covered = {}
+            for guard in guards:
+                if not guard.is_epsilon:
+                    self.covered[guard] = [i for i, minterm in enumerate(minterms)
+                                           if minterm.conjunction(guard).is_satisfiable()]
+            self.index = {}
+            for state in automaton.transitions:
+                self.index[state] = {}
+                for label in automaton.transitions[state]:
+                    for i in self.covered.get(label, []):
+                        if i in self.index[state]:
+                            self.index[state][i].append(label)
+                        else:
+                            self.index[state][i] = [label]
+
+    def get_pair(self, state1, state2):
+        """
+        Encodes a pair of states
+        :param state1: state of the transducer
+        :param state2: state of the automaton
+        :return: encoded pair, None if one of the states does not lead to a final state
+        """
+        if state1 not in self.useful1 or state2 not in self.useful2:
+            return None
+        return self.numbers1[state1] * self.width + self.numbers2[state2]
+
+    def get_name(self, pair):
+        """
+        Creates name of a product state
+        :param pair: encoded pair
+        :return: name of the product state
+        """
+        return "[" + self.names1[pair // self.width] + "_1|" + self.names2[pair % self.width] + "_2]"
+
+    def is_final(self, pair):
+        """
+        Checks whether both states of a pair are final
+        :param pair: encoded pair
+        :return: bool
+        """
+        return self.names1[pair // self.width] in self.transducer.final and \
+            self.names2[pair % self.width] in self.automaton.final
+
+    def get_label_pairs(self, state1, state2):
+        """
+        Pairs labels of a state of the transducer with labels of a state of the automaton
+        :param state1: state of the transducer
+        :param state2: state of the automaton
+        :return: list of (label of the transducer, label of the automaton), labels reading epsilon are skipped
+        """
+        transitions1 = [label for label in self.transducer.transitions.get(state1, {}) if not label.input.is_epsilon]
+        transitions2 = self.automaton.transitions.get(state2, {})
+        result = []
+        if self.index is None:
+            for label in transitions1:
+                for label2 in transitions2:
+                    common = label.input.conjunction(label2)
+                    if common and common.is_satisfiable():
+                        result.append((label, label2))
+            return result
+
+        by_minterm = self.index.get(state2, {})
+        for label in transitions1:
+            paired = set()
+            for i in self.covered.get(label.input, []):
+                for label2 in by_minterm.get(i, []):
+                    if label2 not in paired:
+                        paired.add(label2)
+                        result.append((label, label2))
+        return result
+
+    def get_successors(self, pair):
+        """
+        Expands a pair of states, the result is cached
+        :param pair: encoded pair
+        :return: list of (output label, list of encoded pairs)
+        """
+        successors = self.successors.get(pair)
+        if successors is not None:
+            return successors
+
+        statistics = stats.get_active()
+        if statistics is not None:
+            statistics.count("states_explored")
+
+        state1 = self.names1[pair // self.width]
+        state2 = self.names2[pair % self.width]
+        by_label = {}
+        moves = []
+        for label, label2 in self.get_label_pairs(state1, state2):
+            new_label = label.output
+            if label.identity:
+                new_label = label.output.conjunction(label2)
+            if not new_label or not (new_label.is_epsilon or new_label.is_satisfiable()):
+                continue
+            for end1 in self.transducer.transitions[state1][label]:
+                moves.extend((new_label, end1, end2) for end2 in self.automaton.transitions[state2][label2])
+        for label in self.transducer.transitions.get(state1, {}):
+            if label.input.is_epsilon:
+                # the transducer writes without reading, the automaton waits
+                moves.extend((label.output, end1, state2) for end1 in self.transducer.transitions[state1][label])
+
+        for new_label, end1, end2 in moves:
+            endpair = self.get_pair(end1, end2)
+            if endpair is None:
+                continue
+            if new_label in by_label:
+                if endpair not in by_label[new_label]:
+                    by_label[new_label].append(endpair)
+            else:
+                by_label[new_label] = [endpair]
+
+        successors = list(by_label.items())
+        self.successors[pair] = successors
+        if statistics is not None:
+            statistics.count("transitions_generated", sum(len(ends) for _, ends in successors))
+        return successors
+
+    def is_empty(self):
+        """
+        Checks whether the image is empty, stops at the first reached final pair
+        :return: bool
+        """
+        visited = set(self.start)
+        queue = list(self.start)
+        while len(queue) > 0:
+            pair = queue.pop()
+            if self.is_final(pair):
+                return False
+            for _, endpairs in self.get_successors(pair):
+                for endpair in endpairs:
+                    if endpair not in visited:
+                        visited.add(endpair)
+                        queue.append(endpair)
+
+        return True
+
+    def get_closure(self, pairs):
+        """
+        Adds pairs reachable by epsilon transitions of the image
+        :param pairs: set of encoded pairs, extended in place
+        :return: the extended set
+        """
+        queue = list(pairs)
+        while len(queue) > 0:
+            pair = queue.pop()
+            for label, endpairs in self.get_successors(pair):
+                if label.is_epsilon:
+                    for endpair in endpairs:
+                        if endpair not in pairs:
+                            pairs.add(endpair)
+                            queue.append(endpair)
+        return pairs
+
+    def accepts(self, word):
+        """
+        Checks whether a word belongs to the image, expands only pairs reached while reading the word
+        :param word: iterable of symbols
+        :return: bool
+        """
+        epsilon_free = self.transducer.check_epsilon_free()
+        current = set(self.start)
+        if not epsilon_free:
+            self.get_closure(current)
+        for symbol in word:
+            following = set()
+            for pair in current:
+                for label, endpairs in self.get_successors(pair):
+                    if not label.is_epsilon and label.has_letter(symbol):
+                        following.update(endpairs)
+            if not following:
+                return False
+            if not epsilon_free:
+                self.get_closure(following)
+            current = following
+
+        return any(self.is_final(pair) for pair in current)
+
+    def get_automaton(self):
+        """
+        Explores the whole image and creates the automaton accepting it
+        pairs are trimmed during exploration, so the result contains only useful reachable states
+        :return: finite automaton of the same class as the input automaton,
+                 with epsilon transitions if the transducer writes epsilon
+        """
+        result = self.automaton.get_new()
+        result.alphabet = self.transducer.alphabet.copy()
+        result.is_epsilon_free = self.transducer.check_epsilon_free()
+        result.reversed = None
+        result.label = getattr(self.automaton, "label", None)
+        result.start = set(self.get_name(pair) for pair in self.start)
+
+        visited = set(self.start)
+        queue = list(self.start)
+        while len(queue) > 0:
+            pair = queue.pop()
+            name = self.get_name(pair)
+            result.states.add(name)
+            if self.is_final(pair):
+                result.final.add(name)
+            result.transitions[name] = {}
+            for label, endpairs in self.get_successors(pair):
+                result.transitions[name][label] = [self.get_name(endpair) for endpair in endpairs]
+                for endpair in endpairs:
+                    if endpair not in visited:
+                        visited.add(endpair)
+                        queue.append(endpair)
+
+        return result.trim()
@@ -16,12 +16,24 @@ class InNotin(PredicateInterface):
         symbols     set of symbols
         type        type of predicate - in or not_in
         is_epsilon  flag whether the predicate represents epsilon
+        _hash       cached hash, computed on first use, predicates are not changed once they are labels
     """
 
     def __init__(self):
         self.symbols = set()
         self.type = ""
         self.is_epsilon = False
+        self._hash = None
+
+    def __getstate__(self):
+        # hashes of strings are salted per process, never ship the cached one
+        state = self.__dict__.copy()
+        state["_hash"] = None
+        return state
+
+    def __setstate__(self, state):
+        self._hash = None
+        self.__dict__.update(state)
 
     def __str__(self):
         return self.type + "{" + ",".join(sorted(self.symbols)) + "}"
@@ -30,10 +42,13 @@ class InNotin(PredicateInterface):
         return self.type + "{" + ",".join(sorted(self.symbols)) + "}"
 
     def __eq__(self, other):
-        return (self.type, set(sorted(self.symbols))) == (other.type, set(sorted(other.symbols)))
+        return self.type == other.type and self.symbols == other.symbols
 
     def __hash__(self):
-        return hash((self.type, str(sorted(self.symbols))))
+        if self._hash is None:
+            # frozenset hashing is order independent, no need to sort and join the symbols
+            self._hash = hash((self.type, frozenset(self.symbols)))
+        return self._hash
 
     def __lt__(self, other):
         return str(self) < str(other)
@@ -45,7 +60,7 @@ class InNotin(PredicateInterface):
         :return: negation of given predicate
         """
         result = InNotin()
-        result.symbols = set(sorted(self.symbols.copy()))
+        result.symbols = self.symbols.copy()
         if self.type == "not_in":
             result.type = "in"
         else:
@@ -76,7 +91,6 @@ class InNotin(PredicateInterface):
                 result.type = "in"
                 result.symbols = self.symbols.intersection(predicate.symbols)
 
-        result.symbols = set(sorted(result.symbols))
         return result
 
     @abc.abstractmethod
@@ -103,7 +117,6 @@ class InNotin(PredicateInterface):
                 result.type = "in"
                 result.symbols = self.symbols.union(predicate.symbols)
 
-        result.symbols = set(sorted(result.symbols))
         return result
 
     @abc.abstractmethod
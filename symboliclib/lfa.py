@@ -9,6 +9,7 @@ from __future__ import print_function
 from sa import SA
 from copy import deepcopy
 import itertools
+import stats
 
 
 class LFA(SA):
@@ -48,6 +49,8 @@ class LFA(SA):
         self.label = None
         self.is_epsilon_free = None
         self.epsilon_free = None
+        self.language_hash = None
+        self.matcher = None
 
     @staticmethod
     def get_new():
@@ -86,46 +89,65 @@ class LFA(SA):
         :param a2: the second automaton
         :return: automaton created by intersection
         """
-        #self.print_automaton()
-        #a2.print_automaton()
-        intersect = self.get_new()
-        intersect.alphabet = self.alphabet.intersection(a2.alphabet)
-        intersect.reversed = None
-
-        queue = list(itertools.product(self.start, a2.start))
-        intersect.start = set()
-        for q in queue:
-            intersect.start.add("[" + q[0] + "_1|" + q[1] + "_2]")
-
-        while len(queue) > 0:
-            combined = queue.pop()
-            state1 = combined[0]
-            state2 = combined[1]
-            combined_str = "[" + state1 + "_1|" + state2 + "_2]"
-            intersect.states.add(combined_str)
-            if combined_str not in intersect.transitions:
-                intersect.transitions[combined_str] = {}
+        if not self.is_epsilon_free or not a2.is_epsilon_free:
+            # epsilon transitions are not paired with letters of the other automaton, closures are folded in first
+            return self.remove_epsilon().intersection(a2.remove_epsilon())
 
-            if state1 in self.final and state2 in a2.final:
-                intersect.final.add(combined_str)
-
-            if state1 in self.transitions and state2 in a2.transitions:
-                for label in self.transitions[state1]:
-                    if label in a2.transitions[state2]:
-                        endstates = itertools.product(self.transitions[state1][label], a2.transitions[state2][label])
-                        for endstate in endstates:
-                            endstate_str = "[" + endstate[0] + "_1|" + endstate[1] + "_2]"
+        intersect = self.get_product(a2, self.get_label_pairing(a2))
+        intersect.alphabet = self.alphabet.intersection(a2.alphabet)
 
-                            if label not in intersect.transitions[combined_str]:
-                                intersect.transitions[combined_str][label] = [endstate_str]
-                            else:
-                                intersect.transitions[combined_str][label].append(endstate_str)
+        return intersect
 
-                            if endstate not in queue and endstate_str not in intersect.states:
-                                queue.append(endstate)
+    def get_label_pairing(self, other):
+        """
+        Creates function pairing labels of a state of self with labels of a state of other automaton
+        letters are paired by a dictionary lookup of the same symbol
+        epsilon labels are not paired, both automata have to be epsilon free, see remove_epsilon
+        :param other: the second automaton
+        :return: function (state1, state2) -> list of (common label, endstates1, endstates2)
+        """
+        def pair_labels(state1, state2):
+            result = []
+            transitions2 = other.transitions[state2]
+            for label, endstates in self.transitions[state1].items():
+                if label in transitions2:
+                    result.append((label, endstates, transitions2[label]))
+            return result
+
+        return pair_labels
+
+    def intersection_many(self, others, order_by_size=True, trim=True):
+        """
+        Performs intersection of more automata at once, the product is not reduced as in intersection
+        :param others: list of other automata
+        :param order_by_size: order automata by number of states, the smallest one drives label pairing
+        :param trim: skip tuples containing a state that does not lead to a final state of its automaton
+                     and stop immediately if language of some automaton is empty
+        :return: automaton created by intersection, state names list components in the used order
+        """
+        return super(LFA, self).intersection_many(others, order_by_size, trim, simple_reduce=False)
+
+    def get_label_combination(self, automata):
+        """
+        Creates function combining labels of states of more automata
+        letters are combined by a dictionary lookup of the same symbol in every automaton
+        :param automata: list of automata
+        :return: function (tuple of states) -> list of (label, list of endstates for every automaton)
+        """
+        def combine_labels(states):
+            result = []
+            transitions = [automaton.transitions[state] for automaton, state in zip(automata, states)]
+            for label, endstates in transitions[0].items():
+                all_endstates = [endstates]
+                for state_transitions in transitions[1:]:
+                    if label not in state_transitions:
+                        break
+                    all_endstates.append(state_transitions[label])
+                else:
+                    result.append((label, all_endstates))
+            return result
 
-        #intersect = intersect.simple_reduce()
-        return intersect
+        return combine_labels
 
     def simple_reduce(self):
         """
@@ -140,6 +162,7 @@ class LFA(SA):
 
         return result
 
+    @stats.timed("simulations_preorder")
     def simulations_preorder(self):
         """
         Computes simulation_preorder relation
@@ -169,7 +192,10 @@ class LFA(SA):
 
         N = {}
 
+        statistics = stats.get_active()
         while len(c):
+            if statistics is not None:
+                statistics.count("simulation_pairs")
             item = c.pop()
             i = item[0]
             j = item[1]
@@ -207,6 +233,7 @@ class LFA(SA):
 
         return simulations
 
+    @stats.timed("is_included")
     def is_included(self, other):
         """
         Checks whether automaton is included in the other one:
@@ -222,7 +249,11 @@ class LFA(SA):
         queue = list(itertools.product(self.determinized.start, other.determinized.start))
         checked = []
 
+        statistics = stats.get_active()
         while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             pair = queue.pop()
             q1 = pair[0]
             q2 = pair[1]
@@ -298,12 +329,32 @@ class LFA(SA):
 
         return new_transitions
 
-    def determinize_simulations(self):
+    def get_symbol_transitions(self, symbols):
+        """
+        Lists transitions of a deterministic automaton by symbols
+        :param symbols: sorted list of symbols
+        :return: dictionary state -> list of (symbol, endstate) in the order of symbols
+        """
+        successors = {}
+        for state in self.states:
+            transitions = self.transitions.get(state, {})
+            successors[state] = [(symbol, transitions[symbol][0]) for symbol in symbols if symbol in transitions]
+
+        return successors
+
+    @stats.timed("determinize_simulations")
+    def determinize_simulations(self, processes=None, budget=None):
         """
         Converts automaton into a deterministic one
         uses simulations optimisation
+        :param processes: if greater than 1, macrostates are expanded by a pool of this many processes
+        :param budget: stats.Budget limiting explored states, generated transitions and time
         :return: determinised automaton
         """
+        if budget is not None:
+            with stats.use(budget):
+                return self.determinize_simulations(processes)
+
         # automaton is already deterministic
         if self.deterministic:
             self.determinized = deepcopy(self)
@@ -312,6 +363,14 @@ class LFA(SA):
         if self.determinized is not None and self.determinized.is_deterministic():
             return deepcopy(self.determinized)
 
+        if processes is not None and processes > 1:
+            from parallel import determinize_parallel
+            det = determinize_parallel(self, processes, self.simulations_preorder())
+            det = det.simple_reduce()
+            det.is_deterministic()
+            self.determinized = det
+            return det
+
         det = self.get_new()
         det.start = set()
         det.label = self.label
@@ -324,7 +383,11 @@ class LFA(SA):
         simulations = self.simulations_preorder()
 
         checked = []
+        statistics = stats.get_active()
         while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             state = queue.pop()
             checked.append(state)
             det.states.add(state)
@@ -335,6 +398,8 @@ class LFA(SA):
 
             new_trans = self.get_deterministic_transitions_optim(state, simulations)
             det.transitions[state] = new_trans
+            if statistics is not None:
+                statistics.count("transitions_generated", len(new_trans))
             for label in new_trans:
                 for endstate in new_trans[label]:
                     if endstate not in queue and endstate not in checked:
@@ -372,26 +437,34 @@ class LFA(SA):
 
         return new_transitions
 
-    def post_antichain(self, other, pair):
+    def get_minterm_table(self, other):
+        """
+        Letters of classic automata are minterms already, no table is needed
+        :param other: other automaton
+        :return: False
+        """
+        return False
+
+    def post_antichain_witness(self, other, pair, table=None):
         """
-        Computes post relation for antichain algorithm
+        Computes post relation for antichain algorithm together with the symbol of every successor
         :param other: other automaton
         :param pair: pair of states (p,Q), p is a state from self, Q is a superstate from other
-        :return: post relation
+        :param table: unused, letters are minterms already
+        :return: list of triples (symbol, q, superstate)
         """
         result = []
 
         if pair[0] in self.transitions:
             for a in self.transitions[pair[0]]:
-                new_qs = set()
+                new_qs = self.transitions[pair[0]][a]
                 new_superstates = set()
-                new_qs = new_qs.union(self.transitions[pair[0]][a])
                 for superset_state in pair[1]:
                     if superset_state in other.transitions and a in other.transitions[superset_state]:
-                        new_superstates = new_superstates.union(other.transitions[superset_state][a])
+                        new_superstates.update(other.transitions[superset_state][a])
                 if new_qs and new_superstates:
                     for q in new_qs:
-                        result.append((q, new_superstates))
+                        result.append((a, q, new_superstates))
 
         return result
 
@@ -520,6 +593,7 @@ class LFA(SA):
                     if endstate not in queue and endstate not in checked:
                         queue.add(endstate)
 
+    @stats.timed("product")
     def intersection_count(self, a2, break_when_final):
         """
         Performs intersection of two automata
@@ -530,8 +604,7 @@ class LFA(SA):
         intersect.alphabet = self.alphabet.intersection(a2.alphabet)
         intersect.reversed = None
 
-        cnt_operations = 0
-
+        statistics = stats.get_active()
         queue = list(itertools.product(self.start, a2.start))
         intersect.start = set()
         for q in queue:
@@ -543,7 +616,8 @@ class LFA(SA):
             state2 = combined[1]
             combined_str = "[" + state1 + "_1|" + state2 + "_2]"
             intersect.states.add(combined_str)
-            cnt_operations += 1
+            if statistics is not None:
+                statistics.count("states_explored")
             if combined_str not in intersect.transitions:
                 intersect.transitions[combined_str] = {}
 
@@ -559,6 +633,8 @@ class LFA(SA):
                         for endstate in endstates:
                             endstate_str = "[" + endstate[0] + "_1|" + endstate[1] + "_2]"
 
+                            if statistics is not None:
+                                statistics.count("transitions_generated")
                             if label not in intersect.transitions[combined_str]:
                                 intersect.transitions[combined_str][label] = [endstate_str]
                             else:
@@ -574,6 +650,7 @@ class LFA(SA):
 
         return intersect
 
+    @stats.timed("product")
     def make_pairs(self, a2, intersect):
         """
         Performs intersection of two automata
@@ -583,13 +660,15 @@ class LFA(SA):
 
         queue = list(itertools.product(self.start, a2.start))
 
+        statistics = stats.get_active()
         while len(queue) > 0:
             combined = queue.pop()
             state1 = combined[0]
             state2 = combined[1]
             combined_str = "[" + state1 + "_1|" + state2 + "_2]"
             intersect.states.add(combined_str)
-            cnt_operations += 1
+            if statistics is not None:
+                statistics.count("states_explored")
             if combined_str not in intersect.transitions:
                 intersect.transitions[combined_str] = {}
 
@@ -604,6 +683,8 @@ class LFA(SA):
                         for endstate in endstates:
                             endstate_str = "[" + endstate[0] + "_1|" + endstate[1] + "_2]"
 
+                            if statistics is not None:
+                                statistics.count("transitions_generated")
                             if label not in intersect.transitions[combined_str]:
                                 intersect.transitions[combined_str][label] = [endstate_str]
                             else:
@@ -617,10 +698,9 @@ class LFA(SA):
         #a2.print_automaton()
         #intersect.print_automaton()
 
-        print('')
-        print('N', end=' ')
-        print(len(intersect.states), end=' ')
-        print(len(intersect.final), end=' ')
+        if statistics is not None:
+            statistics.peak("product_states", len(intersect.states))
+            statistics.peak("product_final_states", len(intersect.final))
         #intersect = intersect.simple_reduce()
         #print(f"Naive intersect simple_reduce: {len(intersect.states)}")
         #print(f"Naive intersect simple_reduce final: {len(intersect.final)}")
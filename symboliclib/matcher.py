@@ -0,0 +1,485 @@
+"""
+Matchers of words compiled from finite automata
+
+the automaton is determinized once over its alphabet and its transitions are stored in a dense table of integers,
+then every symbol of a word costs one dictionary lookup and one list lookup
+
+a word is any iterable of symbols, e.g. a list of symbols or a string of one character symbols,
+symbols outside the alphabet of the automaton are rejected
+
+usage:
+    from matcher import DFAMatcher
+    matcher = DFAMatcher(automaton)
+    matcher.accepts("abba")
+    matcher.accepts_many(words)
+    matcher.match_prefix("abbaxyz")
+    matcher.accepts_batch(words)
+
+accepts_batch advances all words of a batch at once by indexing the transition matrix with NumPy,
+if module numpy is not installed, it checks words one by one
+
+NFARunner reads one long input without determinizing the automaton:
+    from matcher import NFARunner
+    runner = NFARunner(automaton)
+    with open("trace.txt") as stream:
+        for position in runner.feed_stream(stream):
+            print("accepted after", position, "symbols")
+"""
+from __future__ import print_function
+from collections import deque
+import stats
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def get_mask(states, numbers):
+    """
+    Encodes a set of states as a bitset
+    :param states: iterable of states
+    :param numbers: dictionary state -> number
+    :return: int with bits of numbers of the states set
+    """
+    mask = 0
+    for state in states:
+        mask |= 1 << numbers[state]
+    return mask
+
+
+def get_members(mask):
+    """
+    Decodes a bitset
+    :param mask: int
+    :return: list of numbers of set bits
+    """
+    members = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        members.append(bit.bit_length() - 1)
+    return members
+
+
+def get_successor_masks(automaton, symbols):
+    """
+    Computes successors of every state for every symbol as bitsets of state numbers,
+    labels are expanded into symbols, so predicates are evaluated only here
+    :param automaton: epsilon free automaton
+    :param symbols: list of symbols
+    :return: tuple (list indexed by symbol indexes of lists of successor bitsets indexed by state numbers,
+             dictionary state -> number, list of states indexed by numbers)
+    """
+    numbers, names = automaton.number_states()
+    masks = [[0] * len(names) for _ in symbols]
+    for state in automaton.transitions:
+        number = numbers[state]
+        for label, endstates in automaton.transitions[state].items():
+            if label.is_epsilon:
+                continue
+            end_mask = get_mask(endstates, numbers)
+            for column, symbol in enumerate(symbols):
+                if label.has_letter(symbol):
+                    masks[column][number] |= end_mask
+
+    return masks, numbers, names
+
+
+class DFAMatcher(object):
+    """
+    Matcher of words compiled from a finite automaton
+    the automaton is determinized over symbols of its alphabet by subset construction with bitsets of states,
+    a state has one row in the table with one column for every symbol and one more column for unknown symbols,
+    states are represented by offsets of their rows, so one step is table[state + column],
+    states from which no final state is reachable are merged into one dead state, where matching stops
+
+    Attributes:
+        symbols     list of symbols of the alphabet, index of a symbol is its column
+        columns     dictionary symbol -> column
+        width       number of columns, the last one is for unknown symbols
+        table       list of row offsets of successors indexed by row offset + column
+        start       row offset of the initial state
+        dead        row offset of the dead state
+        final       set of row offsets of final states
+        states      number of states including the dead state
+        matrix      NumPy transition matrix state number x column used by accepts_batch, created on first use
+    """
+    def __init__(self, automaton):
+        if not automaton.is_epsilon_free:
+            automaton = automaton.remove_epsilon()
+
+        self.symbols = sorted(automaton.alphabet)
+        self.columns = dict((symbol, column) for column, symbol in enumerate(self.symbols))
+        self.width = len(self.symbols) + 1
+
+        masks, numbers, names = get_successor_masks(automaton, self.symbols)
+        final_mask = get_mask(automaton.final, numbers)
+
+        # macrostates in breadth first order and their successors for every symbol
+        start = get_mask(automaton.start, numbers)
+        macrostates = [start]
+        indexes = {start: 0}
+        successors = []
+        statistics = stats.get_active()
+        for macrostate in macrostates:
+            if statistics is not None:
+                statistics.count("states_explored")
+            members = get_members(macrostate)
+            row = []
+            for column in range(len(self.symbols)):
+                successor = 0
+                for member in members:
+                    successor |= masks[column][member]
+                if successor not in indexes:
+                    indexes[successor] = len(macrostates)
+                    macrostates.append(successor)
+                row.append(indexes[successor])
+            successors.append(row)
+
+        # macrostates from which a final macrostate is reachable
+        predecessors = [[] for _ in macrostates]
+        for index, row in enumerate(successors):
+            for successor in row:
+                predecessors[successor].append(index)
+        live = set(index for index, macrostate in enumerate(macrostates) if macrostate & final_mask)
+        queue = deque(live)
+        while len(queue) > 0:
+            for predecessor in predecessors[queue.popleft()]:
+                if predecessor not in live:
+                    live.add(predecessor)
+                    queue.append(predecessor)
+
+        # live macrostates keep the breadth first order, the dead state is 0
+        rows = {}
+        for index in range(len(macrostates)):
+            if index in live:
+                rows[index] = len(rows) + 1
+        self.states = len(rows) + 1
+        self.dead = 0
+        self.table = [self.dead] * (self.states * self.width)
+        for index in rows:
+            offset = rows[index] * self.width
+            for column, successor in enumerate(successors[index]):
+                if successor in rows:
+                    self.table[offset + column] = rows[successor] * self.width
+        self.start = rows[0] * self.width if 0 in rows else self.dead
+        self.final = set(rows[index] * self.width for index in rows if macrostates[index] & final_mask)
+        self.matrix = None
+
+    def encode(self, word):
+        """
+        Converts word into columns of the table
+        :param word: iterable of symbols
+        :return: list of columns, unknown symbols have the last column
+        """
+        columns = self.columns
+        unknown = self.width - 1
+        return [columns.get(symbol, unknown) for symbol in word]
+
+    def run(self, word):
+        """
+        Reads word from the initial state
+        :param word: iterable of symbols
+        :return: row offset of the reached state, the dead state if the word cannot be extended to accepted one
+        """
+        table = self.table
+        columns = self.columns
+        unknown = self.width - 1
+        dead = self.dead
+        state = self.start
+        for symbol in word:
+            state = table[state + columns.get(symbol, unknown)]
+            if state == dead:
+                break
+        return state
+
+    def accepts(self, word):
+        """
+        Checks whether the automaton accepts word
+        :param word: iterable of symbols
+        :return: bool
+        """
+        return self.run(word) in self.final
+
+    def accepts_many(self, words):
+        """
+        Checks more words, the loop of accepts is repeated here to save a call for every word
+        :param words: iterable of words
+        :return: list of bools
+        """
+        table = self.table
+        columns = self.columns
+        unknown = self.width - 1
+        dead = self.dead
+        final = self.final
+        start = self.start
+        result = []
+        for word in words:
+            state = start
+            for symbol in word:
+                state = table[state + columns.get(symbol, unknown)]
+                if state == dead:
+                    break
+            result.append(state in final)
+
+        return result
+
+    def is_viable_prefix(self, word):
+        """
+        Checks whether word can be extended to an accepted word
+        :param word: iterable of symbols
+        :return: bool
+        """
+        return self.run(word) != self.dead
+
+    def match_prefix(self, word):
+        """
+        Finds the longest prefix of word accepted by the automaton, reading stops when no longer prefix can be accepted
+        :param word: iterable of symbols
+        :return: length of the longest accepted prefix, None if no prefix is accepted
+        """
+        table = self.table
+        columns = self.columns
+        unknown = self.width - 1
+        dead = self.dead
+        final = self.final
+        state = self.start
+        longest = 0 if state in final else None
+        length = 0
+        for symbol in word:
+            state = table[state + columns.get(symbol, unknown)]
+            if state == dead:
+                break
+            length += 1
+            if state in final:
+                longest = length
+
+        return longest
+
+    def get_matrix(self):
+        """
+        Creates NumPy transition matrix as a flat array like the table,
+        one more column is added for padding of shorter words, it keeps every state
+        :return: 1-D array of row offsets of successors indexed by row offset + column
+        """
+        if self.matrix is None:
+            matrix = numpy.empty((self.states, self.width + 1), dtype=numpy.intp)
+            matrix[:, :self.width] = numpy.array(self.table, dtype=numpy.intp).reshape(self.states, self.width)
+            matrix[:, :self.width] //= self.width
+            matrix[:, self.width] = numpy.arange(self.states)
+            self.matrix = (matrix * (self.width + 1)).ravel()
+        return self.matrix
+
+    def encode_batch(self, words):
+        """
+        Converts words into a 2-D array of columns, one row for every word,
+        shorter words are padded by the padding column
+        strings of one character symbols are converted by NumPy at once, other words symbol by symbol
+        :param words: list of words
+        :return: 2-D array of columns
+        """
+        lengths = numpy.array([len(word) for word in words], dtype=numpy.intp)
+        longest = int(lengths.max()) if len(words) else 0
+        batch = numpy.full((len(words), longest), self.width, dtype=numpy.intp)
+        unknown = self.width - 1
+
+        if all(len(symbol) == 1 for symbol in self.symbols) and all(isinstance(word, str) for word in words):
+            # code points of all words in one array, mapped to columns by a lookup array
+            codes = numpy.frombuffer("".join(words).encode("utf-32-le"), dtype=numpy.uint32)
+            lookup = numpy.full(max([ord(symbol) for symbol in self.symbols] + [0]) + 2, unknown, dtype=numpy.intp)
+            for symbol, column in self.columns.items():
+                lookup[ord(symbol)] = column
+            mapped = lookup[numpy.minimum(codes, len(lookup) - 1)]
+            # the mask selects symbols of all words in row major order, which is the order of the joined words
+            batch[numpy.arange(longest) < lengths[:, None]] = mapped
+        else:
+            for row, word in enumerate(words):
+                batch[row, :len(word)] = self.encode(word)
+
+        return batch
+
+    def accepts_batch(self, words, chunk=65536):
+        """
+        Checks many words at once, all words of a chunk advance by one symbol in one step
+        :param words: iterable of words
+        :param chunk: number of words encoded at once, limits memory of the encoded batch
+        :return: list of bools
+        """
+        if numpy is None:
+            return self.accepts_many(words)
+
+        words = list(words)
+        matrix = self.get_matrix()
+        accepting = numpy.zeros(self.states, dtype=bool)
+        for state in self.final:
+            accepting[state // self.width] = True
+
+        result = []
+        for begin in range(0, len(words), chunk):
+            batch = self.encode_batch(words[begin:begin + chunk])
+            states = numpy.full(batch.shape[0], self.start // self.width * (self.width + 1), dtype=numpy.intp)
+            for step in range(batch.shape[1]):
+                states = matrix.take(states + batch[:, step])
+                # the dead state is 0, stop when all words are rejected
+                if step % 32 == 31 and not states.any():
+                    break
+            result.extend(accepting[states // (self.width + 1)].tolist())
+
+        return result
+
+
+class NFARunner(object):
+    """
+    Runner of a nondeterministic finite automaton over a stream of symbols
+    the set of current states is a bitset, successors of every state for every symbol are bitsets computed in advance,
+    successor sets of visited sets of states are cached, so a repeated situation costs one lookup
+    as in a lazily determinized automaton, the cache is cleared when it exceeds its size
+
+    Attributes:
+        symbols     list of symbols of the alphabet
+        columns     dictionary symbol -> index of the symbol
+        masks       list indexed by symbol indexes of lists of successor bitsets indexed by state numbers
+        start       bitset of initial states
+        final       bitset of final states
+        current     bitset of current states
+        position    number of symbols read since the last reset
+        cache       dictionary bitset of states -> list of successor bitsets indexed by symbol indexes, None if unknown
+        cache_size  maximal number of cached sets of states
+    """
+    def __init__(self, automaton, cache_size=100000):
+        if not automaton.is_epsilon_free:
+            automaton = automaton.remove_epsilon()
+
+        self.symbols = sorted(automaton.alphabet)
+        self.columns = dict((symbol, column) for column, symbol in enumerate(self.symbols))
+        self.masks, numbers, _ = get_successor_masks(automaton, self.symbols)
+        self.start = get_mask(automaton.start, numbers)
+        self.final = get_mask(automaton.final, numbers)
+        self.cache = {}
+        self.cache_size = cache_size
+        self.current = self.start
+        self.position = 0
+
+    def reset(self):
+        """
+        Returns to the initial states, cached successors are kept
+        """
+        self.current = self.start
+        self.position = 0
+
+    def is_accepting(self):
+        """
+        Checks whether the symbols read since the last reset form an accepted word
+        :return: bool
+        """
+        return bool(self.current & self.final)
+
+    def get_successor(self, current, column):
+        """
+        Computes successors of a set of states, the result is cached
+        :param current: bitset of states
+        :param column: index of the symbol
+        :return: bitset of successors
+        """
+        row = self.cache.get(current)
+        if row is None:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            row = [None] * len(self.symbols)
+            self.cache[current] = row
+        successor = row[column]
+        if successor is None:
+            masks = self.masks[column]
+            successor = 0
+            for member in get_members(current):
+                successor |= masks[member]
+            row[column] = successor
+        return successor
+
+    def step(self, symbol):
+        """
+        Reads one symbol, symbols outside the alphabet leave no current state
+        :param symbol: symbol
+        :return: bool, whether the symbols read so far form an accepted word
+        """
+        column = self.columns.get(symbol)
+        if column is None or not self.current:
+            self.current = 0
+        else:
+            self.current = self.get_successor(self.current, column)
+        self.position += 1
+        return bool(self.current & self.final)
+
+    def feed(self, symbols):
+        """
+        Reads symbols and reports every position, where the symbols read so far form an accepted word
+        once no state is current, the rest of the symbols is only counted
+        :param symbols: iterable of symbols, e.g. one chunk of the input
+        :return: generator of positions, a position is the number of symbols read since the last reset
+        """
+        columns = self.columns
+        final = self.final
+        cache = self.cache
+        current = self.current
+        position = self.position
+        for symbol in symbols:
+            if not current:
+                # no state is current, nothing can be accepted any more
+                position += 1
+                continue
+            column = columns.get(symbol)
+            if column is None:
+                current = 0
+            else:
+                row = cache.get(current)
+                if row is not None and row[column] is not None:
+                    current = row[column]
+                else:
+                    current = self.get_successor(current, column)
+            position += 1
+            if current & final:
+                # the state is stored before the generator is suspended
+                self.current = current
+                self.position = position
+                yield position
+        self.current = current
+        self.position = position
+
+    def feed_chunks(self, chunks):
+        """
+        Reads input divided into chunks, e.g. lines of a file or blocks of symbols
+        :param chunks: iterable of iterables of symbols
+        :return: generator of positions of accepted prefixes of the whole input
+        """
+        for chunk in chunks:
+            for position in self.feed(chunk):
+                yield position
+
+    def feed_stream(self, stream, chunk_size=65536):
+        """
+        Reads a text stream of one character symbols by blocks
+        :param stream: file-like object with method read
+        :param chunk_size: number of characters read at once
+        :return: generator of positions of accepted prefixes of the whole input
+        """
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            for position in self.feed(chunk):
+                yield position
+
+    def accepts(self, word):
+        """
+        Checks whether the automaton accepts word, the runner is reset before and after reading
+        :param word: iterable of symbols
+        :return: bool
+        """
+        self.reset()
+        for _ in self.feed(word):
+            pass
+        accepted = self.is_accepting()
+        self.reset()
+        return accepted
+
@@ -0,0 +1,147 @@
+"""
+Parallel algorithms over automata using a pool of processes
+
+determinization splits every level of the subset construction between worker processes,
+macrostates are encoded as integers (bit i set if state number i is in the macrostate)
+and the coordinator process removes already found macrostates before the next level
+"""
+from __future__ import print_function
+import multiprocessing
+import stats
+
+# automaton, state numbering and simulations of a worker process, set by init_worker
+worker_automaton = None
+worker_numbers = None
+worker_names = None
+worker_simulations = None
+
+
+def encode(states, numbers):
+    """
+    Encodes a set of states as an integer
+    :param states: iterable of states
+    :param numbers: dictionary state -> number
+    :return: int
+    """
+    mask = 0
+    for state in states:
+        mask |= 1 << numbers[state]
+    return mask
+
+
+def decode(mask, names):
+    """
+    Decodes an integer into a sorted list of states
+    :param mask: encoded macrostate
+    :param names: list of states indexed by numbers
+    :return: list of states
+    """
+    states = []
+    number = 0
+    while mask:
+        if mask & 1:
+            states.append(names[number])
+        mask >>= 1
+        number += 1
+    return sorted(states)
+
+
+def init_worker(automaton, numbers, names, simulations):
+    """
+    Stores the automaton in the worker process, so that it is sent only once
+    :param automaton: determinized automaton
+    :param numbers: dictionary state -> number of the coordinator
+    :param names: list of states indexed by numbers of the coordinator
+    :param simulations: simulation relation or None
+    """
+    global worker_automaton, worker_numbers, worker_names, worker_simulations
+    worker_automaton = automaton
+    # states are not numbered again, set order differs between processes started by spawn
+    worker_numbers = numbers
+    worker_names = names
+    worker_simulations = simulations
+
+
+def expand_macrostates(masks):
+    """
+    Computes deterministic transitions of a chunk of macrostates in a worker process
+    :param masks: list of encoded macrostates
+    :return: list of (mask, list of (label, successor mask))
+    """
+    result = []
+    for mask in masks:
+        state_group = ",".join(decode(mask, worker_names))
+        if worker_simulations is None:
+            new_trans = worker_automaton.get_deterministic_transitions(state_group)
+        else:
+            new_trans = worker_automaton.get_deterministic_transitions_optim(state_group, worker_simulations)
+
+        successors = []
+        for label in new_trans:
+            for endstate in new_trans[label]:
+                successors.append((label, encode(endstate.split(","), worker_numbers) if endstate else 0))
+        result.append((mask, successors))
+
+    return result
+
+
+def determinize_parallel(automaton, processes=None, simulations=None):
+    """
+    Converts automaton into a deterministic one, levels of the subset construction are expanded in parallel
+    :param automaton: automaton to determinize
+    :param processes: number of worker processes, number of CPUs if not given
+    :param simulations: simulation relation, if given, macrostates are reduced as in determinize_simulations
+    :return: determinized automaton, not reduced
+    """
+    numbers, names = automaton.number_states()
+    processes = processes or multiprocessing.cpu_count()
+
+    det = automaton.get_new()
+    det.label = automaton.label
+    det.automaton_type = automaton.automaton_type
+    det.alphabet = automaton.alphabet.copy()
+
+    start = encode(automaton.start, numbers)
+    # encoded macrostate -> its name
+    found = {start: ",".join(decode(start, names))}
+    det.start = {found[start]}
+    final_mask = encode(automaton.final, numbers)
+
+    frontier = [start]
+    # statistics of worker processes are not collected, only the coordinator counts macrostates
+    statistics = stats.get_active()
+    pool = multiprocessing.Pool(processes, init_worker, (automaton, numbers, names, simulations))
+    try:
+        while len(frontier) > 0:
+            if statistics is not None:
+                statistics.count("levels")
+                statistics.peak("frontier_size", len(frontier))
+            chunk_size = max(1, len(frontier) // (processes * 4))
+            chunks = [frontier[i:i + chunk_size] for i in range(0, len(frontier), chunk_size)]
+            frontier = []
+            for expanded in pool.imap_unordered(expand_macrostates, chunks):
+                for mask, successors in expanded:
+                    state = found[mask]
+                    det.states.add(state)
+                    if mask & final_mask:
+                        det.final.add(state)
+                    det.transitions[state] = {}
+                    if statistics is not None:
+                        statistics.count("states_explored")
+                        statistics.count("transitions_generated", len(successors))
+                    for label, successor in successors:
+                        if successor not in found:
+                            # the coordinator is the only one deciding which macrostates are new
+                            found[successor] = ",".join(decode(successor, names))
+                            frontier.append(successor)
+                        det.transitions[state][label] = [found[successor]]
+    except BaseException:
+        # a budget was exceeded or the run was interrupted, outstanding expansions are not waited for
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+    return det
@@ -59,6 +59,15 @@ class PredicateInterface(object):
         """
         return
 
+    def is_satisfiable_batch(self, predicates):
+        """
+        Checks satisfiability of more predicates at once
+        predicates backed by an external solver can answer them in one round-trip
+        :param predicates: list of predicates
+        :return: list of bools
+        """
+        return [predicate.is_satisfiable() for predicate in predicates]
+
     @abc.abstractmethod
     def is_subset(self, predicate):
         """
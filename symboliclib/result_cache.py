@@ -0,0 +1,218 @@
+"""
+Content-addressed cache of results of expensive operations on disk
+
+results are stored pickled in files named by a hash of the input automaton and the operation,
+so an automaton which did not change is never processed twice, no matter in which file it is stored,
+the least recently used results are removed when the cache exceeds its size limit
+
+usage:
+    from result_cache import ResultCache
+    cache = ResultCache("./cache", max_size=512 * 1024 * 1024)
+    det = cache.compute(automaton, "determinize")
+"""
+from __future__ import print_function
+import hashlib
+import os
+import pickle
+import tempfile
+
+# increase whenever results of the cached operations change, old results are never used then
+CACHE_VERSION = "2"
+
+# eviction removes results until the cache is this fraction of its size limit,
+# so the directory is listed once per this fraction of the limit written, not on every store
+EVICTION_TARGET = 0.9
+
+# operations worth caching, every one takes an automaton and returns its result
+OPERATIONS = {
+    "determinize": lambda a: a.determinize(),
+    "minimize": lambda a: a.minimize(),
+    "complement_ncsb": lambda a: a.complement_ncsb(),
+    "complement_ncsb_early_flush": lambda a: a.complement_ncsb_early_flush(),
+    "complement_ncsb_lazy": lambda a: a.complement_ncsb_lazy(),
+    "complement_ncsb_por": lambda a: a.complement_ncsb_por(),
+    "simulations": lambda a: a.simulations_preorder(),
+}
+
+
+def get_default_directory():
+    """
+    Returns default cache directory, SYMBOLICLIB_CACHE overrides it
+    :return: path
+    """
+    default = os.path.join(os.path.expanduser("~"), ".cache", "symboliclib")
+    return os.environ.get("SYMBOLICLIB_CACHE", default)
+
+
+class ResultCache:
+    """
+    Content-addressed cache of results on disk
+
+    Attributes:
+        directory   directory with cached results
+        max_size    maximal size of all cached results in bytes
+        hits        number of results loaded from the cache
+        misses      number of results which had to be computed
+        size        estimated size of all cached results in bytes, None until the directory is listed,
+                    results stored by other processes are counted only when the directory is listed again
+    """
+    def __init__(self, directory=None, max_size=1024 * 1024 * 1024):
+        self.directory = directory or get_default_directory()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.size = None
+        # several worker processes may create the directory at once
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, automaton, operation):
+        """
+        Computes key of a result
+        :param automaton: input automaton
+        :param operation: name of the operation
+        :return: hexadecimal digest
+        """
+        content = CACHE_VERSION + ":" + operation + ":" + automaton.get_hash()
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        """
+        Returns file of a result, results are split into subdirectories by the first two characters
+        :param key: key of the result
+        :return: path
+        """
+        return os.path.join(self.directory, key[:2], key[2:] + ".pickle")
+
+    def get(self, automaton, operation):
+        """
+        Loads cached result
+        :param automaton: input automaton
+        :param operation: name of the operation
+        :return: tuple (found, result)
+        """
+        path = self.get_path(self.get_key(automaton, operation))
+        try:
+            with open(path, 'rb') as the_file:
+                result = pickle.load(the_file)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+        # access time is kept in mtime, so that the eviction works even on filesystems mounted with noatime
+        try:
+            os.utime(path, None)
+        except OSError:
+            # evicted by another process in the meantime
+            pass
+        self.hits += 1
+        return True, result
+
+    def put(self, automaton, operation, result):
+        """
+        Stores result, removes the least recently used results if the cache is too big
+        :param automaton: input automaton
+        :param operation: name of the operation
+        :param result: result of the operation
+        """
+        path = self.get_path(self.get_key(automaton, operation))
+        subdirectory = os.path.dirname(path)
+        os.makedirs(subdirectory, exist_ok=True)
+        # write into a temporary file first, concurrent readers never see half written results
+        handle, temporary = tempfile.mkstemp(dir=subdirectory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'wb') as the_file:
+                pickle.dump(result, the_file, pickle.HIGHEST_PROTOCOL)
+            written = os.path.getsize(temporary)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(temporary, path)
+        except BaseException:
+            # e.g. the result cannot be pickled, the temporary file would stay in the cache forever
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+
+        if self.size is None:
+            self.size = self.get_size()
+        else:
+            self.size += written - replaced
+        if self.size > self.max_size:
+            self.evict()
+
+    def compute(self, automaton, operation, function=None):
+        """
+        Returns cached result of the operation, computes and stores it if it is not cached
+        :param automaton: input automaton
+        :param operation: name of the operation
+        :param function: function computing the result, OPERATIONS[operation] if not given
+        :return: result of the operation
+        """
+        found, result = self.get(automaton, operation)
+        if not found:
+            function = function or OPERATIONS[operation]
+            result = function(automaton)
+            self.put(automaton, operation, result)
+
+        return result
+
+    def get_entries(self):
+        """
+        Lists cached results
+        :return: list of (last access time, size, path)
+        """
+        entries = []
+        for subdirectory in os.listdir(self.directory):
+            full_subdirectory = os.path.join(self.directory, subdirectory)
+            if not os.path.isdir(full_subdirectory):
+                continue
+            for filename in os.listdir(full_subdirectory):
+                if filename.endswith(".pickle"):
+                    path = os.path.join(full_subdirectory, filename)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        # removed by another process
+                        continue
+                    entries.append((info.st_mtime, info.st_size, path))
+
+        return entries
+
+    def get_size(self):
+        """
+        Computes size of all cached results
+        :return: size in bytes
+        """
+        return sum(size for _, size, _ in self.get_entries())
+
+    def evict(self):
+        """
+        Removes the least recently used results if the cache exceeds its size limit,
+        until it fits into EVICTION_TARGET of the limit
+        """
+        entries = self.get_entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        if size > self.max_size:
+            target = self.max_size * EVICTION_TARGET
+            for _, entry_size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= entry_size
+                if size <= target:
+                    break
+        self.size = size
+
+    def clear(self):
+        """
+        Removes all cached results
+        """
+        for _, _, path in self.get_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.size = 0
@@ -0,0 +1,259 @@
+"""
+Regular model checking
+
+configurations of a system are words, a set of configurations is the language of a finite automaton
+and one step of the system is a symbolic transducer, reachable configurations are computed
+as the least fixpoint of Init, Init + T(Init), Init + T(Init) + T(T(Init)), ...
+
+every iterate is minimized and its states are renamed, so names of states do not grow,
+minimized configurations and their images are cached by the hash of their language,
+so a configuration seen before is neither minimized nor translated again
+
+widening collapses states of the minimal automaton which accept the same words up to given length,
+the result over-approximates the reachable configurations and the iteration often converges much sooner
+
+usage:
+    from rmc import Reachability
+    reachability = Reachability(transducer, init, widening=2)
+    reachable = reachability.run(bad)
+    print(reachability.status)
+    reachability.report()
+"""
+from __future__ import print_function
+from in_notin import InNotin
+import time
+import stats
+
+
+def get_renamed(automaton, prefix="q"):
+    """
+    Renames states of an automaton to prefix and a number
+    labels of automata with in and not_in predicates are replaced by in predicates over symbols of the alphabet,
+    symbols with the same endstates share one label, so labels of a state are disjoint
+    and determinization never has to split overlapping labels
+    :param automaton: finite automaton
+    :param prefix: prefix of new names
+    :return: new automaton with renamed states
+    """
+    numbers, names = automaton.number_states()
+    renamed = automaton.get_new()
+    renamed.alphabet = automaton.alphabet.copy()
+    renamed.automaton_type = automaton.automaton_type
+    renamed.label = getattr(automaton, "label", None)
+    renamed.is_epsilon_free = automaton.is_epsilon_free
+    # renaming and grouping of symbols by endstates keep deterministic automata deterministic
+    renamed.deterministic = automaton.deterministic
+    renamed.states = set(prefix + str(numbers[state]) for state in names)
+    renamed.start = set(prefix + str(numbers[state]) for state in automaton.start)
+    renamed.final = set(prefix + str(numbers[state]) for state in automaton.final)
+    if automaton.automaton_type == "INFA":
+        # union of automata does not keep the label instance
+        renamed.label = InNotin()
+    symbols = sorted(automaton.alphabet)
+    for state in automaton.transitions:
+        state_transitions = {}
+        if automaton.automaton_type == "INFA":
+            # symbol -> set of endstates
+            ends = {}
+            for label in automaton.transitions[state]:
+                for symbol in symbols:
+                    if label.has_letter(symbol):
+                        ends.setdefault(symbol, set()).update(automaton.transitions[state][label])
+            # endstates -> symbols
+            groups = {}
+            for symbol in symbols:
+                if symbol in ends:
+                    groups.setdefault(frozenset(ends[symbol]), set()).add(symbol)
+            for endstates, group in groups.items():
+                label = InNotin()
+                label.type = "in"
+                label.symbols = group
+                state_transitions[label] = sorted(prefix + str(numbers[end]) for end in endstates)
+        else:
+            for label in automaton.transitions[state]:
+                state_transitions[label] = [prefix + str(numbers[end]) for end in automaton.transitions[state][label]]
+        if not state_transitions:
+            # determinization expects at least one label of every state with transitions
+            continue
+        renamed.transitions[prefix + str(numbers[state])] = state_transitions
+
+    return renamed
+
+
+def collapse(automaton, depth):
+    """
+    Merges states of a deterministic automaton which accept the same words of length at most depth
+    :param automaton: deterministic automaton, e.g. minimized
+    :param depth: number of refinement rounds, 0 merges all final and all non-final states
+    :return: automaton whose language includes the language of the given one
+    """
+    symbols = sorted(automaton.alphabet)
+    successors = automaton.get_symbol_transitions(symbols)
+    classes = automaton.get_ranks(dict((state, state in automaton.final) for state in successors))
+    for _ in range(depth):
+        signatures = {}
+        for state in successors:
+            signatures[state] = (classes[state], [(symbol, classes[end]) for symbol, end in successors[state]])
+        classes = automaton.get_ranks(signatures)
+
+    collapsed = automaton.get_new()
+    collapsed.alphabet = automaton.alphabet.copy()
+    collapsed.automaton_type = automaton.automaton_type
+    collapsed.label = getattr(automaton, "label", None)
+    collapsed.is_epsilon_free = True
+    for state in classes:
+        name = "c" + str(classes[state])
+        collapsed.states.add(name)
+        if state in automaton.start:
+            collapsed.start.add(name)
+        if state in automaton.final:
+            collapsed.final.add(name)
+        if not automaton.transitions.get(state):
+            continue
+        if name not in collapsed.transitions:
+            collapsed.transitions[name] = {}
+        class_transitions = collapsed.transitions[name]
+        for label in automaton.transitions[state]:
+            for end in automaton.transitions[state][label]:
+                end_name = "c" + str(classes[end])
+                if label not in class_transitions:
+                    class_transitions[label] = [end_name]
+                elif end_name not in class_transitions[label]:
+                    class_transitions[label].append(end_name)
+    # classes merging states with different successors make the automaton nondeterministic
+    collapsed.is_deterministic()
+
+    return collapsed
+
+
+class Reachability(object):
+    """
+    Computation of configurations reachable by a transducer from initial configurations
+
+    Attributes:
+        transducer      symbolic transducer of one step
+        init            automaton of initial configurations
+        widening        depth of collapsing of states, None without widening
+        max_iterations  maximal number of iterations
+        configurations  dictionary language hash -> minimized automaton
+        images          dictionary language hash -> minimized image of the automaton under the transducer
+        iterations      list of dictionaries with statistics of iterations of the last run
+        status          result of the last run: fixpoint, bad (a bad configuration is reachable,
+                        with widening possibly spurious), limit (max_iterations reached) or None
+    """
+    def __init__(self, transducer, init, widening=None, max_iterations=1000):
+        self.transducer = transducer
+        self.init = init
+        self.widening = widening
+        self.max_iterations = max_iterations
+        self.configurations = {}
+        self.images = {}
+        self.iterations = []
+        self.status = None
+
+    def get_minimal(self, automaton):
+        """
+        Minimizes an automaton, an automaton with the same language seen before is returned instead
+        :param automaton: finite automaton
+        :return: tuple (language hash, minimal automaton with renamed states)
+        """
+        if automaton.is_epsilon_free is False:
+            # images under transducers writing epsilon have epsilon transitions
+            automaton = automaton.remove_epsilon()
+        # minimize splits names of states by separators used in names of products, so they are renamed first
+        minimal = get_renamed(get_renamed(automaton).minimize())
+        minimal.is_epsilon_free = True
+        key = minimal.get_language_hash()
+        if key in self.configurations:
+            return key, self.configurations[key]
+        self.configurations[key] = minimal
+        return key, minimal
+
+    def get_image(self, key, automaton):
+        """
+        Computes the minimal image of configurations under the transducer, the result is cached
+        :param key: language hash of the configurations
+        :param automaton: minimal automaton of the configurations
+        :return: tuple (minimal image, bool whether it was cached)
+        """
+        if key in self.images:
+            return self.images[key], True
+
+        image = self.transducer.run_on_nfa(automaton)
+        if image is False or not image.start:
+            # no configuration has a successor
+            image = automaton.get_new()
+            image.alphabet = automaton.alphabet.copy()
+            image.automaton_type = automaton.automaton_type
+            image.label = getattr(automaton, "label", None)
+        else:
+            image = self.get_minimal(image)[1]
+        self.images[key] = image
+        return image, False
+
+    def widen(self, automaton):
+        """
+        Collapses states of a minimal automaton if widening is enabled
+        :param automaton: minimal automaton
+        :return: tuple (language hash, minimal automaton)
+        """
+        return self.get_minimal(collapse(automaton, self.widening))
+
+    @stats.timed("reachability")
+    def run(self, bad=None):
+        """
+        Iterates images of the initial configurations until they are included in the configurations found so far
+        :param bad: automaton of bad configurations, the iteration stops once one of them is reached
+        :return: automaton of configurations found, reachable ones if status is fixpoint
+        """
+        self.iterations = []
+        self.status = None
+        statistics = stats.get_active()
+
+        key, reach = self.get_minimal(self.init)
+        if self.widening is not None:
+            key, reach = self.widen(reach)
+
+        for iteration in range(self.max_iterations):
+            if statistics is not None:
+                statistics.count("iterations")
+                statistics.peak("configuration_states", len(reach.states))
+            started = time.time()
+            record = {"iteration": iteration, "states": len(reach.states)}
+            self.iterations.append(record)
+
+            if bad is not None and not reach.is_intersection_empty(bad)[0]:
+                self.status = "bad"
+                record["time"] = time.time() - started
+                return reach
+
+            image, cached = self.get_image(key, reach)
+            record["image_states"] = len(image.states)
+            record["cached"] = cached
+            if not image.final or image.is_included(reach):
+                self.status = "fixpoint"
+                record["time"] = time.time() - started
+                return reach
+
+            new_key, union = self.get_minimal(reach.union(image))
+            if self.widening is not None:
+                new_key, union = self.widen(union)
+            record["time"] = time.time() - started
+            if new_key == key:
+                # the union did not add a configuration, only possible if inclusion was not decided exactly
+                self.status = "fixpoint"
+                return reach
+            key, reach = new_key, union
+
+        self.status = "limit"
+        return reach
+
+    def report(self):
+        """
+        Prints statistics of iterations of the last run
+        """
+        for record in self.iterations:
+            print("iteration", record["iteration"], "states", record["states"],
+                  "image states", record.get("image_states"), "cached", record.get("cached"),
+                  "time %.3f" % record.get("time", 0.0))
+        print("status", self.status)
@@ -8,8 +8,12 @@ Copyright (c) 2017  Michaela Bielikova <xbieli06@stud.fit.vutbr.cz>
 from __future__ import print_function
 
 from copy import deepcopy
+from collections import deque
+from matcher import DFAMatcher
 from symbolic import Symbolic
+import hashlib
 import itertools
+import stats
 
 
 class SA(Symbolic):
@@ -51,6 +55,10 @@ class SA(Symbolic):
         self.is_epsilon_free = None
         self.epsilon_free = None
         self.label = None
+        # hash of the language, computed by get_language_hash
+        self.language_hash = None
+        # compiled matcher of words, created by get_matcher
+        self.matcher = None
 
     @staticmethod
     def get_new():
@@ -60,10 +68,14 @@ class SA(Symbolic):
         """
         return SA()
 
+    @stats.timed("remove_epsilon")
     def remove_epsilon(self):
         """
         Creates epsilon_free version of the automaton
         stores result in attribute epsilon_free
+        every state gets transitions and finality of all states in its epsilon closure,
+        endstates of every label are propagated as bitsets through components of epsilon transitions
+        in reverse topological order, so every component is processed once
         :return: epsilon_free automaton
         """
         if self.epsilon_free is not None:
@@ -71,52 +83,184 @@ class SA(Symbolic):
         if self.is_epsilon_free:
             return self
 
+        components, successors, numbers, names = self.get_epsilon_components()
+        final_mask = 0
+        for state in self.final:
+            if state in numbers:
+                final_mask |= 1 << numbers[state]
+
         eps_free = deepcopy(self)
-        for state in self.transitions:
-            closure = self.get_epsilon_closure(state)
-            # every start state that has a final state in eps closure must be final
-            if state in self.start:
-                if len(self.final.intersection(closure)):
-                    self.final.add(state)
-            # add transitions that will replace epsilon transitions
-            for closure_state in closure:
-                if closure_state in self.transitions:
-                    for label in self.transitions[closure_state]:
-                        if label.is_epsilon:
-                            continue
-                        for endstate in self.transitions[closure_state][label]:
-                            if label in eps_free.transitions[state]:
-                                if endstate not in eps_free.transitions[state][label]:
-                                    eps_free.transitions[state][label].append(endstate)
-                            else:
-                                eps_free.transitions[state][label] = [endstate]
+        # closures and label -> endstates bitsets of states of completed components
+        closures = [0] * len(names)
+        reach = [None] * len(names)
+        for component in components:
+            closure = self.get_bitset(component)
+            targets = {}
+            for member in component:
+                for label, endstates in self.transitions.get(names[member], {}).items():
+                    if label.is_epsilon:
+                        continue
+                    mask = targets.get(label, 0)
+                    for endstate in endstates:
+                        mask |= 1 << numbers[endstate]
+                    targets[label] = mask
+                for successor in successors[member]:
+                    # successors in the same component are not completed yet, but their closure is this one
+                    if reach[successor] is not None:
+                        closure |= closures[successor]
+                        for label, mask in reach[successor].items():
+                            targets[label] = targets.get(label, 0) | mask
+            for member in component:
+                closures[member] = closure
+                reach[member] = targets
+
+            for member in component:
+                state = names[member]
+                # every state that has a final state in eps closure must be final
+                if closure & final_mask:
+                    eps_free.final.add(state)
+                if closure == 1 << member:
+                    continue
+                # add transitions that will replace epsilon transitions
+                new_trans = eps_free.transitions.setdefault(state, {})
+                for label, mask in targets.items():
+                    endstates = new_trans.setdefault(label, [])
+                    existing = set(endstates)
+                    while mask:
+                        bit = mask & -mask
+                        mask ^= bit
+                        endstate = names[bit.bit_length() - 1]
+                        if endstate not in existing:
+                            endstates.append(endstate)
         # delete epsilon transitions
         for state in self.transitions:
             for label in self.transitions[state]:
                 if label.is_epsilon:
                     del eps_free.transitions[state][label]
+        eps_free.is_epsilon_free = True
 
         self.epsilon_free = eps_free
 
         return eps_free
 
-    def get_epsilon_closure(self, state, checked=set()):
+    def get_epsilon_components(self):
+        """
+        Finds strongly connected components of epsilon transitions by iterative Tarjan's algorithm
+        :return: tuple (list of components in reverse topological order, every component is a list of state numbers,
+                 list of epsilon successors indexed by state numbers, dictionary state -> number,
+                 list of states indexed by numbers)
+        """
+        numbers, names = self.number_states()
+        successors = [[] for _ in names]
+        for state in self.transitions:
+            for label in self.transitions[state]:
+                if label.is_epsilon:
+                    successors[numbers[state]].extend(numbers[end] for end in self.transitions[state][label])
+
+        components = []
+        index = [-1] * len(names)
+        low = [0] * len(names)
+        on_stack = [False] * len(names)
+        stack = []
+        counter = 0
+        for root in range(len(names)):
+            if index[root] != -1:
+                continue
+            if not successors[root]:
+                # state without epsilon transitions is a component of its own
+                index[root] = counter
+                counter += 1
+                components.append([root])
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            # (state, position of the next successor to visit)
+            work = [(root, 0)]
+            while work:
+                state, position = work[-1]
+                if position < len(successors[state]):
+                    work[-1] = (state, position + 1)
+                    successor = successors[state][position]
+                    if index[successor] == -1:
+                        index[successor] = low[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack[successor] = True
+                        work.append((successor, 0))
+                    elif on_stack[successor]:
+                        low[state] = min(low[state], index[successor])
+                    continue
+
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[state])
+                if low[state] == index[state]:
+                    # state is the root of a component, all components reachable from it are already completed
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == state:
+                            break
+                    components.append(component)
+
+        return components, successors, numbers, names
+
+    def get_epsilon_closures(self):
+        """
+        Computes epsilon closures of all states at once
+        all states of a component of epsilon transitions share one closure, which is the component
+        united with closures of its successor components
+        :return: tuple (list of closures indexed by state numbers, closures are bitsets of state numbers,
+                 dictionary state -> number, list of states indexed by numbers)
+        """
+        components, successors, numbers, names = self.get_epsilon_components()
+        closures = [0] * len(names)
+        for component in components:
+            closure = self.get_bitset(component)
+            for member in component:
+                for successor in successors[member]:
+                    # successors in the same component are not completed yet, but their closure is this one
+                    if closures[successor]:
+                        closure |= closures[successor]
+            for member in component:
+                closures[member] = closure
+
+        return closures, numbers, names
+
+    @staticmethod
+    def get_bitset(numbers):
+        """
+        Creates bitset of numbers at once, setting bits of a big integer one by one is quadratic
+        :param numbers: list of numbers
+        :return: int with bits of the numbers set
+        """
+        if len(numbers) == 1:
+            return 1 << numbers[0]
+        bits = bytearray(max(numbers) // 8 + 1)
+        for number in numbers:
+            bits[number >> 3] |= 1 << (number & 7)
+
+        return int.from_bytes(bytes(bits), "little")
+
+    def get_epsilon_closure(self, state):
         """
         Finds epsilon closure of a state
         :param state: state to check
-        :param checked: already checked states
-        :return: epsilon closure of state
+        :return: set of states reachable from state by epsilon transitions, including state
         """
+        closures, numbers, names = self.get_epsilon_closures()
+        if state not in numbers:
+            return {state}
+        closure = closures[numbers[state]]
         result = set()
-
-        if state in self.transitions:
-            for label in self.transitions[state]:
-                if label.is_epsilon:
-                    for endstate in self.transitions[state][label]:
-                        if endstate not in checked:
-                            result.add(endstate)
-                            checked.add(endstate)
-                            result = result.union(self.get_epsilon_closure(endstate, checked))
+        while closure:
+            bit = closure & -closure
+            closure ^= bit
+            result.add(names[bit.bit_length() - 1])
 
         return result
 
@@ -313,14 +457,20 @@ class SA(Symbolic):
 
         return result
 
-    def is_included_antichain(self, other):
+    @stats.timed("is_included_antichain")
+    def is_included_antichain(self, other, budget=None):
         """
         Checks whether automaton is included in the other one:
         self <= other ?
         Algorithm uses antichains
         :param other: other automaton
+        :param budget: stats.Budget limiting explored states, generated transitions and time
         :return: bool
         """
+        if budget is not None:
+            with stats.use(budget):
+                return self.is_included_antichain(other)
+
         # alphabet which we work with must be a union of both alphabets
         # otherwise the contradiction doesnt have to be found
         alphabet = self.alphabet.union(other.alphabet)
@@ -339,16 +489,23 @@ class SA(Symbolic):
         other_sim = other_compl.simulations_preorder()
         self_sim = self_compl.simulations_preorder()
 
+        table = self_compl.get_minterm_table(other_compl)
+
         processed = []
         next = []
         for start in self_compl.start:
             next.append((start, other_compl.minim_antichain(other_compl.start, other_sim)))
 
+        statistics = stats.get_active()
         while len(next):
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(next))
+                statistics.peak("antichain_size", len(next) + len(processed))
             # (r,R)
             pair = next.pop()
             processed.append(pair)
-            post = self_compl.post_antichain(other_compl, pair)
+            post = self_compl.post_antichain(other_compl, pair, table)
             # (p,P)
             for post_pair in post:
                 post_pair_min = (post_pair[0], self_compl.minim_antichain(post_pair[1], other_sim))
@@ -377,14 +534,20 @@ class SA(Symbolic):
 
         return True
 
-    def is_included_antichain_pure(self, other):
+    @stats.timed("is_included_antichain_pure")
+    def is_included_antichain_pure(self, other, budget=None):
         """
         Checks whether automaton is included in the other one:
         self <= other ?
         Algorithm doesnt use simulations
         :param other: other automaton
+        :param budget: stats.Budget limiting explored states, generated transitions and time
         :return: bool
         """
+        if budget is not None:
+            with stats.use(budget):
+                return self.is_included_antichain_pure(other)
+
         # alphabet which we work with must be a union of both alphabets
         # otherwise the contradiction doesnt have to be found
         alphabet = self.alphabet.union(other.alphabet)
@@ -400,16 +563,23 @@ class SA(Symbolic):
             if not other_compl.final.intersection(other_compl.start):
                 return False
 
+        table = self_compl.get_minterm_table(other_compl)
+
         processed = []
         next = []
         for start in self_compl.start:
             next.append((start, other_compl.start))
 
+        statistics = stats.get_active()
         while len(next):
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(next))
+                statistics.peak("antichain_size", len(next) + len(processed))
             # (r,R)
             pair = next.pop()
             processed.append(pair)
-            post = self_compl.post_antichain(other_compl, pair)
+            post = self_compl.post_antichain(other_compl, pair, table)
             # (p,P)
             for post_pair in post:
                 post_pair_min = (post_pair[0], post_pair[1])
@@ -446,30 +616,118 @@ class SA(Symbolic):
         return False
 
 
-    def post_antichain(self, other, pair):
+    def get_minterm_table(self, other):
+        """
+        Precomputes successors of states of both automata for every minterm of their combined labels
+        only minterms containing a symbol of the common alphabet are used
+        :param other: other automaton
+        :return: tuple (minterms, successors in self, successors in other),
+                 False if labels of the automata are of different classes or cannot be split into minterms
+        """
+        labels = []
+        for automaton in (self, other):
+            for state in automaton.transitions:
+                labels.extend(automaton.transitions[state].keys())
+        if len(set(type(label) for label in labels if not label.is_epsilon)) > 1:
+            # e.g. in_notin predicates of a symbolic automaton cannot be conjoined with letters
+            return False
+        minterms = self.get_minterms(labels, self.alphabet.union(other.alphabet))
+        if minterms is None:
+            return False
+
+        # indices of minterms covered by every distinct label
+        covered = {}
+        for label in set(labels):
+            if not label.is_epsilon:
+                covered[label] = [i for i, minterm in enumerate(minterms) if minterm.conjunction(label).is_satisfiable()]
+
+        return minterms, self.get_minterm_successors(covered), other.get_minterm_successors(covered)
+
+    def get_minterm_successors(self, covered):
+        """
+        Groups endstates of transitions by minterms covered by their labels
+        :param covered: dictionary label -> indices of minterms covered by the label
+        :return: dictionary state -> minterm index -> set of endstates
+        """
+        successors = {}
+        for state in self.transitions:
+            successors[state] = {}
+            for label in self.transitions[state]:
+                for index in covered.get(label, []):
+                    if index in successors[state]:
+                        successors[state][index].update(self.transitions[state][label])
+                    else:
+                        successors[state][index] = set(self.transitions[state][label])
+
+        return successors
+
+    def post_antichain(self, other, pair, table=None):
         """
         Computes post relation for antichain algorithm
         :param other: other automaton
         :param pair: pair of states (p,Q), p is a state from self, Q is a superstate from other
+        :param table: result of get_minterm_table, computed if not given
         :return: post relation
         """
+        return [(q, superstates) for _, q, superstates in self.post_antichain_witness(other, pair, table)]
+
+    def post_antichain_witness(self, other, pair, table=None):
+        """
+        Computes post relation for antichain algorithm together with the minterm of every successor
+        creates one successor pair per minterm of combined labels instead of one per symbol,
+        if there is no minterm table, one successor pair per symbol is created and the symbol is the witness
+        :param other: other automaton
+        :param pair: pair of states (p,Q), p is a state from self, Q is a superstate from other
+        :param table: result of get_minterm_table, False without minterms, computed if not given
+        :return: list of triples (minterm or symbol, q, superstate)
+        """
+        if table is None:
+            table = self.get_minterm_table(other)
+        if table is False:
+            return self.post_antichain_symbols(other, pair)
+        minterms, self_successors, other_successors = table
+
         result = []
-        for a in self.alphabet.union(other.alphabet):
+        if pair[0] not in self_successors:
+            return result
+
+        for index, new_qs in self_successors[pair[0]].items():
+            new_superstates = set()
+            for superset_state in pair[1]:
+                if superset_state in other_successors and index in other_successors[superset_state]:
+                    new_superstates.update(other_successors[superset_state][index])
+
+            if new_superstates:
+                for q in new_qs:
+                    result.append((minterms[index], q, new_superstates))
+
+        return result
+
+    def post_antichain_symbols(self, other, pair):
+        """
+        Computes post relation for antichain algorithm symbol by symbol of both alphabets
+        used if labels of the automata cannot be split into common minterms
+        :param other: other automaton
+        :param pair: pair of states (p,Q), p is a state from self, Q is a superstate from other
+        :return: list of triples (symbol, q, superstate)
+        """
+        result = []
+        for a in sorted(self.alphabet.union(other.alphabet)):
             new_qs = set()
             new_superstates = set()
             if pair[0] in self.transitions:
                 for label in self.transitions[pair[0]]:
-                    if label.has_letter(a):
-                        new_qs = new_qs.union(self.transitions[pair[0]][label])
+                    if not label.is_epsilon and label.has_letter(a):
+                        new_qs.update(self.transitions[pair[0]][label])
             for superset_state in pair[1]:
                 if superset_state in other.transitions:
                     for label in other.transitions[superset_state]:
-                        if label.has_letter(a):
-                            new_superstates = new_superstates.union(other.transitions[superset_state][label])
+                        if not label.is_epsilon and label.has_letter(a):
+                            new_superstates.update(other.transitions[superset_state][label])
 
             if new_qs and new_superstates:
                 for q in new_qs:
-                    result.append((q, new_superstates))
+                    result.append((a, q, new_superstates))
 
         return result
 
@@ -490,6 +748,7 @@ class SA(Symbolic):
 
 
 
+    @stats.timed("is_included")
     def is_included(self, other):
         """
         Checks whether automaton is included in the other one:
@@ -506,7 +765,11 @@ class SA(Symbolic):
         queue = list(itertools.product(self.determinized.start, other.determinized.start))
         checked = []
 
+        statistics = stats.get_active()
         while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             pair = queue.pop()
             q1 = pair[0]
             q2 = pair[1]
@@ -539,6 +802,10 @@ class SA(Symbolic):
         :param other: other automaton
         :return: reduced automaton
         """
+        if self.alphabet == other.alphabet and self.language_hash is not None and other.language_hash is not None:
+            # both languages were hashed before, hashes of minimal automata decide equivalence
+            return self.language_hash == other.language_hash
+
         if self.is_included(other) and other.is_included(self):
             return True
 
@@ -595,6 +862,7 @@ class SA(Symbolic):
 
         return complete
 
+    @stats.timed("simulations_preorder")
     def simulations_preorder(self):
         """
         Computes simulation_preorder relation
@@ -632,7 +900,10 @@ class SA(Symbolic):
 
         N = {}
 
+        statistics = stats.get_active()
         while len(c):
+            if statistics is not None:
+                statistics.count("simulation_pairs")
             item = c.pop()
             i = item[0]
             j = item[1]
@@ -705,12 +976,19 @@ class SA(Symbolic):
 
         return classic
 
-    def determinize(self):
+    @stats.timed("determinize")
+    def determinize(self, processes=None, budget=None):
         """
         Converts automaton into a deterministic one
         stores the result in attribute determinized
+        :param processes: if greater than 1, macrostates are expanded by a pool of this many processes
+        :param budget: stats.Budget limiting explored states, generated transitions and time
         :return: determinised automaton
         """
+        if budget is not None:
+            with stats.use(budget):
+                return self.determinize(processes)
+
         # automaton is already deterministic
         if self.deterministic:
             self.determinized = deepcopy(self)
@@ -719,9 +997,18 @@ class SA(Symbolic):
         if self.determinized is not None and self.determinized.is_deterministic():
             return deepcopy(self.determinized)
 
+        if processes is not None and processes > 1:
+            from parallel import determinize_parallel
+            det = determinize_parallel(self, processes)
+            det = det.simple_reduce()
+            det.is_deterministic()
+            self.determinized = det
+            return det
+
         det = self.get_new()
         det.start = set()
         det.label = self.label
+        det.automaton_type = self.automaton_type
         det.start.add(",".join(self.start))
 
         det.alphabet = self.alphabet.copy()
@@ -730,7 +1017,11 @@ class SA(Symbolic):
         queue.add(",".join(self.start))
 
         checked = []
+        statistics = stats.get_active()
         while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
             state = queue.pop()
             checked.append(state)
             det.states.add(state)
@@ -741,6 +1032,8 @@ class SA(Symbolic):
 
             new_trans = self.get_deterministic_transitions(state)
             det.transitions[state] = new_trans
+            if statistics is not None:
+                statistics.count("transitions_generated", len(new_trans))
             for label in new_trans:
                 for endstate in new_trans[label]:
                     if endstate not in queue and endstate not in checked:
@@ -753,36 +1046,55 @@ class SA(Symbolic):
 
         return det
 
-    def minimize(self):
+    @stats.timed("minimize")
+    def minimize(self, budget=None):
         """
         Converts automaton into a minimal one
+        :param budget: stats.Budget limiting explored states, generated transitions and time
         :return: minimal automaton
         """
+        if budget is not None:
+            with stats.use(budget):
+                return self.minimize()
+
         det = self.determinize()
         complete = det.get_complete()
 
         min_states = set()
-        min_states.add("|".join(sorted(complete.final)))
-        min_states.add("|".join(sorted(complete.states - complete.final)))
-
+        # name of a group of states -> its states, names of states may contain the separator
+        members = {}
+        for group in (sorted(complete.final), sorted(complete.states - complete.final)):
+            min_states.add("|".join(group))
+            if group:
+                members["|".join(group)] = group
+
+        statistics = stats.get_active()
         while True:
+            if statistics is not None:
+                statistics.count("refinement_rounds")
+                statistics.peak("partition_size", len(min_states))
             new_trans = {}
+            # group of every state, names of states may be substrings of other names
+            groups = {}
+            for minstate in min_states:
+                for member in members.get(minstate, minstate.split("|")):
+                    groups[member] = minstate
             # to check if queue was changed
             queue = min_states.copy()
             next_iteration = set()
             while len(queue) > 0:
+                if statistics is not None:
+                    statistics.count("blocks_processed")
                 state_group = queue.pop()
                 new_trans[state_group] = {}
-                states = state_group.split("|")
+                states = members.get(state_group, state_group.split("|"))
 
                 for state in states:
                     new_trans[state_group][state] = {}
                     if state in complete.transitions:
                         for label in complete.transitions[state]:
                             for endstate in complete.transitions[state][label]:
-                                for minstate in min_states:
-                                    if endstate in minstate:
-                                        new_trans[state_group][state][label] = [minstate]
+                                new_trans[state_group][state][label] = [groups[endstate]]
                     else:
                         new_trans[state_group][state] = {}
                 # get new transition sets
@@ -794,7 +1106,10 @@ class SA(Symbolic):
                         if old_state in new_trans[state_group]:
                             if new_trans[state_group][old_state] == item:
                                 new_state_group.append(old_state)
-                    next_iteration.add("|".join(sorted(new_state_group)))
+                    new_state_group.sort()
+                    next_iteration.add("|".join(new_state_group))
+                    if new_state_group:
+                        members["|".join(new_state_group)] = new_state_group
 
             # if the subsets did not change between iterations, end
             if next_iteration == min_states:
@@ -808,7 +1123,7 @@ class SA(Symbolic):
         new_start = set()
         for state_group in min_states:
             complete.transitions[state_group] = list(new_trans[state_group].values())[0]
-            for state_old in state_group.split("|"):
+            for state_old in members.get(state_group, state_group.split("|")):
                 if state_old in complete.final:
                     new_final.add(state_group)
                 if state_old in complete.start:
@@ -821,6 +1136,109 @@ class SA(Symbolic):
 
         return complete
 
+    def get_language_hash(self):
+        """
+        Computes hash of the language of the automaton over its alphabet
+        the hash is computed from the minimal deterministic automaton, its states are numbered in breadth first order
+        with symbols in alphabetical order, language equivalent automata over the same alphabet have the same hash
+        the result is stored in attribute language_hash
+        :return: hexadecimal sha256 digest
+        """
+        if self.language_hash is not None:
+            return self.language_hash
+
+        det = self.determinize()
+        symbols = sorted(self.alphabet)
+        # in the trimmed automaton, missing successor is the only class which accepts nothing
+        live = det.get_useful_states() & det.get_reachable_states()
+        successors = {}
+        for state, edges in det.get_symbol_transitions(symbols).items():
+            if state in live:
+                successors[state] = [(symbol, end) for symbol, end in edges if end in live]
+        classes = self.get_ranks(dict((state, state in det.final) for state in successors))
+        count = len(set(classes.values()))
+        while True:
+            signatures = {}
+            for state in successors:
+                signatures[state] = (classes[state], [(symbol, classes[end]) for symbol, end in successors[state]])
+            new_classes = self.get_ranks(signatures)
+            new_count = len(set(new_classes.values()))
+            classes = new_classes
+            if new_count == count:
+                break
+            count = new_count
+
+        # one representative of every class, numbered in breadth first order from the initial state
+        representatives = {}
+        for state in sorted(successors):
+            representatives.setdefault(classes[state], state)
+        numbers = {}
+        content = []
+        queue = deque()
+        for state in det.start:
+            if state in classes:
+                # determinized automaton has only one initial state
+                numbers[classes[state]] = 0
+                queue.append(classes[state])
+        while len(queue) > 0:
+            state_class = queue.popleft()
+            state = representatives[state_class]
+            edges = []
+            for symbol, end in successors[state]:
+                if classes[end] not in numbers:
+                    numbers[classes[end]] = len(numbers)
+                    queue.append(classes[end])
+                edges.append((symbol, numbers[classes[end]]))
+            content.append((numbers[state_class], state in det.final, edges))
+
+        self.language_hash = hashlib.sha256(repr(sorted(content)).encode("utf-8")).hexdigest()
+        return self.language_hash
+
+    def get_matcher(self):
+        """
+        Compiles the automaton into a matcher of words
+        the result is stored in attribute matcher
+        :return: DFAMatcher
+        """
+        if self.matcher is None:
+            self.matcher = DFAMatcher(self)
+        return self.matcher
+
+    def accepts(self, word):
+        """
+        Checks whether the automaton accepts a word
+        the automaton is compiled into a matcher on the first call
+        :param word: iterable of symbols, e.g. list of symbols or string of one character symbols
+        :return: bool
+        """
+        return self.get_matcher().accepts(word)
+
+    def accepts_batch(self, words):
+        """
+        Checks many words at once by the compiled matcher, uses NumPy if it is installed
+        :param words: iterable of words
+        :return: list of bools
+        """
+        return self.get_matcher().accepts_batch(words)
+
+    def get_symbol_transitions(self, symbols):
+        """
+        Expands labels of a deterministic automaton into symbols
+        :param symbols: sorted list of symbols
+        :return: dictionary state -> list of (symbol, endstate) in the order of symbols
+        """
+        successors = {}
+        for state in self.states:
+            successors[state] = []
+            labels = list(self.transitions.get(state, {}))
+            for symbol in symbols:
+                for label in labels:
+                    if label.has_letter(symbol):
+                        successors[state].append((symbol, self.transitions[state][label][0]))
+                        break
+
+        return successors
+
     def get_deterministic_transitions(self, state_group):
         """
         Returns deterministic transitions from a given state
@@ -828,6 +1246,8 @@ class SA(Symbolic):
         :return: deterministic transitions
         """
         new_transitions = {}
+        operations = 0
+        checks = 0
 
         for state in state_group.split(","):
             if state not in self.transitions:
@@ -835,6 +1255,7 @@ class SA(Symbolic):
 
             labels = list(self.transitions[state].keys())
             combinations = self.list_powerset(len(labels))
+            candidates = []
             for com in combinations:
                 # get label combinations and endstates
                 end = set()
@@ -849,8 +1270,16 @@ class SA(Symbolic):
                         end = end.union(set(self.transitions[state][labels[j]]))
                     else:
                         add = add.conjunction(labels[j].negation())
+                candidates.append((add, end))
+            # every combination conjuncts all labels, the missing ones negated
+            operations += len(combinations) * (2 * len(labels) - 1) - sum(len(com) for com in combinations)
+            checks += len(candidates)
+
+            # satisfiability of all label combinations is checked at once
+            satisfiable = labels[0].is_satisfiable_batch([candidate[0] for candidate in candidates])
+            for (add, end), is_sat in zip(candidates, satisfiable):
                 # add to created transitions
-                if add.is_satisfiable() and len(end):
+                if is_sat and len(end):
                     if add in new_transitions:
                         # if label already exists, unite endstates
                         existing_transitions = set(new_transitions[add][0].split(","))
@@ -858,6 +1287,11 @@ class SA(Symbolic):
                     else:
                         new_transitions = self.merge_transition(new_transitions, add, end)
 
+        statistics = stats.get_active()
+        if statistics is not None:
+            statistics.count("predicate_operations", operations)
+            statistics.count("satisfiability_checks", checks)
+
         return new_transitions
 
     def merge_transition(self, new_transitions, add, end):
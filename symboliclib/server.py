@@ -0,0 +1,302 @@
+"""
+Server keeping parsed automata and results of operations in memory between command line calls
+
+the server listens on a unix socket (or reads standard input), every request is one JSON line
+{"command": name, "files": [file1, file2]} and every response is one JSON line
+{"status": "ok", "output": text} or {"status": "error", "error": text},
+output is the same text as the one printed by cli.sh
+
+parsed automata and outputs of operations are kept in a LRU cache keyed by file path and
+modification time, so a changed file is parsed again and results computed from its old version are never used,
+automata derived from an input by an operation (e.g. its determinized version) are cached too
+and given to later commands on the same file, e.g. minimize after determinize does not determinize again
+
+usage:
+    python3 server.py start [--socket path] [--capacity entries]
+    python3 server.py stdio [--capacity entries]
+    python3 server.py stop [--socket path]
+    python3 server.py client command file1 [file2]
+"""
+from __future__ import print_function
+import argparse
+import io
+import json
+import os
+import pickle
+import socket
+import sys
+import tempfile
+from collections import OrderedDict
+from contextlib import redirect_stdout
+
+# client exits with this code if no server is running, cli.sh then runs the command itself,
+# it differs from 2 used by argparse for usage errors
+NO_SERVER = 3
+
+# attributes in which operations store results derived from their input automaton and reuse them
+DERIVED_ATTRIBUTES = ("determinized", "epsilon_free", "reversed", "language_hash")
+
+
+def get_socket_path():
+    """
+    Returns path of the server socket, SYMBOLICLIB_SOCKET overrides the default one
+    :return: path
+    """
+    default = os.path.join(tempfile.gettempdir(), "symboliclib-" + str(os.getuid()) + ".sock")
+    return os.environ.get("SYMBOLICLIB_SOCKET", default)
+
+
+def get_file_key(filename):
+    """
+    Returns cache key of a file, it changes whenever the file is modified
+    :param filename: name of the file
+    :return: tuple (absolute path, modification time, size)
+    """
+    path = os.path.abspath(filename)
+    info = os.stat(path)
+    return path, info.st_mtime_ns, info.st_size
+
+
+class AutomatonCache:
+    """
+    LRU cache of parsed automata and outputs of operations
+
+    Attributes:
+        capacity    maximal number of entries
+        entries     ordered dictionary key -> value, the least recently used entry is the first one
+        hits        number of requests answered from the cache
+        misses      number of requests which had to be computed
+    """
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns cached value and marks it as recently used
+        :param key: key of the entry
+        :return: value or None
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        """
+        Stores value, evicts the least recently used entries over capacity
+        :param key: key of the entry
+        :param value: value to store
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get_automaton(self, filename):
+        """
+        Returns a fresh copy of parsed automaton from the file
+        operations may change their inputs, so the cache keeps the automaton pickled
+        and every request gets its own copy, which is still faster than parsing,
+        cached derived automata are restored into the copy
+        :param filename: name of the file
+        :return: automaton
+        """
+        file_key = get_file_key(filename)
+        data = self.get(("parse", file_key))
+        if data is None:
+            from symbolic_parser import parse
+            data = pickle.dumps(parse(filename), pickle.HIGHEST_PROTOCOL)
+            self.put(("parse", file_key), data)
+        automaton = pickle.loads(data)
+        for attribute in DERIVED_ATTRIBUTES:
+            derived = self.get(("derived", attribute, file_key))
+            if derived is not None:
+                setattr(automaton, attribute, pickle.loads(derived))
+        return automaton
+
+    def put_derived(self, filename, automaton):
+        """
+        Stores results derived from an input automaton by an operation
+        :param filename: name of the file of the automaton
+        :param automaton: input automaton after the operation
+        """
+        file_key = get_file_key(filename)
+        for attribute in DERIVED_ATTRIBUTES:
+            derived = getattr(automaton, attribute, None)
+            # False and None mean that nothing was derived
+            if derived is not None and derived is not False and ("derived", attribute, file_key) not in self.entries:
+                self.put(("derived", attribute, file_key), pickle.dumps(derived, pickle.HIGHEST_PROTOCOL))
+
+    def run(self, command, files):
+        """
+        Runs command of cli.sh, returns cached output if the files did not change
+        :param command: name of the command
+        :param files: list of input files
+        :return: printed output of the command
+        """
+        # imported here, so that the client does not have to load the library
+        from batch import UNARY, BINARY
+
+        if command not in UNARY and command not in BINARY:
+            raise ValueError("Unknown command.")
+        if command in BINARY and len(files) < 2:
+            raise ValueError("Another argument needed.")
+
+        key = (command,) + tuple(get_file_key(filename) for filename in files)
+        output = self.get(key)
+        if output is None:
+            stream = io.StringIO()
+            try:
+                with redirect_stdout(stream):
+                    automata = [self.get_automaton(filename) for filename in files]
+                    if command in UNARY:
+                        result = UNARY[command](automata[0])
+                    else:
+                        result = BINARY[command](automata[0], automata[1])
+                    if hasattr(result, "print_automaton"):
+                        result.print_automaton()
+                    else:
+                        print(result)
+            except SystemExit:
+                # the parser exits on invalid input, the server keeps running
+                raise ValueError(stream.getvalue().strip() or "Invalid input.")
+            output = stream.getvalue()
+            self.put(key, output)
+            for filename, automaton in zip(files, automata):
+                self.put_derived(filename, automaton)
+
+        return output
+
+
+def get_command(line):
+    """
+    Reads the command of a JSON request
+    :param line: JSON line with the request
+    :return: name of the command, None if the line is not a valid request
+    """
+    try:
+        request = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(request, dict):
+        return None
+    return request.get("command")
+
+
+def handle_request(cache, line):
+    """
+    Handles one JSON request
+    :param cache: cache of the server
+    :param line: JSON line with the request
+    :return: JSON serializable response
+    """
+    try:
+        request = json.loads(line)
+        command = request.get("command")
+        if command == "stats":
+            output = json.dumps({"entries": len(cache.entries), "hits": cache.hits, "misses": cache.misses}) + "\n"
+        else:
+            output = cache.run(command, request.get("files", []))
+        return {"status": "ok", "output": output}
+    except Exception as error:
+        return {"status": "error", "error": str(error) or repr(error)}
+
+
+def serve(path, capacity=128):
+    """
+    Serves requests on a unix socket until a stop request comes
+    :param path: path of the socket
+    :param capacity: capacity of the cache
+    """
+    cache = AutomatonCache(capacity)
+    if os.path.exists(path):
+        os.remove(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+    running = True
+    try:
+        while running:
+            connection = server.accept()[0]
+            try:
+                with connection, connection.makefile('rw') as stream:
+                    for line in stream:
+                        if get_command(line) == "stop":
+                            stream.write(json.dumps({"status": "ok", "output": ""}) + "\n")
+                            running = False
+                            break
+                        stream.write(json.dumps(handle_request(cache, line)) + "\n")
+                        stream.flush()
+            except (IOError, OSError):
+                # client went away, the server keeps running
+                pass
+    finally:
+        server.close()
+        os.remove(path)
+
+
+def serve_stdio(capacity=128):
+    """
+    Serves requests from standard input, responses go to standard output
+    :param capacity: capacity of the cache
+    """
+    cache = AutomatonCache(capacity)
+    for line in sys.stdin:
+        if line.strip():
+            sys.stdout.write(json.dumps(handle_request(cache, line)) + "\n")
+            sys.stdout.flush()
+
+
+def request(path, command, files=None):
+    """
+    Sends one request to the server
+    :param path: path of the socket
+    :param command: name of the command
+    :param files: list of input files
+    :return: response dictionary
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    with client, client.makefile('rw') as stream:
+        # the server may run in another directory
+        files = [os.path.abspath(filename) for filename in files or []]
+        stream.write(json.dumps({"command": command, "files": files}) + "\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keeps automata in memory between command line calls.")
+    parser.add_argument("action", choices=["start", "stdio", "stop", "client"])
+    parser.add_argument("arguments", nargs="*", help="command and input files of the client")
+    parser.add_argument("--socket", default=get_socket_path(), help="path of the unix socket")
+    parser.add_argument("--capacity", type=int, default=128, help="maximal number of cached entries")
+    args = parser.parse_args()
+
+    if args.action == "start":
+        serve(args.socket, args.capacity)
+    elif args.action == "stdio":
+        serve_stdio(args.capacity)
+    else:
+        if args.action == "stop":
+            args.arguments = ["stop"]
+        if not args.arguments:
+            parser.error("client needs a command")
+        try:
+            response = request(args.socket, args.arguments[0], args.arguments[1:])
+        except (IOError, OSError):
+            print("Server is not running.", file=sys.stderr)
+            exit(NO_SERVER)
+        if response["status"] != "ok":
+            print(response["error"])
+            exit(-1)
+        sys.stdout.write(response["output"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,498 @@
+"""
+Solver predicates class
+
+middle layer between symboliclib and a satisfiability solver:
+predicates keep a formula of the solver and forward all operations to it,
+results of satisfiability queries are cached by canonical formula text
+
+available solvers:
+    python  pure Python solver of guards over one integer variable, formulas are unions of intervals
+    z3      Z3 SMT solver over one integer variable x, used only if module z3 is installed
+"""
+import abc
+import json
+import os
+import stats
+from predicate_interface import PredicateInterface
+
+try:
+    import z3
+except ImportError:
+    z3 = None
+
+
+class SolverInterface(object):
+    """
+    Interface every solver plugged into symboliclib must implement
+    formulas are opaque objects of the solver, symboliclib works with them only through this interface
+    """
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def parse(self, text):
+        """
+        Creates formula from its text representation
+        :param text: formula text
+        :return: formula
+        """
+        return
+
+    @abc.abstractmethod
+    def to_text(self, formula):
+        """
+        Returns canonical text of the formula, equivalent formulas should have the same text
+        :param formula: formula
+        :return: string
+        """
+        return
+
+    @abc.abstractmethod
+    def universal(self):
+        """
+        Creates formula satisfied by every symbol
+        :return: formula
+        """
+        return
+
+    @abc.abstractmethod
+    def negation(self, formula):
+        """
+        Formula negation
+        :param formula: formula
+        :return: negated formula
+        """
+        return
+
+    @abc.abstractmethod
+    def conjunction(self, formula, formula2):
+        """
+        Formula conjunction
+        :param formula: first formula
+        :param formula2: second formula
+        :return: conjunction of formulas
+        """
+        return
+
+    @abc.abstractmethod
+    def disjunction(self, formula, formula2):
+        """
+        Formula disjunction
+        :param formula: first formula
+        :param formula2: second formula
+        :return: disjunction of formulas
+        """
+        return
+
+    @abc.abstractmethod
+    def check(self, formula):
+        """
+        Checks whether the formula is satisfiable
+        :param formula: formula
+        :return: bool
+        """
+        return
+
+    def check_batch(self, formulas):
+        """
+        Checks satisfiability of more formulas
+        solvers supporting incremental solving should override it, e.g. by checking under assumptions
+        :param formulas: list of formulas
+        :return: list of bools
+        """
+        return [self.check(formula) for formula in formulas]
+
+    @abc.abstractmethod
+    def has_letter(self, formula, symbol):
+        """
+        Checks whether the given symbol satisfies the formula
+        :param formula: formula
+        :param symbol: checked symbol
+        :return: bool
+        """
+        return
+
+
+class PythonSolver(SolverInterface):
+    """
+    Pure Python solver of guards over one integer variable
+    formula is a sorted tuple of disjoint inclusive intervals (low, high), None stands for infinity,
+    text of a formula is e.g. [-inf,0]|[5,7]|[10,inf], true or false
+    """
+
+    def parse(self, text):
+        text = text.replace(" ", "")
+        if text == "true":
+            return self.universal()
+        if text == "false" or text == "":
+            return ()
+        intervals = []
+        for part in text.split("|"):
+            low, high = part.strip("[]").split(",")
+            intervals.append((self.parse_bound(low), self.parse_bound(high)))
+        return self.normalize(intervals)
+
+    @staticmethod
+    def parse_bound(bound):
+        """
+        Parses interval bound, -inf and inf are parsed as None
+        :param bound: bound text
+        :return: int or None
+        """
+        if bound in ("inf", "-inf", "+inf"):
+            return None
+        return int(bound)
+
+    def to_text(self, formula):
+        if not formula:
+            return "false"
+        if formula == self.universal():
+            return "true"
+        parts = []
+        for low, high in formula:
+            parts.append("[" + ("-inf" if low is None else str(low)) + "," + ("inf" if high is None else str(high)) + "]")
+        return "|".join(parts)
+
+    def universal(self):
+        return ((None, None),)
+
+    @staticmethod
+    def normalize(intervals):
+        """
+        Sorts intervals, removes empty ones and joins the overlapping or adjacent ones
+        :param intervals: list of intervals
+        :return: formula
+        """
+        intervals = [(low, high) for low, high in intervals if low is None or high is None or low <= high]
+        intervals.sort(key=lambda interval: float("-inf") if interval[0] is None else interval[0])
+
+        result = []
+        for low, high in intervals:
+            if result:
+                last_low, last_high = result[-1]
+                if last_high is None or low is None or low <= last_high + 1:
+                    if last_high is not None and (high is None or high > last_high):
+                        result[-1] = (last_low, high)
+                    continue
+            result.append((low, high))
+
+        return tuple(result)
+
+    def negation(self, formula):
+        result = []
+        # low bound of the gap before the next interval
+        low = None
+        for interval_low, interval_high in formula:
+            if interval_low is not None:
+                result.append((low, interval_low - 1))
+            if interval_high is None:
+                return self.normalize(result)
+            low = interval_high + 1
+        result.append((low, None))
+        return self.normalize(result)
+
+    def conjunction(self, formula, formula2):
+        result = []
+        for low, high in formula:
+            for low2, high2 in formula2:
+                new_low = low2 if low is None else low if low2 is None else max(low, low2)
+                new_high = high2 if high is None else high if high2 is None else min(high, high2)
+                result.append((new_low, new_high))
+        return self.normalize(result)
+
+    def disjunction(self, formula, formula2):
+        return self.normalize(list(formula) + list(formula2))
+
+    def check(self, formula):
+        return len(formula) > 0
+
+    def has_letter(self, formula, symbol):
+        try:
+            value = int(symbol)
+        except ValueError:
+            return False
+        for low, high in formula:
+            if (low is None or low <= value) and (high is None or value <= high):
+                return True
+        return False
+
+
+class Z3Solver(SolverInterface):
+    """
+    Z3 SMT solver over one integer variable x
+    formula text is an SMT-LIB term, e.g. (and (>= x 0) (< x 5))
+    """
+
+    def __init__(self):
+        if z3 is None:
+            raise ImportError("Z3 solver requires module z3 (pip install z3-solver).")
+        self.variable = z3.Int("x")
+        self.solver = z3.Solver()
+
+    def parse(self, text):
+        return z3.parse_smt2_string("(declare-const x Int) (assert " + text + ")")[0]
+
+    def to_text(self, formula):
+        return z3.simplify(formula).sexpr()
+
+    def universal(self):
+        return z3.BoolVal(True)
+
+    def negation(self, formula):
+        return z3.Not(formula)
+
+    def conjunction(self, formula, formula2):
+        return z3.And(formula, formula2)
+
+    def disjunction(self, formula, formula2):
+        return z3.Or(formula, formula2)
+
+    def check(self, formula):
+        self.solver.push()
+        self.solver.add(formula)
+        result = self.solver.check() == z3.sat
+        self.solver.pop()
+        return result
+
+    def check_batch(self, formulas):
+        # every formula is asserted once behind its own literal, queries differ only in the assumed literal,
+        # so lemmas learned by one query are kept for the following ones
+        self.solver.push()
+        literals = []
+        for index, formula in enumerate(formulas):
+            literal = z3.Bool("batch_" + str(index))
+            self.solver.add(z3.Implies(literal, formula))
+            literals.append(literal)
+        result = [self.solver.check(literal) == z3.sat for literal in literals]
+        self.solver.pop()
+        return result
+
+    def has_letter(self, formula, symbol):
+        try:
+            value = int(symbol)
+        except ValueError:
+            return False
+        return z3.is_true(z3.simplify(z3.substitute(formula, (self.variable, z3.IntVal(value)))))
+
+
+class SolverBridge(object):
+    """
+    Forwards queries of solver predicates to the solver and caches satisfiability results
+
+    Attributes:
+        solver      solver implementing SolverInterface
+        cache       dictionary canonical formula text -> satisfiability
+        filename    file the cache is loaded from and saved to, None for cache kept in memory only
+    """
+
+    def __init__(self, solver, filename=None):
+        self.solver = solver
+        self.cache = {}
+        self.filename = filename
+        if filename is not None and os.path.exists(filename):
+            self.load_cache(filename)
+
+    def is_satisfiable(self, text, formula):
+        """
+        Checks satisfiability of a formula, asks solver only if the result is not cached
+        :param text: canonical text of the formula
+        :param formula: formula
+        :return: bool
+        """
+        if text not in self.cache:
+            self.cache[text] = self.solver.check(formula)
+            if stats.get_active() is not None:
+                stats.get_active().count("solver_calls")
+                stats.get_active().count("solver_queries")
+        elif stats.get_active() is not None:
+            stats.get_active().count("solver_cache_hits")
+        return self.cache[text]
+
+    def is_satisfiable_batch(self, predicates):
+        """
+        Checks satisfiability of more predicates, all uncached formulas are sent to solver at once
+        :param predicates: list of solver predicates
+        :return: list of bools
+        """
+        missing = {}
+        for predicate in predicates:
+            if predicate.text not in self.cache and predicate.text not in missing:
+                missing[predicate.text] = predicate.formula
+        if missing:
+            results = self.solver.check_batch(list(missing.values()))
+            for text, result in zip(missing, results):
+                self.cache[text] = result
+        statistics = stats.get_active()
+        if statistics is not None:
+            if missing:
+                statistics.count("solver_calls")
+            statistics.count("solver_queries", len(missing))
+            statistics.count("solver_cache_hits", len(predicates) - len(missing))
+
+        return [self.cache[predicate.text] for predicate in predicates]
+
+    def load_cache(self, filename=None):
+        """
+        Loads satisfiability results from a file
+        :param filename: cache file, filename attribute is used if not given
+        """
+        with open(filename or self.filename) as the_file:
+            self.cache.update(json.load(the_file))
+
+    def save_cache(self, filename=None):
+        """
+        Saves satisfiability results into a file
+        :param filename: cache file, filename attribute is used if not given
+        """
+        with open(filename or self.filename, 'w') as the_file:
+            json.dump(self.cache, the_file)
+
+
+# solver used by predicates created without explicit bridge, python or z3
+default_solver = "python"
+# file of persistent satisfiability cache used by default, None keeps the cache in memory only
+default_cache_file = None
+bridges = {}
+
+
+def get_bridge(solver_name=None, filename=None):
+    """
+    Returns shared bridge to a solver, creates it on first use
+    :param solver_name: python or z3, default_solver if not given
+    :param filename: file of persistent satisfiability cache, default_cache_file if not given
+    :return: SolverBridge object
+    """
+    solver_name = solver_name or default_solver
+    filename = filename or default_cache_file
+    key = (solver_name, filename)
+    if key not in bridges:
+        if solver_name == "z3":
+            solver = Z3Solver()
+        else:
+            solver = PythonSolver()
+        bridges[key] = SolverBridge(solver, filename)
+    return bridges[key]
+
+
+class SolverPredicate(PredicateInterface):
+    """
+    Solver predicates class
+
+    Attributes:
+        formula     formula of the solver
+        text        canonical text of the formula, used for hashing, comparison and caching
+        bridge      bridge to the solver
+        is_epsilon  flag whether the predicate represents epsilon
+    """
+
+    def __init__(self, formula=None, bridge=None):
+        self.bridge = bridge or get_bridge()
+        if formula is None:
+            formula = self.bridge.solver.universal()
+        self.formula = formula
+        self.text = self.bridge.solver.to_text(formula)
+        self.is_epsilon = False
+
+    def __getstate__(self):
+        # solvers hold native objects, only the formula text and solver name are pickled
+        return {"text": self.text, "solver": "z3" if isinstance(self.bridge.solver, Z3Solver) else "python",
+                "filename": self.bridge.filename}
+
+    def __setstate__(self, state):
+        self.bridge = get_bridge(state["solver"], state["filename"])
+        self.formula = self.bridge.solver.parse(state["text"])
+        self.text = state["text"]
+        self.is_epsilon = False
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return self.text
+
+    def __eq__(self, other):
+        return isinstance(other, SolverPredicate) and self.text == other.text
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __lt__(self, other):
+        return str(self) < str(other)
+
+    @abc.abstractmethod
+    def negation(self):
+        """
+        Predicate negation
+        :return: negation of given predicate
+        """
+        return SolverPredicate(self.bridge.solver.negation(self.formula), self.bridge)
+
+    @abc.abstractmethod
+    def conjunction(self, predicate):
+        """
+        Predicate conjunction
+        :param predicate: second predicate
+        :return: conjunction of two predicates
+        """
+        return SolverPredicate(self.bridge.solver.conjunction(self.formula, predicate.formula), self.bridge)
+
+    @abc.abstractmethod
+    def disjunction(self, predicate):
+        """
+        Predicate disjunction
+        :param predicate: second predicate
+        :return: disjunction of two predicates
+        """
+        return SolverPredicate(self.bridge.solver.disjunction(self.formula, predicate.formula), self.bridge)
+
+    @abc.abstractmethod
+    def is_equal(self, predicate):
+        """
+        Checks whether the given predicates are equal
+        :param predicate: second predicate
+        :return: bool
+        """
+        if self.text == predicate.text:
+            return True
+        return self.is_subset(predicate) and predicate.is_subset(self)
+
+    @abc.abstractmethod
+    def is_satisfiable(self):
+        """
+        Checks whether the given predicate is satisfiable
+        :return: bool
+        """
+        return self.bridge.is_satisfiable(self.text, self.formula)
+
+    def is_satisfiable_batch(self, predicates):
+        """
+        Checks satisfiability of more predicates by one batch query of the solver
+        :param predicates: list of predicates
+        :return: list of bools
+        """
+        return self.bridge.is_satisfiable_batch(predicates)
+
+    @abc.abstractmethod
+    def is_subset(self, predicate):
+        """
+        Checks whether the given predicate represent a subset of the second one
+        :param predicate: second predicate
+        :return: bool
+        """
+        return not self.conjunction(predicate.negation()).is_satisfiable()
+
+    @abc.abstractmethod
+    def get_universal(self):
+        """
+        Creates a predicate representing the whole alphabet
+        :return: predicate object
+        """
+        return SolverPredicate(self.bridge.solver.universal(), self.bridge)
+
+    @abc.abstractmethod
+    def has_letter(self, symbol):
+        """
+        Checks whether the given symbol belongs to the predicate
+        :param symbol: checked symbol
+        :return: bool
+        """
+        return self.bridge.solver.has_letter(self.formula, symbol)
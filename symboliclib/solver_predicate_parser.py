@@ -0,0 +1,15 @@
+"""
+Parser of solver predicates
+"""
+from solver_predicate import SolverPredicate, get_bridge
+
+
+def parsePredicate(pred, automaton_type=""):
+    """
+    Parses one predicate string in the syntax of the default solver
+    :param pred: predicate to parse
+    :param automaton_type: compatibility with transducer parser
+    :return: predicate object
+    """
+    bridge = get_bridge()
+    return SolverPredicate(bridge.solver.parse(pred), bridge)
@@ -7,8 +7,11 @@ Copyright (c) 2017  Michaela Bielikova <xbieli06@stud.fit.vutbr.cz>
 """
 from __future__ import print_function
 
+from image import LazyImage
 from symbolic import Symbolic
-import itertools
+from transducer_predicate import TransPred
+from translator import Translator
+import stats
 
 
 class ST(Symbolic):
@@ -32,6 +35,8 @@ class ST(Symbolic):
         -- attributes used for optimisation:
         reversed        reversed version of transducer
         epsilon_free    epsilon free version of transducer
+        translator      translator of words sharing moves of the transducer
+        inverse         inverse transducer used for pre-images
 
     """
     def __init__(self):
@@ -48,6 +53,10 @@ class ST(Symbolic):
         self.is_epsilon_free = None
         self.epsilon_free = None
         self.label = None
+        # translator of words with precomputed moves, created by get_translator
+        self.translator = None
+        # inverse transducer, created by get_inverse
+        self.inverse = None
 
     def is_deterministic(self):
         """
@@ -61,6 +70,10 @@ class ST(Symbolic):
             # the deterministic attribute is already set, no need to check again
             return self.deterministic
         for trans_group in self.transitions:
+            if any(trans_label.has_epsilon() for trans_label in self.transitions[trans_group]):
+                # epsilon moves can be made without reading a symbol
+                self.deterministic = False
+                return False
             for trans_label in self.transitions[trans_group]:
                 if len(self.transitions[trans_group][trans_label]) > 1:
                     # possible to pass through one label to multiple states
@@ -71,7 +84,7 @@ class ST(Symbolic):
                     self.deterministic = False
                     return False
                 for trans_label2 in self.transitions[trans_group]:
-                    if trans_label != trans_label2:
+                    if trans_label != trans_label2 and not trans_label2.input.is_epsilon:
                         # test conjunction of each pair of labels
                         con = trans_label.input.conjunction(trans_label2.input)
                         if con.is_satisfiable():
@@ -83,183 +96,556 @@ class ST(Symbolic):
         self.deterministic = True
         return True
 
-    def composition(self, other):
+    def check_epsilon_free(self):
+        """
+        Checks whether no label of the transducer reads or writes epsilon
+        sets the is_epsilon_free attribute
+        :return: bool
+        """
+        if self.is_epsilon_free is None:
+            self.is_epsilon_free = not any(label.has_epsilon()
+                                           for state in self.transitions for label in self.transitions[state])
+        return self.is_epsilon_free
+
+    def composition(self, other, trim=True):
         """
-        Performs composition of two transducers
+        Performs composition of two transducers, self is applied first
+        explores pairs of states reachable from pairs of initial states and removes useless pairs in place,
+        a pair is final if both states are final,
+        transducers with epsilon transitions are composed by get_epsilon_composition
         :param other: the second automaton
-        :return: transducer created by composition
+        :param trim: skip pairs containing a state that does not lead to a final state of its transducer
+                     and stop immediately if some transducer translates no word
+        :return: transducer created by composition, False if types of transducers differ
         """
         if self.automaton_type != other.automaton_type:
             return False
 
-        comp = self.get_new()
+        if self.check_epsilon_free() and other.check_epsilon_free():
+            comp = self.get_tuple_product([self, other], self.get_composition_labels([self, other]), trim)
+        else:
+            comp = self.get_epsilon_composition(other, trim)
+        comp.automaton_type = self.automaton_type
         comp.alphabet = self.alphabet.intersection(other.alphabet)
-        comp.reversed = None
 
-        queue = list(itertools.product(self.start, other.start))
-        comp.start = set()
-        for q in queue:
-            comp.start.add("[" + q[0] + "_1|" + q[1] + "_2]")
-
-        while len(queue) > 0:
-            combined = queue.pop()
-            state1 = combined[0]
-            state2 = combined[1]
-            combined_str = "[" + state1 + "_1|" + state2 + "_2]"
+        return comp.trim()
 
-            if combined_str not in comp.transitions:
-                comp.transitions[combined_str] = {}
+    def composition_many(self, others, trim=True):
+        """
+        Performs composition of a chain of transducers, self is applied first
+        transducers are composed from the left, every intermediate transducer is trimmed before the next step
+        :param others: list of other transducers in the order of application
+        :param trim: skip pairs containing a state that does not lead to a final state of its transducer
+        :return: transducer created by composition, False if types of transducers differ
+        """
+        comp = self
+        for other in others:
+            comp = comp.composition(other, trim)
+            if comp is False:
+                return False
 
-            if combined_str not in comp.states:
-                comp.states.add(combined_str)
+        return comp
 
-            if state1 in self.final or state2 in other.final:
+    def get_epsilon_composition(self, other, trim=True):
+        """
+        Performs composition of two transducers with epsilon transitions, self is applied first
+        a move of self writing epsilon or a move of other reading epsilon is made alone while the other transducer
+        waits, moves made alone between two common moves are independent, so only the interleaving with moves
+        of self before moves of other is explored: a flag in every product state is set by a move of other alone
+        and blocks moves of self alone until the next common move
+        :param other: the second transducer
+        :param trim: skip pairs containing a state that does not lead to a final state of its transducer
+        :return: transducer created by composition without reduction
+        """
+        comp = self.get_new()
+        comp.reversed = None
+        comp.label = self.label
+
+        numbers = self.number_states()[0]
+        numbers2 = other.number_states()[0]
+        width = len(numbers2)
+        useful = None
+        useful2 = None
+        if trim:
+            useful = self.get_useful_states()
+            useful2 = other.get_useful_states()
+            if not useful.intersection(self.start) or not useful2.intersection(other.start):
+                return comp
+
+        # encoded triple -> name of product state
+        visited = {}
+        queue = []
+
+        def reach(state, state2, blocked):
+            if useful is not None and (state not in useful or state2 not in useful2):
+                return None
+            key = (numbers[state] * width + numbers2[state2]) * 2 + blocked
+            if key not in visited:
+                name = "[" + state + "_1|" + state2 + "_2]"
+                if blocked:
+                    name = "[" + state + "_1|" + state2 + "_2|e]"
+                visited[key] = name
+                queue.append((state, state2, blocked, name))
+            return visited[key]
+
+        for state in self.start:
+            for state2 in other.start:
+                name = reach(state, state2, 0)
+                if name is not None:
+                    comp.start.add(name)
+
+        combine_labels = self.get_composition_labels([self, other])
+        statistics = stats.get_active()
+        while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
+            state, state2, blocked, combined_str = queue.pop()
+            comp.states.add(combined_str)
+            comp_transitions = {}
+            comp.transitions[combined_str] = comp_transitions
+            if state in self.final and state2 in other.final:
                 comp.final.add(combined_str)
 
-            if state1 in self.transitions and state2 in other.transitions:
-                for label in self.transitions[state1]:
-                    for label2 in other.transitions[state2]:
-                        common = label.output.conjunction(label2.input)
-                        if common and common.is_satisfiable():
-                            new_label = label.combine(label2)
-                            if new_label and new_label.is_satisfiable():
-                                for end in self.transitions[state1][label]:
-                                    for end2 in other.transitions[state2][label2]:
-                                        endstate = (end, end2)
-                                        endstate_str = "[" + endstate[0] + "_1|" + endstate[1] + "_2]"
-
-                                        if new_label not in comp.transitions[combined_str]:
-                                            comp.transitions[combined_str][new_label] = [endstate_str]
-                                        else:
-                                            comp.transitions[combined_str][new_label].append(endstate_str)
-
-                                        if endstate not in queue and endstate_str not in comp.states:
-                                            queue.append(endstate)
-
-        comp = comp.simple_reduce()
+            moves = []
+            if state in self.transitions and state2 in other.transitions:
+                for label, endstates in combine_labels((state, state2)):
+                    moves.extend((label, end, end2, 0) for end in endstates[0] for end2 in endstates[1])
+            if not blocked:
+                for label, endstates in self.transitions.get(state, {}).items():
+                    if label.output.is_epsilon:
+                        moves.extend((label, end, state2, 0) for end in endstates)
+            for label, endstates in other.transitions.get(state2, {}).items():
+                if label.input.is_epsilon:
+                    moves.extend((label, state, end2, 1) for end2 in endstates)
+
+            for label, end, end2, end_blocked in moves:
+                name = reach(end, end2, end_blocked)
+                if name is None:
+                    continue
+                if label not in comp_transitions:
+                    comp_transitions[label] = [name]
+                elif name not in comp_transitions[label]:
+                    comp_transitions[label].append(name)
+            if statistics is not None:
+                statistics.count("transitions_generated", sum(len(ends) for ends in comp_transitions.values()))
 
         return comp
 
+    def get_composition_labels(self, transducers):
+        """
+        Creates function composing labels of states of a chain of transducers
+        guards are indexed by minterms of all input and output guards, a label is composed only with labels
+        whose input guard shares a minterm with its output guard, composed labels are cached
+        if guards do not support minterms, every pair of labels is tried,
+        labels writing epsilon are never composed with labels reading epsilon, see get_epsilon_composition
+        :param transducers: list of transducers in the order of application
+        :return: function (tuple of states) -> list of (composed label, list of endstates for every transducer)
+        """
+        guards = set()
+        for transducer in transducers:
+            for state in transducer.transitions:
+                for label in transducer.transitions[state]:
+                    guards.add(label.input)
+                    guards.add(label.output)
+        minterms = self.get_minterms(guards)
+
+        if minterms is None:
+            def combine_labels(states):
+                combined = [(label, [transducers[0].transitions[states[0]][label]])
+                            for label in transducers[0].transitions[states[0]]]
+                for transducer, state in zip(transducers[1:], states[1:]):
+                    extended = []
+                    for label, endstates in combined:
+                        for label2 in transducer.transitions[state]:
+                            if label.output.is_epsilon or label2.input.is_epsilon:
+                                continue
+                            common = label.output.conjunction(label2.input)
+                            if common and common.is_satisfiable():
+                                new_label = label.combine(label2)
+                                if new_label and new_label.is_satisfiable():
+                                    extended.append((new_label, endstates + [transducer.transitions[state][label2]]))
+                    combined = extended
+                return combined
+
+            return combine_labels
+
+        # indices of minterms covered by every guard
+        covered = {}
+        for guard in guards:
+            if not guard.is_epsilon:
+                covered[guard] = frozenset(i for i, minterm in enumerate(minterms)
+                                           if minterm.conjunction(guard).is_satisfiable())
+
+        # labels of every state of every transducer but the first one indexed by minterms of input guards
+        indexes = [None]
+        for transducer in transducers[1:]:
+            index = {}
+            for state in transducer.transitions:
+                index[state] = {}
+                for label in transducer.transitions[state]:
+                    for i in covered.get(label.input, []):
+                        if i in index[state]:
+                            index[state][i].append(label)
+                        else:
+                            index[state][i] = [label]
+            indexes.append(index)
+
+        # (label, label2) -> (composed label, minterms of its output guard), None if it is not satisfiable
+        composed = {}
+
+        def compose(label, minterms, label2):
+            key = (label, label2)
+            if key not in composed:
+                composed[key] = None
+                new_label = label.combine(label2)
+                if new_label and new_label.is_satisfiable():
+                    if label2.identity:
+                        composed[key] = (new_label, minterms.intersection(covered.get(label2.input, ())))
+                    else:
+                        composed[key] = (new_label, covered.get(label2.output, frozenset()))
+            return composed[key]
+
+        def combine_labels(states):
+            first = transducers[0].transitions[states[0]]
+            combined = [(label, covered.get(label.output, frozenset()), [first[label]]) for label in first]
+            for transducer, index, state in zip(transducers[1:], indexes[1:], states[1:]):
+                by_minterm = index[state]
+                extended = []
+                for label, minterms, endstates in combined:
+                    paired = set()
+                    for i in minterms:
+                        for label2 in by_minterm.get(i, []):
+                            if label2 in paired:
+                                continue
+                            paired.add(label2)
+                            result = compose(label, minterms, label2)
+                            if result is not None:
+                                extended.append((result[0], result[1], endstates + [transducer.transitions[state][label2]]))
+                combined = extended
+            return [(label, endstates) for label, _, endstates in combined]
+
+        return combine_labels
+
     def run_on_nfa(self, nfa):
         """
         Applies transducer on given automaton
         :param nfa: finite automaton
-        :return: finite automaton created by application of trnasucer
+        :return: finite automaton accepting the image of its language, False if the alphabets are disjoint
         """
         if not self.alphabet.intersection(nfa.alphabet):
             return False
 
-        new_nfa = nfa.get_new()
-        new_nfa.alphabet = self.alphabet
-        new_nfa.reversed = None
+        return self.image(nfa).get_automaton()
+
+    def image(self, nfa):
+        """
+        Creates the image of the language of given automaton, explored lazily
+        queries like is_empty or accepts expand only the part of the product they need
+        :param nfa: finite automaton
+        :return: LazyImage
+        """
+        return LazyImage(self, nfa)
 
-        queue = list(itertools.product(self.start, nfa.start))
-        new_nfa.start = set()
-        for q in queue:
-            new_nfa.start.add("[" + q[0] + "_1|" + q[1] + "_2]")
+    def pre_image(self, nfa):
+        """
+        Creates the pre-image of the language of given automaton, words translated into it, explored lazily
+        :param nfa: finite automaton
+        :return: LazyImage of the inverse transducer
+        """
+        return LazyImage(self.get_inverse(), nfa)
 
-        while len(queue) > 0:
-            combined = queue.pop()
-            state1 = combined[0]
-            state2 = combined[1]
-            combined_str = "[" + state1 + "_1|" + state2 + "_2]"
-
-            if combined_str not in new_nfa.transitions:
-                new_nfa.transitions[combined_str] = {}
-
-            if combined_str not in new_nfa.states:
-                new_nfa.states.add(combined_str)
-
-            if state1 in self.final and state2 in nfa.final:
-                new_nfa.final.add(combined_str)
-            if state1 in self.transitions and state2 in nfa.transitions:
-                for label in self.transitions[state1]:
-                    for label2 in nfa.transitions[state2]:
-                        common = label.input.conjunction(label2)
-                        if common and common.is_satisfiable():
-                            new_label = label.output
-                            if label.identity:
-                                new_label = label.output.conjunction(label2)
-                            if new_label and new_label.is_satisfiable():
-                                for end in self.transitions[state1][label]:
-                                    for end2 in nfa.transitions[state2][label2]:
-                                        endstate = (end, end2)
-                                        endstate_str = "[" + endstate[0] + "_1|" + endstate[1] + "_2]"
-
-                                        if new_label not in new_nfa.transitions[combined_str]:
-                                            new_nfa.transitions[combined_str][new_label] = [endstate_str]
-                                        else:
-                                            new_nfa.transitions[combined_str][new_label].append(endstate_str)
-
-                                        if endstate not in queue and endstate_str not in new_nfa.states:
-                                            queue.append(endstate)
-
-        new_nfa = new_nfa.simple_reduce()
-
-        return new_nfa
+    def get_inverse(self):
+        """
+        Creates the inverse transducer translating outputs to inputs
+        the result is stored in attribute inverse
+        :return: inverse transducer
+        """
+        if self.inverse is not None:
+            return self.inverse
+
+        inverse = self.get_new()
+        inverse.alphabet = self.alphabet.copy()
+        inverse.states = self.states.copy()
+        inverse.start = self.start.copy()
+        inverse.final = self.final.copy()
+        inverse.automaton_type = self.automaton_type
+        inverse.label = self.label
+        inverse.is_epsilon_free = self.is_epsilon_free
+        for state in self.transitions:
+            inverse.transitions[state] = {}
+            for label in self.transitions[state]:
+                inverted = TransPred(label.output, label.input, label.identity)
+                if inverted in inverse.transitions[state]:
+                    for endstate in self.transitions[state][label]:
+                        if endstate not in inverse.transitions[state][inverted]:
+                            inverse.transitions[state][inverted].append(endstate)
+                else:
+                    inverse.transitions[state][inverted] = list(self.transitions[state][label])
+
+        self.inverse = inverse
+        return inverse
 
     def check_translation(self, word, word2, state=None):
         """
         Checks if word translates to word2 in the transducer
-        !! does not work with multiple initial states
+        reads both words once, keeping the set of states reachable after each position,
+        transducers with epsilon transitions are checked by check_epsilon_translation
         :param word: the input word
         :param word2: the output word
-        :param state: initial state of checking
+        :param state: initial state of checking, all initial states if not given
         :return: bool
         """
-        if len(word) == 0 and len(word2) == 0 and state in self.final:
-            return True
+        if not self.check_epsilon_free():
+            return self.check_epsilon_translation(word, word2, state)
 
         if len(word) != len(word2):
             return False
 
-        if not state:
-            state = self.start.copy().pop()
+        if state is None:
+            current = set(self.start)
+        else:
+            current = {state}
+
+        for symbol, symbol2 in zip(word, word2):
+            successors = set()
+            for actual in current:
+                if actual not in self.transitions:
+                    continue
+                for label in self.transitions[actual]:
+                    if label.translates(symbol, symbol2):
+                        successors.update(self.transitions[actual][label])
+            if not successors:
+                return False
+            current = successors
+
+        return not current.isdisjoint(self.final)
+
+    def check_epsilon_translation(self, word, word2, state=None):
+        """
+        Checks if word translates to word2 in a transducer with epsilon transitions, the words can differ in length
+        searches configurations (state, position in word, position in word2), each of them is visited once
+        :param word: the input word
+        :param word2: the output word
+        :param state: initial state of checking, all initial states if not given
+        :return: bool
+        """
+        if state is None:
+            visited = set((actual, 0, 0) for actual in self.start)
+        else:
+            visited = {(state, 0, 0)}
+        queue = list(visited)
+        while len(queue) > 0:
+            actual, position, position2 = queue.pop()
+            if position == len(word) and position2 == len(word2) and actual in self.final:
+                return True
+            for label, endstates in self.transitions.get(actual, {}).items():
+                if label.input.is_epsilon:
+                    step = 0
+                elif position < len(word) and label.input.has_letter(word[position]):
+                    step = 1
+                else:
+                    continue
+                if label.output.is_epsilon:
+                    step2 = 0
+                elif position2 < len(word2) and label.output.has_letter(word2[position2]):
+                    if label.identity and word[position] != word2[position2]:
+                        continue
+                    step2 = 1
+                else:
+                    continue
+                for end in endstates:
+                    configuration = (end, position + step, position2 + step2)
+                    if configuration not in visited:
+                        visited.add(configuration)
+                        queue.append(configuration)
+
+        return False
 
+    def get_moves(self, state, symbol, alphabet=None):
+        """
+        Finds moves of the transducer reading the symbol in the state
+        labels reading or writing epsilon are skipped, they do not translate one symbol to one symbol
+        :param state: state of the transducer
+        :param symbol: the input symbol
+        :param alphabet: sorted alphabet of the transducer, sorted self.alphabet if not given
+        :return: list of tuples (list of output symbols, list of endstates)
+        """
+        moves = []
         if state not in self.transitions:
-            return False
+            return moves
+        if alphabet is None:
+            alphabet = sorted(self.alphabet)
         for label in self.transitions[state]:
-            if label.translates(word[0], word2[0]):
-                for endstate in self.transitions[state][label]:
-                    if self.check_translation(word[1:], word2[1:], endstate):
-                        return True
+            if label.has_epsilon() or not label.input.has_letter(symbol):
+                continue
+            if label.identity:
+                outputs = [symbol]
+            else:
+                outputs = [output for output in alphabet if label.output.has_letter(output)]
+            if outputs:
+                moves.append((outputs, self.transitions[state][label]))
+        return moves
+
+    def get_translation_layers(self, word, state=None, moves=None):
+        """
+        Computes states of the transducer at every position of the word which lie on an accepting run
+        the states reachable from the initial states are found by one pass forwards,
+        the states from which a final state is reachable by one pass backwards
+        :param word: the input word
+        :param state: initial state of translation, all initial states if not given
+        :param moves: dictionary (state, symbol) -> moves shared between calls, see get_moves
+        :return: list of len(word) + 1 dictionaries state -> moves leading to states of the next layer,
+                 all of them are empty if the word has no translation
+        """
+        if moves is None:
+            moves = {}
+        # sorted only if some moves are not known yet
+        alphabet = None
+
+        if state is None:
+            reachable = [set(self.start)]
+        else:
+            reachable = [{state}]
+        for symbol in word:
+            successors = set()
+            for actual in reachable[-1]:
+                key = (actual, symbol)
+                if key not in moves:
+                    if alphabet is None:
+                        alphabet = sorted(self.alphabet)
+                    moves[key] = self.get_moves(actual, symbol, alphabet)
+                for outputs, endstates in moves[key]:
+                    successors.update(endstates)
+            reachable.append(successors)
+
+        layers = [{} for _ in reachable]
+        for actual in reachable[-1]:
+            if actual in self.final:
+                layers[-1][actual] = []
+        for position in range(len(word) - 1, -1, -1):
+            following = layers[position + 1]
+            if not following:
+                break
+            symbol = word[position]
+            for actual in reachable[position]:
+                live = []
+                for outputs, endstates in moves[(actual, symbol)]:
+                    endstates = [end for end in endstates if end in following]
+                    if endstates:
+                        live.append((outputs, endstates))
+                if live:
+                    layers[position][actual] = live
+
+        if not layers[0]:
+            return [{} for _ in layers]
+        return layers
+
+    def translate_all(self, word, state=None, moves=None):
+        """
+        Generates all translations of given word, each of them once
+        the translations are generated lazily in lexicographic order of output symbols,
+        every generated prefix of a translation is extended to a complete one
+        :param word: the input word, a string or a list of symbols
+        :param state: initial state of translation, all initial states if not given
+        :param moves: dictionary (state, symbol) -> moves shared between calls, see get_moves
+        :return: generator of output words, strings for a string input, lists of symbols otherwise
+        """
+        if not self.check_epsilon_free():
+            print("Translation of words not implemented yet for transducers with epsilon transitions")
+            return
+
+        layers = self.get_translation_layers(word, state, moves)
+        if not layers[0]:
+            return
+
+        # output prefixes are stored as linked tuples (symbol, prefix) to share them between branches
+        stack = [(0, list(layers[0]), None)]
+        while stack:
+            position, states, prefix = stack.pop()
+            if position == len(word):
+                output = []
+                while prefix is not None:
+                    output.append(prefix[0])
+                    prefix = prefix[1]
+                output.reverse()
+                if isinstance(word, str):
+                    yield "".join(output)
+                else:
+                    yield output
+                continue
+
+            successors = {}
+            for actual in states:
+                for outputs, endstates in layers[position][actual]:
+                    for output in outputs:
+                        if output not in successors:
+                            successors[output] = set()
+                        successors[output].update(endstates)
+            for output in sorted(successors, reverse=True):
+                stack.append((position + 1, successors[output], (output, prefix)))
+
+    def translate_one(self, word, state=None, moves=None):
+        """
+        Finds one translation of given word
+        :param word: the input word, a string or a list of symbols
+        :param state: initial state of translation, all initial states if not given
+        :param moves: dictionary (state, symbol) -> moves shared between calls, see get_moves
+        :return: the first translation of translate_all or False if translation not possible
+        """
+        if not self.check_epsilon_free():
+            print("Translation of words not implemented yet for transducers with epsilon transitions")
+            return None
 
+        for translation in self.translate_all(word, state, moves):
+            return translation
         return False
 
     def translate_word(self, word, state=None):
         """
-        Generates random translation of given word if possible
-        !! does not work with multiple initial states
+        Generates translation of given word if possible
         :param word: the input word
-        :param state: initial state of translation
-        :return: output word or False if translation not possible
+        :param state: initial state of translation, all initial states if not given
+        :return: output word as a string or False if translation not possible
         """
-        if len(word) == 0:
-            if state and state in self.final:
-                return "a"
-            else:
-                return False
-
-        first = False
+        translation = self.translate_one(word, state)
+        if translation is None or translation is False:
+            return translation
+        return "".join(translation)
 
-        if not state:
-            first = True
-            state = self.start.copy().pop()
+    def get_translator(self):
+        """
+        Creates translator of words with moves of the transducer computed in advance
+        the result is stored in attribute translator
+        :return: Translator
+        """
+        if self.translator is None:
+            self.translator = Translator(self)
+        return self.translator
 
-        if state not in self.transitions:
-            return False
-        for label in self.transitions[state]:
-            if label.input.has_letter(word[0]):
-                translation = label.translate(word[0], self.alphabet)
-                for endstate in self.transitions[state][label]:
-                    add = self.translate_word(word[1:], endstate)
-                    if add:
-                        if first:
-                            return (translation + add)[:-1]
-                        else:
-                            return translation + add
+    def translate_many(self, words):
+        """
+        Translates many words by the translator of the transducer
+        :param words: iterable of words
+        :return: generator of translations in the order of the words, False if translation not possible,
+                 None if the transducer has epsilon transitions
+        """
+        return self.get_translator().translate_many(words)
 
-        return False
+    def get_witness_symbol(self, label):
+        """
+        Picks one pair of symbols of the alphabet translated by the label
+        :param label: transducer label
+        :return: tuple (input symbol, output symbol), the label itself if it translates no symbols of the alphabet
+        """
+        if label.has_epsilon():
+            return label
+        for symbol in sorted(self.alphabet):
+            if label.input.has_letter(symbol):
+                translation = label.translate(symbol, sorted(self.alphabet))
+                if translation:
+                    return symbol, translation
+        return label
 
     @staticmethod
     def get_new():
@@ -0,0 +1,216 @@
+"""
+Statistics of algorithms
+
+algorithms count explored states, generated transitions, predicate operations and satisfiability checks,
+record peak sizes of antichains and frontiers and measure time of their phases,
+but only while statistics are collected, otherwise every algorithm only checks one variable,
+statistics are collected per thread, so threads running algorithms with different budgets do not interfere
+
+usage:
+    import stats
+    with stats.collect() as collected:
+        automaton.determinize()
+    print(collected.report())
+
+    # callback is called after every timed phase, e.g. to watch a long pipeline
+    with stats.collect(lambda name, seconds, collected: print(name, seconds, collected.counters)):
+        automaton.is_included_antichain(other)
+
+    # budget stops an algorithm which explores too many states or runs too long
+    try:
+        automaton.determinize(budget=stats.Budget(max_states=100000, timeout=60))
+    except stats.BudgetExceeded as error:
+        print(error.reason, error.statistics["counters"])
+"""
+from __future__ import print_function
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# attribute active holds statistics collected now by the thread, see get_active
+local = threading.local()
+
+
+def get_active():
+    """
+    Returns statistics collected now by the current thread
+    :return: Statistics or Budget, None if statistics are not collected
+    """
+    return getattr(local, "active", None)
+
+
+class Statistics(object):
+    """
+    Statistics collected while running algorithms
+
+    Attributes:
+        counters    dictionary name -> count
+        peaks       dictionary name -> maximal recorded value
+        timers      dictionary name -> total time in seconds
+        calls       dictionary name -> number of timed phases
+        callback    function (name, seconds, statistics) called after every timed phase, or None
+    """
+    def __init__(self, callback=None):
+        self.counters = {}
+        self.peaks = {}
+        self.timers = {}
+        self.calls = {}
+        self.callback = callback
+
+    def count(self, name, value=1):
+        """
+        Increases a counter
+        :param name: name of the counter
+        :param value: increment
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def peak(self, name, value):
+        """
+        Records a value, only the maximal one is kept
+        :param name: name of the peak
+        :param value: current value
+        """
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    def add_time(self, name, seconds):
+        """
+        Adds time of one phase
+        :param name: name of the phase
+        :param seconds: duration of the phase
+        """
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.callback is not None:
+            self.callback(name, seconds, self)
+
+    def report(self):
+        """
+        Returns all statistics in one dictionary
+        :return: dictionary with counters, peaks, timers and calls
+        """
+        return {"counters": dict(self.counters), "peaks": dict(self.peaks),
+                "timers": dict(self.timers), "calls": dict(self.calls)}
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised when an algorithm exceeds its budget
+
+    Attributes:
+        reason      states, transitions, deadline or cancelled
+        statistics  statistics collected until the budget was exceeded, as returned by Statistics.report
+    """
+    def __init__(self, reason, statistics):
+        super(BudgetExceeded, self).__init__("budget exceeded: " + reason)
+        self.reason = reason
+        self.statistics = statistics
+
+
+class Budget(Statistics):
+    """
+    Statistics which stop the algorithm when a limit is exceeded
+    limits are checked whenever a counter is increased, so an algorithm stops at its next explored state
+
+    Attributes:
+        max_states          maximal number of explored states, None for no limit
+        max_transitions     maximal number of generated transitions, None for no limit
+        deadline            time.time() value after which the algorithm is stopped, None for no limit
+        cancelled           threading.Event, the algorithm is stopped once it is set
+    """
+    def __init__(self, max_states=None, max_transitions=None, timeout=None, deadline=None, callback=None):
+        """
+        :param max_states: maximal number of explored states
+        :param max_transitions: maximal number of generated transitions
+        :param timeout: time limit in seconds from now
+        :param deadline: absolute time limit as time.time() value, the earlier one is used with timeout
+        :param callback: function (name, seconds, statistics) called after every timed phase
+        """
+        super(Budget, self).__init__(callback)
+        self.max_states = max_states
+        self.max_transitions = max_transitions
+        self.deadline = deadline
+        if timeout is not None:
+            limit = time.time() + timeout
+            if self.deadline is None or limit < self.deadline:
+                self.deadline = limit
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Stops the algorithm using the budget, can be called from another thread
+        """
+        self.cancelled.set()
+
+    def count(self, name, value=1):
+        """
+        Increases a counter and checks the budget
+        :param name: name of the counter
+        :param value: increment
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+        self.check()
+
+    def check(self):
+        """
+        Checks the budget
+        :raise BudgetExceeded: if some limit is exceeded or the budget was cancelled
+        """
+        if self.cancelled.is_set():
+            raise BudgetExceeded("cancelled", self.report())
+        if self.max_states is not None and self.counters.get("states_explored", 0) > self.max_states:
+            raise BudgetExceeded("states", self.report())
+        if self.max_transitions is not None and self.counters.get("transitions_generated", 0) > self.max_transitions:
+            raise BudgetExceeded("transitions", self.report())
+        if self.deadline is not None and time.time() > self.deadline:
+            raise BudgetExceeded("deadline", self.report())
+
+
+@contextmanager
+def use(statistics):
+    """
+    Collects statistics of all algorithms run by the current thread inside the block into the given object
+    :param statistics: Statistics or Budget
+    :return: the given statistics
+    """
+    previous = get_active()
+    local.active = statistics
+    try:
+        yield statistics
+    finally:
+        local.active = previous
+
+
+@contextmanager
+def collect(callback=None):
+    """
+    Collects statistics of all algorithms run inside the block
+    nested blocks collect their own statistics, the outer block does not see them
+    :param callback: function (name, seconds, statistics) called after every timed phase
+    :return: Statistics
+    """
+    with use(Statistics(callback)) as statistics:
+        yield statistics
+
+
+def timed(name):
+    """
+    Decorator measuring time of a method while statistics are collected
+    :param name: name of the phase
+    :return: decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            statistics = get_active()
+            if statistics is None:
+                return function(*args, **kwargs)
+            start = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                statistics.add_time(name, time.time() - start)
+        return wrapper
+    return decorator
@@ -6,8 +6,11 @@ used for implementation od method that are the same for automata and transducers
 Copyright (c) 2017  Michaela Bielikova <xbieli06@stud.fit.vutbr.cz>
 """
 from __future__ import print_function
+import hashlib
 import itertools
+from collections import deque
 from copy import deepcopy
+import stats
 
 
 class Symbolic(object):
@@ -32,6 +35,10 @@ class Symbolic(object):
         epsilon_free    epsilon free version of automaton
 
     """
+    # attributes caching results computed from the automaton, see clear_caches
+    cache_attributes = ("reversed", "determinized", "epsilon_free", "language_hash",
+                        "matcher", "translator", "inverse")
+
     def __init__(self):
         self.alphabet = set()
         self.states = set()
@@ -135,6 +142,58 @@ class Symbolic(object):
 
         return result
 
+    def __deepcopy__(self, memo):
+        """
+        Copies the automaton without its cached results, copies are mostly modified afterwards
+        :param memo: dictionary of objects already copied
+        :return: copy of the automaton
+        """
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        for name, value in self.__dict__.items():
+            if name not in self.cache_attributes:
+                setattr(copied, name, deepcopy(value, memo))
+        copied.clear_caches()
+        return copied
+
+    def clear_caches(self):
+        """
+        Forgets results cached by the automaton, must be called whenever the automaton is modified in place
+        """
+        for name in self.cache_attributes:
+            setattr(self, name, None)
+
+    def trim(self):
+        """
+        Removes unreachable and useless states in place, without copying the automaton as simple_reduce does
+        transitions leading to removed states are removed too
+        :return: the automaton itself
+        """
+        reachable = self.get_reachable_states()
+        for state in list(self.transitions):
+            if state not in reachable:
+                del self.transitions[state]
+        useful = self.get_useful_states()
+
+        for state in list(self.transitions):
+            if state not in useful:
+                del self.transitions[state]
+                continue
+            state_transitions = self.transitions[state]
+            for label in list(state_transitions):
+                endstates = [endstate for endstate in state_transitions[label] if endstate in useful]
+                if endstates:
+                    state_transitions[label] = endstates
+                else:
+                    del state_transitions[label]
+
+        self.start = set(state for state in self.start if state in useful)
+        self.states = set(state for state in reachable if state in useful)
+        self.final = set(state for state in self.final if state in self.states)
+        self.clear_caches()
+
+        return self
+
     def remove_useless(self):
         """
         Reduces automaton by removing useless states
@@ -143,8 +202,9 @@ class Symbolic(object):
         result = deepcopy(self)
         result = result.remove_unused_states()
 
+        useful = result.get_useful_states()
         for state in result.states:
-            if result.is_useless(state):
+            if state not in useful:
                 if state in result.start:
                     result.start.remove(state)
                 if state in result.transitions:
@@ -163,8 +223,9 @@ class Symbolic(object):
         result = deepcopy(self)
         result = result.remove_unused_states()
 
+        reachable = result.get_reachable_states()
         for state in result.states:
-            if not result.is_reachable(state):
+            if state not in reachable:
                 if state in result.transitions:
                     del result.transitions[state]
 
@@ -172,6 +233,49 @@ class Symbolic(object):
         result = result.remove_unused_states()
         return result
 
+    def get_useful_states(self):
+        """
+        Finds all states leading to a final state in one backward search
+        :return: set of useful states
+        """
+        predecessors = {}
+        for state in self.transitions:
+            for label in self.transitions[state]:
+                for endstate in self.transitions[state][label]:
+                    if endstate in predecessors:
+                        predecessors[endstate].append(state)
+                    else:
+                        predecessors[endstate] = [state]
+
+        useful = set(state for state in self.states.union(predecessors) if self.is_final(state))
+        queue = list(useful)
+        while len(queue) > 0:
+            state = queue.pop()
+            for predecessor in predecessors.get(state, []):
+                if predecessor not in useful:
+                    useful.add(predecessor)
+                    queue.append(predecessor)
+
+        return useful
+
+    def get_reachable_states(self):
+        """
+        Finds all states reachable from initial states in one forward search
+        :return: set of reachable states
+        """
+        reachable = set(self.start)
+        queue = list(reachable)
+        while len(queue) > 0:
+            state = queue.pop()
+            if state in self.transitions:
+                for label in self.transitions[state]:
+                    for endstate in self.transitions[state][label]:
+                        if endstate not in reachable:
+                            reachable.add(endstate)
+                            queue.append(endstate)
+
+        return reachable
+
     def is_useless(self, state):
         """
         Checks whether a state is useless - doesnt lead to end state
@@ -339,54 +443,435 @@ class Symbolic(object):
         :param automaton_2: the second automaton
         :return: automaton created by intersection
         """
-        intersect = self.get_new()
-        intersect.alphabet = self.alphabet.intersection(automaton_2.alphabet)
-        intersect.reversed = None
-
-        queue = list(itertools.product(self.start, automaton_2.start))
-        intersect.start = set()
-        for q in queue:
-            intersect.start.add("[" + q[0] + "_1|" + q[1] + "_2]")
+        if not self.is_epsilon_free or not automaton_2.is_epsilon_free:
+            # epsilon transitions are not paired with labels of the other automaton, closures are folded in first
+            return self.remove_epsilon().intersection(automaton_2.remove_epsilon())
 
-        while len(queue) > 0:
-            combined = queue.pop()
-            state1 = combined[0]
-            state2 = combined[1]
-            combined_str = "[" + state1 + "_1|" + state2 + "_2]"
-            intersect.states.add(combined_str)
+        intersect = self.get_product(automaton_2, self.get_label_pairing(automaton_2))
+        intersect.alphabet = self.alphabet.intersection(automaton_2.alphabet)
 
-            if combined_str not in intersect.transitions:
-                intersect.transitions[combined_str] = {}
+        intersect = intersect.simple_reduce()
 
-            if state1 in self.final and state2 in automaton_2.final:
-                intersect.final.add(combined_str)
+        return intersect
 
-            if state1 in self.transitions and state2 in automaton_2.transitions:
+    def get_label_pairing(self, other):
+        """
+        Creates function pairing labels of a state of self with labels of a state of other automaton
+        labels of other automaton are indexed by minterms of labels of both automata,
+        so only labels sharing a minterm are conjuncted
+        if labels do not support minterms, every pair of labels is tried
+        epsilon labels are not paired, both automata have to be epsilon free, see remove_epsilon
+        :param other: the second automaton
+        :return: function (state1, state2) -> list of (common label, endstates1, endstates2)
+        """
+        labels = set()
+        for automaton in (self, other):
+            for state in automaton.transitions:
+                labels.update(automaton.transitions[state].keys())
+        minterms = self.get_minterms(labels)
+
+        if minterms is None:
+            def pair_labels(state1, state2):
+                result = []
                 for label in self.transitions[state1]:
-                    for label2 in automaton_2.transitions[state2]:
+                    for label2 in other.transitions[state2]:
                         common = label.conjunction(label2)
-                        #print(common)
                         if common and common.is_satisfiable():
-                            endstates = itertools.product(self.transitions[state1][label], automaton_2.transitions[state2][label2])
-                            for endstate in endstates:
-                                endstate_str = "[" + endstate[0] + "_1|" + endstate[1] + "_2]"
-                                #endstate = self.transitions[state1][label][0] + "," + automaton_2.transitions[state2][label2][0]
+                            result.append((common, self.transitions[state1][label], other.transitions[state2][label2]))
+                return result
 
-                                if common not in intersect.transitions[combined_str]:
-                                    intersect.transitions[combined_str][common] = [endstate_str]
-                                else:
-                                    intersect.transitions[combined_str][common].append(endstate_str)
+            return pair_labels
 
-                                if endstate not in queue and endstate_str not in intersect.states:
-                                    queue.append(endstate)
-                                #print(intersect.transitions)
+        # indices of minterms covered by every label
+        covered = {}
+        for label in labels:
+            if not label.is_epsilon:
+                covered[label] = [i for i, minterm in enumerate(minterms) if minterm.conjunction(label).is_satisfiable()]
 
-        intersect = intersect.simple_reduce()
-        #print(intersect.transitions)
-        #intersect.remove_commas_from_states()
+        # labels of every state of other automaton indexed by minterms
+        index = {}
+        for state in other.transitions:
+            index[state] = {}
+            for label in other.transitions[state]:
+                for i in covered.get(label, []):
+                    if i in index[state]:
+                        index[state][i].append(label)
+                    else:
+                        index[state][i] = [label]
+
+        def pair_labels(state1, state2):
+            result = []
+            by_minterm = index[state2]
+            for label in self.transitions[state1]:
+                paired = set()
+                for i in covered.get(label, []):
+                    for label2 in by_minterm.get(i, []):
+                        if label2 not in paired:
+                            paired.add(label2)
+                            result.append((label.conjunction(label2), self.transitions[state1][label], other.transitions[state2][label2]))
+            return result
+
+        return pair_labels
+
+    @stats.timed("product")
+    def get_product(self, other, pair_labels, final_condition=None):
+        """
+        Explores product of two automata reachable from pairs of initial states
+        states of both automata are numbered and a pair is encoded as one integer,
+        visited pairs are kept in a dictionary and the name of a product state is created only once
+        :param other: the second automaton
+        :param pair_labels: function (state1, state2) -> list of (label, endstates1, endstates2)
+        :param final_condition: function (state1, state2) -> bool, both states final by default
+        :return: product automaton without reduction
+        """
+        if final_condition is None:
+            final_condition = lambda state1, state2: self.is_final(state1) and other.is_final(state2)
+
+        product = self.get_new()
+        product.reversed = None
+        product.start = set()
+        product.label = getattr(self, "label", None)
+
+        numbers1, names1 = self.number_states()
+        numbers2, names2 = other.number_states()
+        width = len(names2)
+
+        # encoded pair -> name of product state
+        visited = {}
+        queue = []
+        for state1, state2 in itertools.product(self.start, other.start):
+            pair = numbers1[state1] * width + numbers2[state2]
+            if pair not in visited:
+                visited[pair] = "[" + state1 + "_1|" + state2 + "_2]"
+                queue.append(pair)
+            product.start.add(visited[pair])
+
+        statistics = stats.get_active()
+        while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
+            pair = queue.pop()
+            state1 = names1[pair // width]
+            state2 = names2[pair % width]
+            combined_str = visited[pair]
+            product.states.add(combined_str)
+            product_transitions = {}
+            product.transitions[combined_str] = product_transitions
+
+            if final_condition(state1, state2):
+                product.final.add(combined_str)
+
+            if state1 in self.transitions and state2 in other.transitions:
+                for label, endstates1, endstates2 in pair_labels(state1, state2):
+                    for end1 in endstates1:
+                        base = numbers1[end1] * width
+                        for end2 in endstates2:
+                            endpair = base + numbers2[end2]
+                            if endpair not in visited:
+                                visited[endpair] = "[" + end1 + "_1|" + end2 + "_2]"
+                                queue.append(endpair)
+                            if label in product_transitions:
+                                product_transitions[label].append(visited[endpair])
+                            else:
+                                product_transitions[label] = [visited[endpair]]
+                if statistics is not None:
+                    statistics.count("transitions_generated", sum(len(ends) for ends in product_transitions.values()))
+
+        return product
+
+    def intersection_many(self, others, order_by_size=True, trim=True, simple_reduce=True):
+        """
+        Performs intersection of more automata at once
+        explores the product of all automata directly, no intermediate products are built
+        :param others: list of other automata
+        :param order_by_size: order automata by number of states, the smallest one drives label pairing
+        :param trim: skip tuples containing a state that does not lead to a final state of its automaton
+                     and stop immediately if language of some automaton is empty
+                     or intersection of the first automaton with another one is empty
+        :param simple_reduce: remove unreachable and useless states of the product by simple_reduce
+        :return: automaton created by intersection, state names list components in the used order
+        """
+        # epsilon transitions are not combined with labels of other automata, closures are folded in first
+        automata = [automaton if automaton.is_epsilon_free else automaton.remove_epsilon()
+                    for automaton in [self] + list(others)]
+        if order_by_size:
+            automata.sort(key=lambda automaton: len(automaton.states))
+
+        intersect = self.get_tuple_product(automata, self.get_label_combination(automata), trim)
+        intersect.alphabet = automata[0].alphabet.copy()
+        for automaton in automata[1:]:
+            intersect.alphabet = intersect.alphabet.intersection(automaton.alphabet)
+
+        if simple_reduce:
+            intersect = intersect.simple_reduce()
 
         return intersect
 
+    def get_label_combination(self, automata):
+        """
+        Creates function combining labels of states of more automata
+        labels are indexed by minterms of labels of all automata, so only labels sharing a minterm are conjuncted
+        if labels do not support minterms, every combination of labels is tried
+        :param automata: list of automata
+        :return: function (tuple of states) -> list of (common label, list of endstates for every automaton)
+        """
+        labels = set()
+        for automaton in automata:
+            for state in automaton.transitions:
+                labels.update(automaton.transitions[state].keys())
+        minterms = self.get_minterms(labels)
+
+        if minterms is None:
+            def combine_labels(states):
+                combined = [(None, [])]
+                for automaton, state in zip(automata, states):
+                    extended = []
+                    for label, endstates in combined:
+                        for label2 in automaton.transitions[state]:
+                            common = label2 if label is None else label.conjunction(label2)
+                            if common and common.is_satisfiable():
+                                extended.append((common, endstates + [automaton.transitions[state][label2]]))
+                    combined = extended
+                return combined
+
+            return combine_labels
+
+        # indices of minterms covered by every label
+        covered = {}
+        for label in labels:
+            if not label.is_epsilon:
+                covered[label] = [i for i, minterm in enumerate(minterms) if minterm.conjunction(label).is_satisfiable()]
+
+        # labels of every state of every automaton indexed by minterms
+        indexes = []
+        for automaton in automata:
+            index = {}
+            for state in automaton.transitions:
+                index[state] = {}
+                for label in automaton.transitions[state]:
+                    for i in covered.get(label, []):
+                        if i in index[state]:
+                            index[state][i].append(label)
+                        else:
+                            index[state][i] = [label]
+            indexes.append(index)
+
+        def combine_labels(states):
+            result = []
+            combined = set()
+            for i, first_labels in indexes[0][states[0]].items():
+                choices = [first_labels]
+                for index, state in zip(indexes[1:], states[1:]):
+                    if i not in index[state]:
+                        break
+                    choices.append(index[state][i])
+                else:
+                    for chosen in itertools.product(*choices):
+                        if chosen in combined:
+                            continue
+                        combined.add(chosen)
+                        common = chosen[0]
+                        for label in chosen[1:]:
+                            common = common.conjunction(label)
+                        result.append((common, [automaton.transitions[state][label]
+                                                for automaton, state, label in zip(automata, states, chosen)]))
+            return result
+
+        return combine_labels
+
+    @stats.timed("product")
+    def get_tuple_product(self, automata, combine_labels, trim=True):
+        """
+        Explores product of more automata reachable from tuples of initial states
+        a tuple of states is encoded as one integer in mixed radix of numbers of states
+        :param automata: list of automata
+        :param combine_labels: function (tuple of states) -> list of (label, list of endstates for every automaton)
+        :param trim: skip tuples containing a state that does not lead to a final state of its automaton,
+                     return an empty product if language of some automaton
+                     or intersection of the first automaton with another one is empty
+        :return: product automaton without reduction, final if all components are final
+        """
+        product = self.get_new()
+        product.reversed = None
+        product.start = set()
+        product.label = getattr(self, "label", None)
+
+        numberings = []
+        for automaton in automata:
+            numberings.append(automaton.number_states()[0])
+
+        useful = None
+        if trim:
+            useful = []
+            for automaton in automata:
+                useful.append(automaton.get_useful_states())
+                if not useful[-1].intersection(automaton.start):
+                    # language of one automaton is empty, so is the intersection
+                    return product
+            if len(automata) > 2:
+                # pairs are explored lazily and much faster than tuples of all automata,
+                # an empty intersection of two automata makes the whole one empty
+                for automaton in automata[1:]:
+                    if automata[0].is_intersection_empty(automaton)[0]:
+                        return product
+
+        multipliers = []
+        multiplier = 1
+        for numbers in reversed(numberings):
+            multipliers.append(multiplier)
+            multiplier *= len(numbers)
+        multipliers.reverse()
+
+        # encoded tuple -> name of product state
+        visited = {}
+        queue = []
+
+        def reach(states):
+            if useful is not None:
+                for state, useful_states in zip(states, useful):
+                    if state not in useful_states:
+                        return None
+            key = 0
+            for state, numbers, multiplier in zip(states, numberings, multipliers):
+                key += numbers[state] * multiplier
+            if key not in visited:
+                visited[key] = "[" + "|".join(state + "_" + str(i) for i, state in enumerate(states, 1)) + "]"
+                queue.append((states, visited[key]))
+            return visited[key]
+
+        for states in itertools.product(*[automaton.start for automaton in automata]):
+            name = reach(states)
+            if name is not None:
+                product.start.add(name)
+
+        statistics = stats.get_active()
+        while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
+            states, combined_str = queue.pop()
+            product.states.add(combined_str)
+            product_transitions = {}
+            product.transitions[combined_str] = product_transitions
+
+            if all(automaton.is_final(state) for automaton, state in zip(automata, states)):
+                product.final.add(combined_str)
+
+            if not all(state in automaton.transitions for automaton, state in zip(automata, states)):
+                continue
+
+            for label, endstates in combine_labels(states):
+                for ends in itertools.product(*endstates):
+                    name = reach(ends)
+                    if name is None:
+                        continue
+                    if label in product_transitions:
+                        product_transitions[label].append(name)
+                    else:
+                        product_transitions[label] = [name]
+            if statistics is not None:
+                statistics.count("transitions_generated", sum(len(ends) for ends in product_transitions.values()))
+
+        return product
+
+    @stats.timed("is_intersection_empty")
+    def is_intersection_empty(self, other):
+        """
+        Checks whether intersection of languages of two automata is empty
+        the product is explored lazily in breadth-first order and the search stops
+        at the first reachable pair of final states, the product is never built
+        :param other: the second automaton
+        :return: tuple (True, None) if the intersection is empty, (False, shortest witness word) otherwise
+        """
+        if not self.is_epsilon_free or not other.is_epsilon_free:
+            # epsilon transitions are not paired with labels of the other automaton, closures are folded in first
+            return self.remove_epsilon().is_intersection_empty(other.remove_epsilon())
+
+        pair_labels = self.get_label_pairing(other)
+        numbers1, names1 = self.number_states()
+        numbers2, names2 = other.number_states()
+        width = len(names2)
+
+        # encoded pair -> (encoded predecessor pair, label) for witness reconstruction
+        parents = {}
+        queue = deque()
+        for state1, state2 in itertools.product(self.start, other.start):
+            pair = numbers1[state1] * width + numbers2[state2]
+            if pair not in parents:
+                parents[pair] = None
+                queue.append(pair)
+                if self.is_final(state1) and other.is_final(state2):
+                    return False, []
+
+        statistics = stats.get_active()
+        while len(queue) > 0:
+            if statistics is not None:
+                statistics.count("states_explored")
+                statistics.peak("frontier_size", len(queue))
+            pair = queue.popleft()
+            state1 = names1[pair // width]
+            state2 = names2[pair % width]
+            if state1 not in self.transitions or state2 not in other.transitions:
+                continue
+
+            for label, endstates1, endstates2 in pair_labels(state1, state2):
+                for end1 in endstates1:
+                    base = numbers1[end1] * width
+                    for end2 in endstates2:
+                        endpair = base + numbers2[end2]
+                        if endpair in parents:
+                            continue
+                        parents[endpair] = (pair, label)
+                        if self.is_final(end1) and other.is_final(end2):
+                            return False, self.get_witness(parents, endpair)
+                        queue.append(endpair)
+
+        return True, None
+
+    def get_witness(self, parents, pair):
+        """
+        Reconstructs word leading to a pair of states in product exploration
+        :param parents: dictionary pair -> (predecessor pair, label), None for initial pairs
+        :param pair: reached pair
+        :return: list of symbols
+        """
+        word = []
+        while parents[pair] is not None:
+            pair, label = parents[pair]
+            word.append(self.get_witness_symbol(label))
+        word.reverse()
+
+        return word
+
+    def get_witness_symbol(self, label):
+        """
+        Picks one symbol of the alphabet satisfying the label
+        :param label: transition label
+        :return: symbol, the label itself if no symbol of the alphabet satisfies it
+        """
+        for symbol in sorted(self.alphabet):
+            if label.has_letter(symbol):
+                return symbol
+        return label
+
+    def number_states(self):
+        """
+        Assigns numbers to all states used in the automaton
+        :return: tuple (dictionary state -> number, list of states indexed by numbers)
+        """
+        names = list(self.states.union(self.start))
+        for state in self.transitions:
+            names.append(state)
+            for label in self.transitions[state]:
+                names.extend(self.transitions[state][label])
+        numbers = {}
+        for state in names:
+            if state not in numbers:
+                numbers[state] = len(numbers)
+
+        return numbers, list(numbers)
+
     def union(self, other):
         """
         Performss union of two automata
@@ -431,6 +916,44 @@ class Symbolic(object):
 
         return uni
 
+    def union_many(self, others):
+        """
+        Performs union of more automata at once
+        states of the i-th automaton get suffix _i, names are not nested as in repeated union
+        :param others: list of other automata
+        :return: automaton created by union
+        """
+        automata = [self] + list(others)
+        uni = self.get_new()
+        uni.reversed = None
+        uni.start = set()
+        uni.states = set()
+
+        for i, automaton in enumerate(automata, 1):
+            suffix = "_" + str(i)
+            uni.alphabet = uni.alphabet.union(automaton.alphabet)
+            for q in automaton.start:
+                uni.start.add(q + suffix)
+            for q in automaton.states:
+                uni.states.add(q + suffix)
+            for state in automaton.transitions:
+                state_str = state + suffix
+                uni.transitions[state_str] = {}
+                for label in automaton.transitions[state]:
+                    uni.transitions[state_str][label] = []
+                    for endstate in automaton.transitions[state][label]:
+                        uni.transitions[state_str][label].append(endstate + suffix)
+
+        self.get_final_union_many(automata, uni)
+
+        return uni
+
+    def get_final_union_many(self, automata, uni):
+        uni.final = set()
+        for i, automaton in enumerate(automata, 1):
+            for q in automaton.final:
+                uni.final.add(q + "_" + str(i))
+
     def get_final_union(self, other, uni):
         uni.final = set()
         for q in self.final:
@@ -477,6 +1000,175 @@ class Symbolic(object):
                             return "State " + state + " not in states."
         return "OK"
 
+    def get_hash(self):
+        """
+        Computes content hash of the automaton, it does not depend on the order of states,
+        transitions or symbols, but it depends on names of states
+        :return: hexadecimal sha256 digest
+        """
+        if self.automaton_type == "GBA":
+            final = [sorted(final_set) for final_set in self.final]
+        else:
+            final = sorted(self.final)
+        transitions = []
+        for state in self.transitions:
+            for label in self.transitions[state]:
+                for endstate in self.transitions[state][label]:
+                    transitions.append((state, str(label), endstate))
+        content = [type(self).__name__, self.automaton_type, sorted(self.alphabet), sorted(self.states),
+                   sorted(self.start), final, sorted(transitions)]
+
+        return hashlib.sha256(repr(content).encode("utf-8")).hexdigest()
+
+    def get_structure(self):
+        """
+        Trims the automaton without copying it (Buchi automata are trimmed only from unreachable states)
+        and numbers its states by refining their signatures (initial and final flags, labels and numbers
+        of successors) until the numbering is stable, numbers do not depend on names of states
+        :return: tuple (dictionary state -> list of (label string, endstate),
+                 dictionary state -> (initial flag, final flag), dictionary state -> number)
+        """
+        # states are trimmed in place of simple_reduce, copying big automata costs more than hashing them
+        live = self.get_reachable_states()
+        if self.automaton_type != "GBA":
+            live &= self.get_useful_states()
+        edges = {}
+        flags = {}
+        for state in live:
+            edges[state] = []
+            for label in self.transitions.get(state, {}):
+                for endstate in self.transitions[state][label]:
+                    if endstate in live:
+                        edges[state].append((str(label), endstate))
+            if self.automaton_type == "GBA":
+                final = tuple(i for i in range(len(self.final)) if state in self.final[i])
+            else:
+                final = state in self.final
+            flags[state] = (state in self.start, final)
+
+        numbers = self.get_ranks(flags)
+        count = len(set(numbers.values()))
+        while True:
+            signatures = {}
+            for state in edges:
+                signatures[state] = (numbers[state], sorted((label, numbers[end]) for label, end in edges[state]))
+            new_numbers = self.get_ranks(signatures)
+            new_count = len(set(new_numbers.values()))
+            numbers = new_numbers
+            if new_count == count:
+                # signatures only refine the previous numbering, same count means the numbering is stable
+                break
+            count = new_count
+
+        return edges, flags, numbers
+
+    def get_structural_content(self, structure=None):
+        """
+        Describes the trimmed automaton by numbers of its states, see get_structure
+        :param structure: result of get_structure, computed if not given
+        :return: list of the type, the alphabet and sorted descriptions of states
+        """
+        edges, flags, numbers = structure or self.get_structure()
+        content = [self.automaton_type, sorted(self.alphabet)]
+        content.append(sorted((numbers[state], flags[state], sorted((label, numbers[end]) for label, end in edges[state]))
+                              for state in edges))
+        return content
+
+    def get_structural_hash(self):
+        """
+        Computes hash of the trimmed automaton which does not depend on names of states
+        isomorphic automata have the same hash, so different hashes mean that automata are not isomorphic,
+        the numbering by refinement is not canonical, so automata with the same hash need not be isomorphic,
+        is_isomorphic decides it
+        :return: hexadecimal sha256 digest
+        """
+        return hashlib.sha256(repr(self.get_structural_content()).encode("utf-8")).hexdigest()
+
+    def is_isomorphic(self, other):
+        """
+        Checks whether the trimmed automata are isomorphic
+        a state can be mapped only to a state with the same number of get_structure, states of the smallest
+        classes are mapped first and a mapping is extended only if it preserves transitions between mapped states
+        :param other: other automaton
+        :return: bool
+        """
+        structure = self.get_structure()
+        structure2 = other.get_structure()
+        if self.get_structural_content(structure) != other.get_structural_content(structure2):
+            return False
+        edges, _, numbers = structure
+        edges2, _, numbers2 = structure2
+
+        classes = {}
+        for state in edges2:
+            classes.setdefault(numbers2[state], []).append(state)
+        successors = dict((state, set(edges[state])) for state in edges)
+        successors2 = dict((state, set(edges2[state])) for state in edges2)
+        predecessors = dict((state, set()) for state in edges)
+        predecessors2 = dict((state, set()) for state in edges2)
+        for state in edges:
+            for label, end in edges[state]:
+                predecessors[end].add((state, label))
+        for state in edges2:
+            for label, end in edges2[state]:
+                predecessors2[end].add((state, label))
+
+        order = sorted(edges, key=lambda state: (len(classes[numbers[state]]), numbers[state]))
+        mapping = {}
+        used = set()
+
+        def is_consistent(state, image):
+            for label, end in successors[state]:
+                if end in mapping and (label, mapping[end]) not in successors2[image]:
+                    return False
+            for start, label in predecessors[state]:
+                if start in mapping and (mapping[start], label) not in predecessors2[image]:
+                    return False
+            return True
+
+        # candidates left for every position of order, the mapping is extended iteratively with backtracking
+        candidates = []
+        position = 0
+        while position < len(order):
+            state = order[position]
+            if position == len(candidates):
+                candidates.append(list(classes[numbers[state]]))
+            if state in mapping:
+                used.discard(mapping.pop(state))
+            found = False
+            while candidates[position]:
+                image = candidates[position].pop()
+                if image in used:
+                    continue
+                mapping[state] = image
+                if is_consistent(state, image):
+                    used.add(image)
+                    found = True
+                    break
+                del mapping[state]
+            if found:
+                position += 1
+            else:
+                candidates.pop()
+                position -= 1
+                if position < 0:
+                    return False
+
+        return True
+
+    @staticmethod
+    def get_ranks(signatures):
+        """
+        Numbers states by the order of their signatures, states with equal signatures get equal numbers
+        :param signatures: dictionary state -> signature
+        :return: dictionary state -> number
+        """
+        order = {}
+        for signature in sorted(set(repr(signature) for signature in signatures.values())):
+            order[signature] = len(order)
+
+        return dict((state, order[repr(signature)]) for state, signature in signatures.items())
+
     @staticmethod
     def get_new():
         """
@@ -500,6 +1192,52 @@ class Symbolic(object):
             result.extend([subset + [x] for subset in result])
         return result
 
+    @staticmethod
+    def get_minterms(labels, alphabet=None):
+        """
+        Computes satisfiable minterms of given labels
+        every minterm is a conjunction of each label or its negation,
+        minterms are pairwise disjoint and every label is a union of some of them
+        :param labels: labels to split into minterms
+        :param alphabet: if given, only minterms containing some symbol of the alphabet are kept
+        :return: list of minterms, None if labels cannot be negated
+        """
+        minterms = []
+        negations = 0
+        checks = 0
+        for label in set(labels):
+            if label.is_epsilon:
+                continue
+            if not minterms:
+                minterms = [label.get_universal()]
+                if minterms[0] is None:
+                    # the label does not implement the whole predicate interface
+                    return None
+            negation = label.negation()
+            negations += 1
+            refined = []
+            # split every minterm into the part inside and the part outside of the label
+            for minterm in minterms:
+                inside = minterm.conjunction(label)
+                if inside.is_satisfiable():
+                    refined.append(inside)
+                outside = minterm.conjunction(negation)
+                if outside.is_satisfiable():
+                    refined.append(outside)
+            checks += len(minterms)
+            minterms = refined
+
+        statistics = stats.get_active()
+        if statistics is not None:
+            # two conjunctions and two satisfiability checks per split minterm
+            statistics.count("predicate_operations", negations + 2 * checks)
+            statistics.count("satisfiability_checks", 2 * checks)
+
+        if alphabet is not None:
+            minterms = [minterm for minterm in minterms if any(minterm.has_letter(a) for a in alphabet)]
+
+        return minterms
+
     def get_automaton_name(self):
         """
         Returns automaton name.
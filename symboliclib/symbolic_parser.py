@@ -4,6 +4,7 @@ Automata and transducer parser
 Copyright (c) 2017  Michaela Bielikova <xbieli06@stud.fit.vutbr.cz>
 """
 from __future__ import print_function
+import sys
 from sa import SA
 from lfa import LFA
 from st import ST
@@ -19,7 +20,8 @@ def parse(testfile):
     """
     if not testfile:
         print("No filename was given.")
-        exit(1)
+        # exit() of the site module would close standard input of a server reading requests from it
+        sys.exit(1)
     parse_transitions = False
     alpha = set()
     automaton_type = ""
@@ -45,6 +47,8 @@ def parse(testfile):
                 if '"' in line:
                     parts = parts[0].split("\"")
                     predicate = parsePredicate(parts[1], automaton_type)
+                    if automaton_type in ["INT", "LT"] and predicate.has_epsilon():
+                        epsilon_free = False
                 else:
                     if line.strip().startswith("("):
                         predicate = Epsilon()
@@ -95,6 +99,10 @@ def parse(testfile):
                         from transducer_predicate import parsePredicate
                         from transducer_predicate import TransPred
                         label = TransPred()
+                    elif automaton_type == "SMT":
+                        from solver_predicate_parser import parsePredicate
+                        from solver_predicate import SolverPredicate
+                        label = SolverPredicate()
                     elif automaton_type == "GBA":
                         from letter_parser import parsePredicate
                         from letter import Letter
@@ -172,6 +180,7 @@ def type_to_class(type_name):
     """
     return {
         "INFA": SA(),
+        "SMT": SA(),
         "LFA": LFA(),
         "INT": ST(),
         "GBA": BA(),
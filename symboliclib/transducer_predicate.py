@@ -6,6 +6,8 @@ Copyright (c) 2017  Michaela Bielikova <xbieli06@stud.fit.vutbr.cz>
 """
 import abc
 import random
+import sys
+from epsilon import Epsilon
 from predicate_interface import PredicateInterface
 
 
@@ -18,11 +20,23 @@ class TransPred(PredicateInterface):
         input       input predicate
         output      output predicate
         identity    flag if the label represents identity
+        _hash       cached structural hash, computed on first use, labels are not changed once they are used
     """
-    def __init__(self):
-        self.input = None
-        self.output = None
-        self.identity = False
+    def __init__(self, input=None, output=None, identity=False):
+        self.input = input
+        self.output = output
+        self.identity = identity
+        self._hash = None
+
+    def __getstate__(self):
+        # hashes of strings are salted per process, never ship the cached one
+        state = self.__dict__.copy()
+        state["_hash"] = None
+        return state
+
+    def __setstate__(self, state):
+        self._hash = None
+        self.__dict__.update(state)
 
     def __str__(self):
         if self.identity:
@@ -37,10 +51,19 @@ class TransPred(PredicateInterface):
             return str(self.input) + "/" + str(self.output)
 
     def __eq__(self, other):
-        return (self.identity, self.input, self.output) == (other.identity, other.input, other.output)
+        if self is other:
+            return True
+        if not isinstance(other, TransPred):
+            return False
+        if self.identity != other.identity or hash(self) != hash(other):
+            return False
+        return self.input == other.input and self.output == other.output
 
     def __hash__(self):
-        return hash((self.identity, str(self.input), str(self.output)))
+        if self._hash is None:
+            # structural hash of the guards, computed once per label
+            self._hash = hash((self.identity, self.input, self.output))
+        return self._hash
 
     @abc.abstractmethod
     def complement(self):
@@ -48,11 +71,7 @@ class TransPred(PredicateInterface):
         Predicate negation
         :return: negation of given predicate
         """
-        result = TransPred()
-        result.identity = self.identity
-        result.input = self.input.complement()
-        result.output = self.output.complement()
-        return result
+        return TransPred(self.input.complement(), self.output.complement(), self.identity)
 
     @abc.abstractmethod
     def conjunction(self, predicate):
@@ -61,23 +80,18 @@ class TransPred(PredicateInterface):
         :param predicate: second predicate
         :return: conjunction of two predicates
         """
-        result = TransPred()
         if self.identity or predicate.identity:
-            result.identity = True
-        else:
-            result.identity = False
-
-        if result.identity:
-            identic_input = self.input.conjunction(predicate.input)
-            identic_output = self.output.conjunction(predicate.output)
-            identic = identic_input.conjunction(identic_output)
-            result.input = identic
-            result.output = identic
-        else:
-            result.input = self.input.conjunction(predicate.input)
-            result.output = self.output.conjunction(predicate.output)
+            # identity labels share one guard for input and output, conjunct every distinct guard only once
+            guards = []
+            for guard in (self.input, self.output, predicate.input, predicate.output):
+                if not any(guard is seen for seen in guards):
+                    guards.append(guard)
+            identic = guards[0]
+            for guard in guards[1:]:
+                identic = identic.conjunction(guard)
+            return TransPred(identic, identic, True)
 
-        return result
+        return TransPred(self.input.conjunction(predicate.input), self.output.conjunction(predicate.output))
 
     @abc.abstractmethod
     def disjunction(self, predicate):
@@ -86,24 +100,13 @@ class TransPred(PredicateInterface):
         :param predicate: second predicate
         :return: disjunction of two predicates
         """
-        result = TransPred()
-
         if self.identity or predicate.identity:
-            result.identity = True
-        else:
-            result.identity = False
-
-        if result.identity:
-            identic_input = self.input.disjunction(predicate.input)
-            identic_output = self.output.disjunction(predicate.output)
-            identic = identic_input.conjunction(identic_output)
-            result.input = identic
-            result.output = identic
-        else:
-            result.input = self.input.disjunction(predicate.input)
-            result.output = self.output.disjunction(predicate.output)
+            identic = self.input.disjunction(predicate.input)
+            if self.output is not self.input or predicate.output is not predicate.input:
+                identic = identic.conjunction(self.output.disjunction(predicate.output))
+            return TransPred(identic, identic, True)
 
-        return result
+        return TransPred(self.input.disjunction(predicate.input), self.output.disjunction(predicate.output))
 
     @abc.abstractmethod
     def is_equal(self, predicate):
@@ -146,30 +149,36 @@ class TransPred(PredicateInterface):
         Checks whether the given predicate is satisfiable
         :return: bool
         """
-        if not self.input.is_satisfiable():
+        if not self.input.is_epsilon and not self.input.is_satisfiable():
             return False
-        if not self.output.is_satisfiable():
+        if not self.output.is_epsilon and not self.output.is_satisfiable():
             return False
 
         return True
 
+    def has_epsilon(self):
+        """
+        Checks whether the label reads or writes epsilon
+        :return: bool
+        """
+        return self.input.is_epsilon or self.output.is_epsilon
+
     def combine(self, other):
         """
         Creates composition of two given labels
         :param other: the second predicate
         :return: composed predicate
         """
-        result = TransPred()
-        if self.identity or result.identity:
-            result.identity = True
-            identic = self.input.conjunction(other.output)
-            result.input = identic
-            result.output = identic
-        else:
-            result.identity = False
-            result.input = self.input
-            result.output = other.output
-        return result
+        if self.identity and other.identity:
+            identic = self.input.conjunction(other.input)
+            return TransPred(identic, identic, True)
+        if self.identity:
+            # symbols kept by self must be read by other
+            return TransPred(self.input.conjunction(other.input), other.output)
+        if other.identity:
+            # symbols written by self must be kept by other
+            return TransPred(self.input, self.output.conjunction(other.input))
+        return TransPred(self.input, other.output)
 
     def translates(self, a, b):
         """
@@ -178,6 +187,8 @@ class TransPred(PredicateInterface):
         :param b: the output symbol
         :return: bool
         """
+        if self.has_epsilon():
+            return False
         if self.identity:
             if self.input.has_letter(a) and a == b:
                 return True
@@ -193,6 +204,8 @@ class TransPred(PredicateInterface):
         :param alphabet: alphabet of the automaton
         :return: translation fo the symbol
         """
+        if self.has_epsilon():
+            return False
         if self.input.has_letter(a):
             if self.identity:
                 return a
@@ -204,9 +217,22 @@ class TransPred(PredicateInterface):
             return False
 
 
+def parsePart(part, parsePr):
+    """
+    Parses the input or the output part of a transducer predicate
+    :param part: part of the predicate string
+    :param parsePr: parser of the predicates of the part
+    :return: predicate object, epsilon if the part is empty
+    """
+    if not part.strip():
+        return Epsilon()
+    return parsePr(part)
+
+
 def parsePredicate(pred, automaton_type):
     """
     Parses given predicate
+    an empty input or output part is epsilon, e.g. "in{a}/" deletes a and "/in{b}" inserts b
     :param pred: predicate string
     :param automaton_type: type of the automaton
     :return: predicate object
@@ -222,8 +248,11 @@ def parsePredicate(pred, automaton_type):
         from letter_parser import parsePredicate as parsePr
     else:
         print("Unsupported transducer type.")
-        exit(-1)
-    result.input = parsePr(pred_parts[0])
-    result.output = parsePr(pred_parts[1])
+        sys.exit(-1)
+    result.input = parsePart(pred_parts[0], parsePr)
+    result.output = parsePart(pred_parts[1], parsePr)
+    if result.identity and result.output == result.input:
+        # identity labels share one guard object, so it is hashed and conjuncted only once
+        result.output = result.input
 
     return result
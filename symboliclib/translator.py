@@ -0,0 +1,318 @@
+"""
+Application of transducers to streams of words
+
+moves of the transducer from every state over every symbol of its alphabet are computed once
+and shared by all translated words, sets of states are bitsets and steps between them are cached,
+so a word costs a few lookups per symbol, translations of repeated words are cached
+
+a word is a string of one character symbols, or a list of symbols,
+lines of a file are split into symbols by a separator if it is given
+
+usage:
+    from translator import Translator
+    translator = Translator(transducer)
+    translator.translate("abba")
+    for translation in translator.translate_many(words):
+        print(translation)
+    with open("words.txt") as stream:
+        for translation in translator.translate_stream(stream, processes=4):
+            print(translation)
+
+translations of words without any translation are False, translations by transducers
+with epsilon transitions are None, as in ST.translate_one,
+translate_parallel and translate_stream with processes keep the order of the words
+"""
+from __future__ import print_function
+from matcher import get_mask, get_members
+import itertools
+import multiprocessing
+
+# translator of a worker process, set by init_worker
+worker_translator = None
+
+
+def init_worker(translator):
+    """
+    Stores the translator in the worker process, so that it is sent only once
+    :param translator: Translator
+    """
+    global worker_translator
+    worker_translator = translator
+
+
+def translate_chunk(words):
+    """
+    Translates a chunk of words in a worker process
+    :param words: list of words
+    :return: list of translations
+    """
+    return [worker_translator.translate(word) for word in words]
+
+
+def get_chunks(words, chunk_size):
+    """
+    Divides words into lists lazily
+    :param words: iterable of words
+    :param chunk_size: number of words of a list
+    :return: generator of lists of words
+    """
+    words = iter(words)
+    while True:
+        chunk = list(itertools.islice(words, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+class Translator(object):
+    """
+    Translator of words by a symbolic transducer
+    sets of states are bitsets, the steps from a set of states over a symbol are cached,
+    so the passes over a word mostly cost one lookup per symbol as in a lazily determinized transducer,
+    a word with symbols outside the alphabet is translated by the transducer itself,
+    translation of words is not implemented yet for transducers with epsilon transitions,
+    such a transducer is reported once and all its translations are None
+
+    Attributes:
+        transducer  the transducer
+        alphabet    sorted list of symbols of the alphabet
+        columns     dictionary symbol -> index of the symbol
+        moves       dictionary (state, symbol) -> moves of the transducer, see ST.get_moves
+        outputs     list indexed by symbol indexes of lists of moves indexed by state numbers,
+                    a move is a tuple (sorted list of output symbols, bitset of endstates)
+        successors  list indexed by symbol indexes of lists of bitsets of successors indexed by state numbers
+        start       bitset of initial states
+        final       bitset of final states
+        separator   separator of symbols on lines of a file, None for one character symbols
+        cache       dictionary word -> translation
+        steps       dictionary (bitset, symbol index) -> bitset of successors
+        live        dictionary (bitset, symbol index, bitset of live successors) -> bitset of states leading to them
+        choices     dictionary (bitset, symbol index, bitset of live successors) -> (output symbol, bitset)
+        cache_size  maximal number of cached translations and of entries of every cache of steps
+        epsilon_free flag whether the transducer is epsilon free, words are translated only if it is
+    """
+    def __init__(self, transducer, separator=None, cache_size=100000):
+        self.transducer = transducer
+        self.epsilon_free = transducer.check_epsilon_free()
+        if not self.epsilon_free:
+            print("Translation of words not implemented yet for transducers with epsilon transitions")
+        self.alphabet = sorted(transducer.alphabet)
+        self.columns = dict((symbol, column) for column, symbol in enumerate(self.alphabet))
+        numbers, names = transducer.number_states()
+        self.moves = {}
+        self.outputs = []
+        self.successors = []
+        for symbol in self.alphabet:
+            outputs = []
+            successors = []
+            for state in names:
+                moves = transducer.get_moves(state, symbol, self.alphabet)
+                self.moves[(state, symbol)] = moves
+                outputs.append([(output, get_mask(endstates, numbers)) for output, endstates in moves])
+                successors.append(get_mask([end for _, endstates in moves for end in endstates], numbers))
+            self.outputs.append(outputs)
+            self.successors.append(successors)
+        self.start = get_mask(transducer.start, numbers)
+        self.final = get_mask(transducer.final, numbers)
+        self.separator = separator
+        self.cache = {}
+        self.steps = {}
+        self.live = {}
+        self.choices = {}
+        self.cache_size = cache_size
+
+    def get_successor(self, current, column):
+        """
+        Computes successors of a set of states over a symbol, the result is cached
+        :param current: bitset of states
+        :param column: index of the symbol
+        :return: bitset of successors
+        """
+        key = (current, column)
+        successor = self.steps.get(key)
+        if successor is None:
+            if len(self.steps) >= self.cache_size:
+                self.steps.clear()
+            successors = self.successors[column]
+            successor = 0
+            for member in get_members(current):
+                successor |= successors[member]
+            self.steps[key] = successor
+        return successor
+
+    def get_live(self, current, column, following):
+        """
+        Finds states of a set with a move over a symbol to live states, the result is cached
+        :param current: bitset of states
+        :param column: index of the symbol
+        :param following: bitset of live states after the symbol
+        :return: bitset of live states
+        """
+        key = (current, column, following)
+        live = self.live.get(key)
+        if live is None:
+            if len(self.live) >= self.cache_size:
+                self.live.clear()
+            successors = self.successors[column]
+            live = 0
+            for member in get_members(current):
+                if successors[member] & following:
+                    live |= 1 << member
+            self.live[key] = live
+        return live
+
+    def get_choice(self, current, column, following):
+        """
+        Picks the least output symbol of moves from live states over a symbol, the result is cached
+        :param current: bitset of live states
+        :param column: index of the input symbol
+        :param following: bitset of live states after the symbol
+        :return: tuple (output symbol, bitset of live states reached by writing it)
+        """
+        key = (current, column, following)
+        choice = self.choices.get(key)
+        if choice is None:
+            if len(self.choices) >= self.cache_size:
+                self.choices.clear()
+            moves = []
+            for member in get_members(current):
+                for outputs, endstates in self.outputs[column][member]:
+                    if endstates & following:
+                        moves.append((outputs, endstates & following))
+            output = min(outputs[0] for outputs, _ in moves)
+            successor = 0
+            for outputs, endstates in moves:
+                if output in outputs:
+                    successor |= endstates
+            choice = (output, successor)
+            self.choices[key] = choice
+        return choice
+
+    def translate(self, word):
+        """
+        Finds one translation of a word, the same as ST.translate_one, the result is cached
+        :param word: string of one character symbols or list of symbols
+        :return: translation of the same type as the word, False if translation not possible,
+                 None if the transducer has epsilon transitions
+        """
+        if not self.epsilon_free:
+            return None
+        key = word if isinstance(word, str) else tuple(word)
+        translation = self.cache.get(key)
+        if translation is None:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            translation = self.get_translation(word)
+            self.cache[key] = translation
+        if isinstance(translation, list):
+            # cached lists are shared, the caller gets its own copy
+            return list(translation)
+        return translation
+
+    def get_translation(self, word):
+        """
+        Finds the least translation of a word by passes forwards, backwards and forwards over its positions
+        :param word: string of one character symbols or list of symbols
+        :return: translation of the same type as the word, False if translation not possible,
+                 None if the transducer has epsilon transitions
+        """
+        if not self.epsilon_free:
+            return None
+        columns = [self.columns.get(symbol) for symbol in word]
+        if None in columns:
+            return self.transducer.translate_one(word, moves=self.moves)
+
+        reachable = [self.start]
+        for column in columns:
+            current = self.get_successor(reachable[-1], column)
+            if not current:
+                return False
+            reachable.append(current)
+
+        following = reachable[-1] & self.final
+        if not following:
+            return False
+        live = [following]
+        for position in range(len(columns) - 1, -1, -1):
+            following = self.get_live(reachable[position], columns[position], following)
+            live.append(following)
+        live.reverse()
+
+        output = []
+        current = live[0]
+        for position, column in enumerate(columns):
+            symbol, current = self.get_choice(current, column, live[position + 1])
+            output.append(symbol)
+        if isinstance(word, str):
+            return "".join(output)
+        return output
+
+    def translate_all(self, word):
+        """
+        Generates all translations of a word lazily
+        :param word: string of one character symbols or list of symbols
+        :return: generator of translations
+        """
+        if not self.epsilon_free:
+            return iter([])
+        return self.transducer.translate_all(word, moves=self.moves)
+
+    def translate_many(self, words):
+        """
+        Translates words one by one
+        :param words: iterable of words
+        :return: generator of translations in the order of the words
+        """
+        for word in words:
+            yield self.translate(word)
+
+    def translate_parallel(self, words, processes=None, chunk_size=1024):
+        """
+        Translates words in a pool of processes
+        words are sent to the workers in chunks, the translations are returned in the order of the words
+        :param words: iterable of words, read lazily
+        :param processes: number of worker processes, number of CPUs if not given
+        :param chunk_size: number of words sent to a worker at once
+        :return: generator of translations in the order of the words
+        """
+        processes = processes or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(processes, init_worker, (self,))
+        try:
+            for translations in pool.imap(translate_chunk, get_chunks(words, chunk_size)):
+                for translation in translations:
+                    yield translation
+        finally:
+            pool.terminate()
+
+    def get_words(self, stream):
+        """
+        Reads words from a text stream, one word per line
+        :param stream: file-like object iterable by lines
+        :return: generator of words
+        """
+        for line in stream:
+            line = line.rstrip("\r\n")
+            if self.separator is None:
+                yield line
+            else:
+                yield [symbol for symbol in line.split(self.separator) if symbol]
+
+    def translate_stream(self, stream, processes=None, chunk_size=1024):
+        """
+        Translates words of a text stream, one word per line
+        :param stream: file-like object iterable by lines
+        :param processes: number of worker processes, translates in this process if not given
+        :param chunk_size: number of words sent to a worker at once
+        :return: generator of translations in the order of the lines,
+                 joined by the separator if it is given, False if translation not possible,
+                 None if the transducer has epsilon transitions
+        """
+        words = self.get_words(stream)
+        if processes is None:
+            translations = self.translate_many(words)
+        else:
+            translations = self.translate_parallel(words, processes, chunk_size)
+        for translation in translations:
+            if self.separator is not None and translation is not False and translation is not None:
+                translation = self.separator.join(translation)
+            yield translation